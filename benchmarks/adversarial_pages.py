@@ -0,0 +1,115 @@
+"""
+Adversarial profile pages and a harness that times the profile parsers on them.
+
+Each page targets a known worst case in the extractors:
+
+- label_soup:       tens of thousands of text nodes mentioning "gender", so
+                    _search_label_value cleans and re-scans every one
+- nested_reviews:   deeply nested [class*=review] wrappers, so parse_reviews
+                    re-extracts the same text once per nesting level
+- guid_at_end:      multi-MB page whose only GUID is at the very end, so
+                    _extract_provider_id re-serializes and scans everything
+- deep_nesting:     thousands of nested <div>s around the content
+- giant_text:       one multi-MB text node of whitespace-separated tokens
+- many_links:       tens of thousands of <a> tags for _extract_urls
+- normal:           an ordinary profile, for comparison
+
+    python benchmarks/adversarial_pages.py [--scale 1.0] [--write DIR] [--page-timeout S]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+NORMAL_BODY = """
+<h1 class="doctor-name">Dr. Jane Doe, MD</h1>
+<div data-npi="1234567890"></div>
+<span itemprop="medicalSpecialty">Cardiology</span>
+<p>Gender: Female</p>
+<div class="location-card"><p>Heart Clinic</p><p>1 Main St</p><p>Beverly Hills, CA 90210</p><p>(555) 555-1234</p></div>
+<h3>Insurance</h3><ul><li>Aetna</li><li>Cigna</li></ul>
+<div class="review"><p>Great doctor, very kind and attentive to my needs.</p><span>5.0</span><span>1/29/2025</span></div>
+"""
+
+def _page(body: str) -> str:
+    return f"<html><head><title>Profile</title></head><body><main>{body}</main></body></html>"
+
+def normal(scale: float) -> str:
+    return _page(NORMAL_BODY)
+
+def label_soup(scale: float) -> str:
+    n = int(40000 * scale)
+    filler = "".join(f"<span>gender neutral note {i}</span>" for i in range(n))
+    return _page(f"<div>{filler}</div>{NORMAL_BODY}")
+
+def nested_reviews(scale: float) -> str:
+    depth = int(400 * scale)
+    text = "<p>" + "This review text is long enough to count as a review. " * 20 + "</p>"
+    inner = text
+    for i in range(depth):
+        inner = f'<div class="review-wrapper-{i}">{inner}{text}</div>'
+    return _page(NORMAL_BODY + inner)
+
+def guid_at_end(scale: float) -> str:
+    n = int(60000 * scale)
+    filler = "".join(f'<div class="row" data-x="{i}">row {i}</div>' for i in range(n))
+    return _page(NORMAL_BODY + filler + '<div data-guid="E4F63621-2D8F-4AA8-8D9E-3D7AB35FC879"></div>')
+
+def deep_nesting(scale: float) -> str:
+    depth = int(5000 * scale)
+    return _page("<div>" * depth + NORMAL_BODY + "</div>" * depth)
+
+def giant_text(scale: float) -> str:
+    words = " ".join(f"word{i}" for i in range(int(600000 * scale)))
+    return _page(NORMAL_BODY + f"<p>{words}</p>")
+
+def many_links(scale: float) -> str:
+    n = int(30000 * scale)
+    links = "".join(f'<a href="/x/{i}">Book appointment {i}</a>' for i in range(n))
+    return _page(NORMAL_BODY + links)
+
+PAGES: Dict[str, Callable[[float], str]] = {
+    "normal": normal,
+    "label_soup": label_soup,
+    "nested_reviews": nested_reviews,
+    "guid_at_end": guid_at_end,
+    "deep_nesting": deep_nesting,
+    "giant_text": giant_text,
+    "many_links": many_links,
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Page size multiplier. Default: 1.0.")
+    parser.add_argument("--write", help="Also write the generated pages to this directory.")
+    parser.add_argument("--page-timeout", type=float, help="parseTimeoutSeconds. Default: the scraper's default.")
+    parser.add_argument("--extractor-timeout", type=float, help="extractorTimeoutSeconds. Default: the scraper's default.")
+    args = parser.parse_args()
+
+    import main as scraper
+
+    config = {}
+    if args.page_timeout is not None:
+        config["parseTimeoutSeconds"] = args.page_timeout
+    if args.extractor_timeout is not None:
+        config["extractorTimeoutSeconds"] = args.extractor_timeout
+    print(f"{'page':<16}{'size':>10}{'parse s':>10}  partial")
+    for name, make in PAGES.items():
+        html = make(args.scale).encode("utf-8")
+        if args.write:
+            os.makedirs(args.write, exist_ok=True)
+            with open(os.path.join(args.write, f"{name}.html"), "wb") as f:
+                f.write(html)
+
+        start = time.perf_counter()
+        record = scraper.parse_profile_page(html, None, "https://doctor.webmd.com/doctor/x", "", config).to_dict()
+        elapsed = time.perf_counter() - start
+        reasons = ", ".join(record.get("partialReasons") or []) or "-"
+        print(f"{name:<16}{len(html) / 1e6:>8.1f}MB{elapsed:>10.2f}  {reasons}")
+
+if __name__ == "__main__":
+    main()
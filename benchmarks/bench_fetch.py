@@ -0,0 +1,96 @@
+"""
+Fetch backend comparison: concurrent profile fetches through each backend
+against the TLS mock (benchmarks/mock_webmd_h2.py), which speaks HTTP/2 or
+HTTP/1.1 as the client negotiates.
+
+Each backend gets a fresh server and fetches --requests profile pages from
+--concurrency threads sharing one handler, as daemon workers do. This is
+done over --rounds rounds, with a pause between them longer than the
+server's idle timeout so connections are dropped and reopened. It reports
+throughput, connections opened per protocol, and how many TLS handshakes
+resumed an earlier session.
+
+    python benchmarks/bench_fetch.py --requests 400 --concurrency 16 --latency-ms 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mock_webmd  # noqa: E402
+import mock_webmd_h2  # noqa: E402
+from utils import plugins  # noqa: E402
+
+def run(backend: str, site: mock_webmd.MockSite, args: argparse.Namespace, cert: str, key: str) -> Dict[str, Any]:
+    server = mock_webmd_h2.start(site, cert, key, idle_timeout=args.idle_timeout)
+    port = server.server_address[1]
+    handler = plugins.load("fetch", backend)(timeout=20, max_retries=3, max_response_bytes=10 * 1024 * 1024)
+
+    fetched = 0
+    elapsed = 0.0
+    per_round = max(1, args.requests // args.rounds)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for round_no in range(args.rounds):
+            if round_no:
+                time.sleep(args.idle_timeout + 0.5)
+            urls = [f"https://127.0.0.1:{port}/doctor/{round_no}-{i}" for i in range(per_round)]
+            start = time.perf_counter()
+            fetched += sum(result is not None for result in pool.map(handler.get_bytes, urls))
+            elapsed += time.perf_counter() - start
+    handler.close()
+    server.shutdown()
+
+    connections = server.connection_stats()
+    return {
+        "backend": backend,
+        "fetched": fetched,
+        "seconds": round(elapsed, 3),
+        "pagesPerSecond": round(fetched / elapsed, 1) if elapsed else None,
+        "connections": connections["connections"],
+        "h2Connections": connections["h2"],
+        "http1Connections": connections["http/1.1"],
+        "resumedHandshakes": connections["resumed"],
+        "serverRequests": connections["requests"],
+    }
+
+def format_result(result: Dict[str, Any]) -> str:
+    return (
+        f"{result['backend']:<10} {result['fetched']:>6} pages in {result['seconds']:>7.2f}s "
+        f"= {result['pagesPerSecond']:>7} pages/s   connections {result['connections']:>4} "
+        f"(h2 {result['h2Connections']}, http/1.1 {result['http1Connections']}, "
+        f"{result['resumedHandshakes']} TLS resumed)   requests {result['serverRequests']}"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", help="Backend to run (repeatable). Default: requests and http2.")
+    parser.add_argument("--requests", type=int, default=400, help="Profile pages to fetch per backend. Default: 400.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Fetching threads. Default: 16.")
+    parser.add_argument("--rounds", type=int, default=2, help="Rounds, with connections dropped between. Default: 2.")
+    parser.add_argument("--idle-timeout", type=float, default=1.0, help="Server idle timeout. Default: 1.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    mock_webmd.add_site_arguments(parser)
+    args = parser.parse_args()
+
+    cert, key = mock_webmd_h2.make_certificate(tempfile.mkdtemp(prefix="bench_fetch_"))
+    # Both backends read the CA bundle from here, as requests does.
+    os.environ["REQUESTS_CA_BUNDLE"] = cert
+
+    results: List[Dict[str, Any]] = []
+    for backend in args.backend or ["requests", "http2"]:
+        results.append(run(backend, mock_webmd.site_from_args(args), args, cert, key))
+        if not args.json:
+            print(format_result(results[-1]))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark for the doctor query index (utils/doctor_index.py).
+
+Indexes synthetic doctor records (see bench_stats.py, with ZIPs spread over
+about 3,000 values) and times lookups and conjunctive filter queries.
+
+    python benchmarks/bench_query.py --records 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_stats import INSURANCES, SPECIALTIES, records  # noqa: E402
+from utils.doctor_index import DoctorIndex  # noqa: E402
+from utils.memory_budget import current_rss  # noqa: E402
+
+ZIPS = [f"{z:05d}" for z in range(90000, 93000)]
+
+def build(n: int) -> DoctorIndex:
+    rng = random.Random(2)
+    index = DoctorIndex()
+    for record in records(n):
+        record["location"]["zip"] = rng.choice(ZIPS)
+        index.add(record)
+    return index
+
+def timed(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"median": times[len(times) // 2] * 1e6, "max": times[-1] * 1e6}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200000, help="Records to index. Default: 200000.")
+    parser.add_argument("--repeat", type=int, default=200, help="Runs per query. Default: 200.")
+    args = parser.parse_args()
+
+    rss = current_rss()
+    start = time.perf_counter()
+    index = build(args.records)
+    print(
+        f"Indexed {len(index)} records in {time.perf_counter() - start:.1f}s "
+        f"(+{(current_rss() - rss) / 1e6:.0f} MB RSS)"
+    )
+
+    middle = args.records // 2
+    queries = {
+        "npi": lambda: index.get_npi(str(1000000000 + middle)),
+        "provider id": lambda: index.get_provider(f"{middle:08X}-0000-0000-0000-000000000000"),
+        "specialty + zip + insurance": lambda: index.find(
+            specialty=SPECIALTIES[7], zip=ZIPS[10], insurance=INSURANCES[3]
+        ),
+        "specialty + zip": lambda: index.find(specialty=SPECIALTIES[7], zip=ZIPS[10]),
+        "specialty + state (count)": lambda: index.count(specialty=SPECIALTIES[7], state="CA"),
+        "insurance + state (count)": lambda: index.count(insurance=INSURANCES[3], state="TX"),
+        "state (count)": lambda: index.count(state="NY"),
+    }
+    for name, fn in queries.items():
+        result = fn()
+        size = result if isinstance(result, int) else len(result) if isinstance(result, list) else int(bool(result))
+        t = timed(fn, args.repeat)
+        print(f"{name:<28} {size:>8} hits   median {t['median']:>8.1f} us   max {t['max']:>8.1f} us")
+
+if __name__ == "__main__":
+    main()
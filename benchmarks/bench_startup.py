@@ -0,0 +1,61 @@
+"""
+CLI startup benchmark.
+
+Measures wall time of `python src/main.py --help` (interpreter start, module
+imports, argument parsing) and reports which heavy modules the CLI imports
+before it does any work.
+
+    python benchmarks/bench_startup.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT_DIR, "src", "main.py")
+
+HEAVY_MODULES = ["bs4", "lxml.etree", "requests", "csv", "xml.etree.ElementTree", "sqlite3", "numpy", "httpx"]
+
+def time_command(cmd, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def imported_heavy_modules():
+    code = (
+        "import runpy, sys; sys.argv = ['main.py', '--help']\n"
+        "try:\n"
+        f"    runpy.run_path({MAIN!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print('HEAVY:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    line = [ln for ln in out.stdout.splitlines() if ln.startswith("HEAVY:")][-1]
+    return [m for m in line[len("HEAVY:"):].split(",") if m]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Number of timed runs. Default: 10.")
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.runs)
+    cli = time_command([sys.executable, MAIN, "--help"], args.runs)
+
+    base_ms = statistics.median(baseline) * 1000
+    cli_ms = statistics.median(cli) * 1000
+    print(f"python -c pass        median {base_ms:7.1f} ms")
+    print(f"main.py --help        median {cli_ms:7.1f} ms  (min {min(cli) * 1000:.1f} ms)")
+    print(f"CLI overhead          median {cli_ms - base_ms:7.1f} ms")
+
+    heavy = imported_heavy_modules()
+    print(f"Heavy modules at startup: {', '.join(heavy) if heavy else 'none'}")
+
+if __name__ == "__main__":
+    main()
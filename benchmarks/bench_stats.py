@@ -0,0 +1,109 @@
+"""
+Benchmark for the `stats` command.
+
+Writes a synthetic dataset of doctor records in each output format and times
+loading it into columns and computing the report.
+
+    python benchmarks/bench_stats.py --records 1000000 --formats jsonl,csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterator
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from exporters.csv_exporter import _flatten_record  # noqa: E402
+from exporters.xml_exporter import _dict_to_xml  # noqa: E402
+from utils.dataset_stats import compute_stats, format_report, load_columns  # noqa: E402
+
+SPECIALTIES = [f"Specialty {i}" for i in range(120)]
+STATES = ["CA", "NY", "TX", "FL", "IL", "PA", "OH", "GA", "NC", "MI", "WA", "AZ", None]
+INSURANCES = [f"Plan {i}" for i in range(400)]
+
+def records(n: int, seed: int = 1) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(n):
+        count = int(rng.expovariate(1 / 12))
+        yield {
+            "providerid": f"{i:08X}-0000-0000-0000-000000000000",
+            "name": {"first": "Jane", "last": f"Doe{i}", "full": f"Dr. Jane Doe{i}, MD"},
+            "gender": rng.choice(["F", "M", None]),
+            "npi": str(1000000000 + i),
+            "specialties": rng.sample(SPECIALTIES, rng.choice([1, 1, 1, 2, 3])),
+            "degrees": ["MD"],
+            "education": {"graduationYear": rng.randint(1970, 2020)},
+            "photos": None,
+            "bio": "Board certified physician. " * 4,
+            "ratings": {"averageRating": round(rng.uniform(1, 5), 1), "reviewCount": count} if count else {},
+            "urls": {"profile": f"https://doctor.webmd.com/doctor/{i}", "appointment": None, "website": None},
+            "searchUrl": "https://doctor.webmd.com/find-a-doctor",
+            "location": {"name": "Clinic", "address": "1 Main St", "city": "Town", "state": rng.choice(STATES),
+                         "zip": "00000", "phone": None},
+            "insurances": rng.sample(INSURANCES, rng.randint(0, 12)),
+            "reviews": [{"rating": "5.0", "text": "Great doctor, very attentive.", "date": "2025-01-29"}] * min(count, 3),
+        }
+
+def write(fmt: str, path: str, n: int) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            for rec in records(n):
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        elif fmt == "json":
+            f.write("[\n")
+            for i, rec in enumerate(records(n)):
+                f.write((",\n" if i else "") + json.dumps(rec, ensure_ascii=False, indent=2))
+            f.write("\n]")
+        elif fmt == "csv":
+            fields = sorted(_flatten_record(next(records(1))))
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            for rec in records(n):
+                writer.writerow(_flatten_record(rec))
+        elif fmt == "xml":
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n<doctors>")
+            for rec in records(n):
+                el = ET.Element("doctor")
+                for key, value in rec.items():
+                    _dict_to_xml(el, key, value)
+                f.write(ET.tostring(el, encoding="unicode"))
+            f.write("</doctors>")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200000, help="Records per file. Default: 200000.")
+    parser.add_argument("--formats", default="jsonl,json,csv,xml", help="Comma-separated formats to test.")
+    parser.add_argument("--dir", help="Where to write the datasets (default: a temporary directory).")
+    parser.add_argument("--report", action="store_true", help="Print the report for the last format.")
+    args = parser.parse_args()
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench_stats_")
+    os.makedirs(workdir, exist_ok=True)
+    report = None
+    print(f"{'format':<8}{'size':>10}{'load s':>9}{'stats s':>9}{'records/s':>12}")
+    for fmt in args.formats.split(","):
+        path = os.path.join(workdir, f"doctors.{fmt}")
+        if not os.path.exists(path):
+            write(fmt, path, args.records)
+
+        start = time.perf_counter()
+        cols = load_columns([path])
+        loaded = time.perf_counter()
+        report = compute_stats(cols)
+        done = time.perf_counter()
+        size = os.path.getsize(path) / 1e6
+        print(f"{fmt:<8}{size:>8.0f}MB{loaded - start:>9.2f}{done - loaded:>9.3f}{cols.rows / (done - start):>12,.0f}")
+
+    if args.report and report:
+        print()
+        print(format_report(report))
+
+if __name__ == "__main__":
+    main()
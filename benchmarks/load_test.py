@@ -0,0 +1,140 @@
+"""
+End-to-end load test: runs the scraper CLI against a local mock WebMD server
+(benchmarks/mock_webmd.py) and reports throughput, per-profile latency,
+retries, and the CLI process's CPU time and peak memory.
+
+Per-profile latency is measured at the server, from the first request for a
+profile to its first successful response, so it includes retries and backoff
+but not parsing. Everything after `--` is passed to the CLI, e.g. to run a
+subcommand or change its logging:
+
+    python benchmarks/load_test.py --profiles 100 --latency-ms 40 --jitter-ms 40
+    python benchmarks/load_test.py --error-rate 0.05 --burst-every 10 --burst-seconds 1
+    python benchmarks/load_test.py --set maxRetries=5 --set timeoutSeconds=5 -- --memory-budget-mb 200
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import mock_webmd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT_DIR, "src", "main.py")
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+def _parse_set(items: List[str]) -> Dict[str, Any]:
+    overrides: Dict[str, Any] = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return overrides
+
+def run(
+    site: mock_webmd.MockSite, profiles: int, overrides: Dict[str, Any], cli_args: List[str], workdir: str
+) -> Dict[str, Any]:
+    server = mock_webmd.start(site)
+    port = server.server_address[1]
+    output_file = os.path.join(workdir, "output.json")
+    config = {
+        "searchUrl": f"http://127.0.0.1:{port}/find-a-doctor?sortby=bestmatch&zip=90210",
+        "maxItems": profiles,
+        "outputFormat": "json",
+        "outputFile": output_file,
+        "timeoutSeconds": 20,
+        "maxRetries": 3,
+    }
+    config.update(overrides)
+    config_path = os.path.join(workdir, "config.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+    cmd = [sys.executable, MAIN, "--config", config_path, *cli_args]
+    log_path = os.path.join(workdir, "cli.log")
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        returncode = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    server.shutdown()
+
+    scraped = 0
+    if os.path.exists(output_file):
+        with open(output_file, "r", encoding="utf-8") as f:
+            scraped = len(json.load(f))
+
+    served = site.stats()
+    latencies = served.pop("profileLatencies")
+    cpu_user = after.ru_utime - before.ru_utime
+    cpu_system = after.ru_stime - before.ru_stime
+    return {
+        "returncode": returncode,
+        "log": log_path,
+        "wallSeconds": round(wall, 3),
+        "profilesScraped": scraped,
+        "profilesPerSecond": round(scraped / wall, 2) if wall else None,
+        "latencyP50Ms": round(_percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "latencyP99Ms": round(_percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "server": served,
+        "cpuUserSeconds": round(cpu_user, 3),
+        "cpuSystemSeconds": round(cpu_system, 3),
+        "cpuUtilization": round((cpu_user + cpu_system) / wall, 3) if wall else None,
+        # ru_maxrss is in KB on Linux, and the largest of all children so far.
+        "peakRssMB": round(after.ru_maxrss / 1024, 1),
+    }
+
+def format_result(result: Dict[str, Any]) -> str:
+    server = result["server"]
+    failed = server["profilesRequested"] - server["profilesServed"]
+    lines = [
+        f"CLI exit code        {result['returncode']} (log: {result['log']})",
+        f"Profiles scraped     {result['profilesScraped']} in {result['wallSeconds']:.2f}s "
+        f"= {result['profilesPerSecond']} profiles/s",
+        f"Profile latency      p50 {result['latencyP50Ms']} ms, p99 {result['latencyP99Ms']} ms",
+        f"Requests             {server['requests']} ({server['retries']} retries, "
+        f"{failed} profiles never served), statuses {server['statuses']}",
+        f"CPU                  {result['cpuUserSeconds']:.2f}s user + {result['cpuSystemSeconds']:.2f}s system "
+        f"({result['cpuUtilization']:.0%} of wall time)",
+        f"Peak RSS             {result['peakRssMB']} MB",
+    ]
+    return "\n".join(lines)
+
+def main() -> None:
+    argv = sys.argv[1:]
+    cli_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, cli_args = argv[:split], argv[split + 1 :]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=50, help="maxItems for the run. Default: 50.")
+    parser.add_argument(
+        "--set", action="append", default=[], metavar="KEY=VALUE", help="Override a config key (JSON value)."
+    )
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    mock_webmd.add_site_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.profiles > args.results:
+        # One search page links everything the run will fetch.
+        args.results = args.profiles
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    result = run(mock_webmd.site_from_args(args), args.profiles, _parse_set(args.set), cli_args, workdir)
+    print(json.dumps(result, indent=2) if args.json else format_result(result))
+
+if __name__ == "__main__":
+    main()
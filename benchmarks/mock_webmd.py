@@ -0,0 +1,280 @@
+"""
+Local mock of the WebMD doctor search and profile pages, for load tests.
+
+Pages are generated deterministically from the URL, so the same search always
+links the same profiles. Faults are injected on every route:
+
+- latency:     --latency-ms plus up to --jitter-ms of random extra delay
+- errors:      a fraction (--error-rate) of requests get HTTP 503
+- 429 bursts:  for the last --burst-seconds of every --burst-every seconds,
+               every request gets HTTP 429 with Retry-After
+- page size:   profile pages are padded with reviews to about --page-kb
+                 (gzip-compressed when the client accepts it, unless --no-gzip)
+
+Routes:
+
+    /find-a-doctor?...   search page linking --results profiles
+    /doctor/<id>         profile page
+    /__stats             JSON counters
+
+    python benchmarks/mock_webmd.py --port 8765 --latency-ms 50 --error-rate 0.02
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SPECIALTIES = ["Cardiology", "Family Medicine", "Dermatology", "Pediatrics", "Neurology", "Oncology"]
+STATES = [("Beverly Hills", "CA", "90210"), ("Austin", "TX", "78701"), ("Brooklyn", "NY", "11201")]
+INSURANCES = ["Aetna", "Cigna", "Humana", "Kaiser", "Medicare", "UnitedHealthcare", "Blue Shield"]
+REVIEW = "The doctor listened carefully and explained every option. Staff were friendly and on time. "
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:12], 16)
+
+class MockSite:
+    """
+    Page generator, fault injection and request counters for the mock server.
+    """
+
+    def __init__(
+        self,
+        results: int = 20,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        burst_every: float = 0.0,
+        burst_seconds: float = 0.0,
+        retry_after: int = 1,
+        page_kb: float = 20.0,
+        gzip: bool = True,
+        seed: int = 0,
+    ) -> None:
+        self.results = results
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_seconds = burst_seconds
+        self.retry_after = retry_after
+        self.page_kb = page_kb
+        self.gzip = gzip
+        self.rng = random.Random(seed)
+        self.started = time.monotonic()
+
+        self.lock = threading.Lock()
+        self.statuses: Dict[int, int] = {}
+        # path -> [attempts, first request time, time of first 200 response]
+        self.profiles: Dict[str, List[Any]] = {}
+        self.searches: Dict[str, List[Any]] = {}
+
+    # Pages
+
+    def search_page(self, query: str) -> bytes:
+        base = _seed(query)
+        links = "".join(
+            f'<li><a href="/doctor/{base:x}-{i}">Dr. Test {i}</a> <a href="/find-a-doctor?page={i}">more</a></li>'
+            for i in range(self.results)
+        )
+        return f"<html><head><title>Find a doctor</title></head><body><ul>{links}</ul></body></html>".encode()
+
+    def profile_page(self, doctor_id: str) -> bytes:
+        rng = random.Random(_seed(doctor_id))
+        city, state, zip_code = rng.choice(STATES)
+        specialties = "".join(
+            f'<span itemprop="medicalSpecialty">{s}</span>' for s in rng.sample(SPECIALTIES, rng.randint(1, 2))
+        )
+        insurances = "".join(f"<li>{i}</li>" for i in rng.sample(INSURANCES, rng.randint(1, 5)))
+        guid = hashlib.md5(doctor_id.encode()).hexdigest().upper()
+        guid = f"{guid[:8]}-{guid[8:12]}-{guid[12:16]}-{guid[16:20]}-{guid[20:]}"
+        head = (
+            f'<h1 class="doctor-name">Dr. Test {doctor_id}, MD</h1>'
+            f'<div data-npi="{1000000000 + _seed(doctor_id) % 899999999}" data-provider-id="{guid}"></div>'
+            f"{specialties}<p>Gender: {rng.choice(['Female', 'Male'])}</p>"
+            f'<div class="bio">Dr. Test graduated in {rng.randint(1975, 2018)} and practices in {city}.</div>'
+            f'<div class="overall-rating">{rng.randint(10, 50) / 10}/5</div><p>{rng.randint(1, 300)} Reviews</p>'
+            f'<div class="location-card"><p>{city} Clinic</p><p>1 Main St</p>'
+            f"<p>{city}, {state} {zip_code}</p><p>(555) 555-{rng.randint(1000, 9999)}</p></div>"
+            f"<h3>Insurance</h3><ul>{insurances}</ul>"
+        )
+        reviews = []
+        size = len(head)
+        target = int(self.page_kb * 1024)
+        while size < target:
+            block = (
+                f'<div class="review"><p>{REVIEW * rng.randint(1, 4)}</p>'
+                f"<span>{rng.randint(1, 5)}.0</span><span>{rng.randint(1, 12)}/{rng.randint(1, 28)}/2024</span></div>"
+            )
+            reviews.append(block)
+            size += len(block)
+        return f"<html><head><title>Profile</title></head><body><main>{head}{''.join(reviews)}</main></body></html>".encode()
+
+    # Faults and counters
+
+    def fault(self) -> Optional[int]:
+        elapsed = time.monotonic() - self.started
+        if self.burst_every and elapsed % self.burst_every >= self.burst_every - self.burst_seconds:
+            return 429
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return 503
+        return None
+
+    def delay(self) -> None:
+        if self.latency_ms or self.jitter_ms:
+            with self.lock:
+                jitter = self.rng.random() * self.jitter_ms
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def record(self, kind: str, path: str, status: int, arrived: float) -> None:
+        table = self.profiles if kind == "profile" else self.searches
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            entry = table.setdefault(path, [0, arrived, None])
+            entry[0] += 1
+            if status == 200 and entry[2] is None:
+                entry[2] = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            profiles = list(self.profiles.values())
+            searches = list(self.searches.values())
+            statuses = dict(self.statuses)
+        attempts = sum(e[0] for e in profiles) + sum(e[0] for e in searches)
+        unique = len(profiles) + len(searches)
+        latencies = sorted(e[2] - e[1] for e in profiles if e[2] is not None)
+        return {
+            "requests": attempts,
+            "retries": attempts - unique,
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "searches": len(searches),
+            "profilesRequested": len(profiles),
+            "profilesServed": len(latencies),
+            "profileLatencies": latencies,
+        }
+
+    def respond(self, target: str, accept_encoding: str = "") -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """
+        Status, headers and body for a GET of `target` (path and query),
+        with latency and faults applied and the request counted.
+        """
+        arrived = time.monotonic()
+        parts = urlsplit(target)
+        if parts.path == "/__stats":
+            stats = self.stats()
+            del stats["profileLatencies"]
+            return self._response(200, json.dumps(stats).encode(), accept_encoding, "application/json")
+
+        if parts.path.startswith("/doctor/"):
+            kind, render = "profile", lambda: self.profile_page(parts.path[len("/doctor/"):])
+        elif parts.path.startswith("/find-a-doctor"):
+            kind, render = "search", lambda: self.search_page(parts.query)
+        else:
+            return self._response(404, b"not found", accept_encoding)
+
+        self.delay()
+        status = self.fault() or 200
+        body = render() if status == 200 else f"<html><body>HTTP {status}</body></html>".encode()
+        response = self._response(status, body, accept_encoding)
+        self.record(kind, target, status, arrived)
+        return response
+
+    def _response(
+        self, status: int, body: bytes, accept_encoding: str, content_type: str = "text/html; charset=utf-8"
+    ) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        headers: List[Tuple[str, str]] = [("Content-Type", content_type)]
+        if status == 429:
+            headers.append(("Retry-After", str(self.retry_after)))
+        if body and self.gzip and "gzip" in accept_encoding:
+            body = gzip.compress(body, compresslevel=5)
+            headers.append(("Content-Encoding", "gzip"))
+        headers.append(("Content-Length", str(len(body))))
+        return status, headers, body
+
+class _Handler(BaseHTTPRequestHandler):
+    site: MockSite = None  # set by start()
+    protocol_version = "HTTP/1.1"
+    server_version = "mock-webmd"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        status, headers, body = self.site.respond(self.path, self.headers.get("Accept-Encoding") or "")
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients closing keep-alive connections are not worth a traceback.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+def start(site: MockSite, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Serve `site` from a background thread. Port 0 picks a free port;
+    read it back from server.server_address.
+    """
+    handler_cls = type("MockHandler", (_Handler,), {"site": site})
+    server = _Server((host, port), handler_cls)
+    threading.Thread(target=server.serve_forever, name="mock-webmd", daemon=True).start()
+    return server
+
+def add_site_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--results", type=int, default=20, help="Profiles linked per search page. Default: 20.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base delay per response. Default: 0.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay, up to this. Default: 0.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503. Default: 0.")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Seconds between 429 bursts. Default: none.")
+    parser.add_argument("--burst-seconds", type=float, default=0.0, help="Length of each 429 burst. Default: 0.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After sent with 429s. Default: 1.")
+    parser.add_argument("--page-kb", type=float, default=20.0, help="Approximate profile page size. Default: 20.")
+    parser.add_argument("--no-gzip", action="store_true", help="Never compress responses.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and error injection. Default: 0.")
+
+def site_from_args(args: argparse.Namespace) -> MockSite:
+    return MockSite(
+        results=args.results,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_seconds=args.burst_seconds,
+        retry_after=args.retry_after,
+        page_kb=args.page_kb,
+        gzip=not args.no_gzip,
+        seed=args.seed,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind. Default: 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind. Default: 8765.")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    server = start(site_from_args(args), args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Mock WebMD at http://{host}:{port}/find-a-doctor?zip=90210 (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+The mock WebMD site (benchmarks/mock_webmd.py) served over TLS, speaking
+HTTP/2 or HTTP/1.1 as negotiated by ALPN, for comparing fetch backends.
+
+The server counts connections per protocol and how many TLS handshakes
+resumed an earlier session. HTTP/2 streams are answered concurrently, each
+with the site's latency and faults. Connections idle for --idle-timeout
+seconds are closed (HTTP/2 with a GOAWAY), as production servers do.
+
+A self-signed certificate for 127.0.0.1 is generated with the openssl CLI
+unless --cert/--key are given; point clients at it with REQUESTS_CA_BUNDLE.
+Requires the h2 package.
+
+    python benchmarks/mock_webmd_h2.py --port 8443 --latency-ms 50
+"""
+import argparse
+import os
+import queue
+import selectors
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+import mock_webmd
+
+READ_SIZE = 64 * 1024
+
+def make_certificate(directory: str) -> Tuple[str, str]:
+    """
+    Self-signed certificate and key for 127.0.0.1 and localhost, as PEM paths.
+    """
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+            "-nodes", "-days", "2", "-subj", "/CN=127.0.0.1",
+            "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost",
+            "-keyout", key, "-out", cert,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+class _H2Connection:
+    """
+    One HTTP/2 connection. A single thread owns the socket and the h2 state;
+    each request is answered on its own thread and handed back through a queue.
+    """
+
+    def __init__(self, sock: ssl.SSLSocket, server: "TlsMockServer") -> None:
+        self.sock = sock
+        self.server = server
+        self.h2 = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self.ready: "queue.Queue[Tuple[int, int, List[Tuple[str, str]], bytes]]" = queue.Queue()
+        self.wake_r, self.wake_w = socket.socketpair()
+        self.pending: Dict[int, memoryview] = {}
+        self.active = 0
+
+    def serve(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        selector.register(self.wake_r, selectors.EVENT_READ)
+        try:
+            self.h2.initiate_connection()
+            self._flush()
+            idle_since = time.monotonic()
+            while True:
+                timeout = None
+                if not self.active and self.server.idle_timeout:
+                    timeout = max(0.0, idle_since + self.server.idle_timeout - time.monotonic())
+                events = selector.select(timeout)
+                if not events and not self.active:
+                    self.h2.close_connection(last_stream_id=self.h2.highest_inbound_stream_id)
+                    self._flush()
+                    return
+                for key, _ in events:
+                    if key.fileobj is self.wake_r:
+                        self.wake_r.recv(READ_SIZE)
+                        self._start_responses()
+                    elif not self._receive():
+                        return
+                self._pump()
+                self._flush()
+                if not self.active:
+                    idle_since = time.monotonic()
+        except (OSError, h2.exceptions.ProtocolError):
+            return
+        finally:
+            selector.close()
+            self.wake_r.close()
+            self.wake_w.close()
+
+    def _receive(self) -> bool:
+        data = self.sock.recv(READ_SIZE)
+        # Decrypted records can be buffered beyond what one recv returned.
+        while data and self.sock.pending():
+            data += self.sock.recv(self.sock.pending())
+        if not data:
+            return False
+        for event in self.h2.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                self.active += 1
+                headers = dict(event.headers)
+                threading.Thread(target=self._respond, args=(event.stream_id, headers), daemon=True).start()
+            elif isinstance(event, h2.events.StreamReset):
+                if self.pending.pop(event.stream_id, None) is not None:
+                    self.active -= 1
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                return False
+        return True
+
+    def _respond(self, stream_id: int, headers: Dict[str, str]) -> None:
+        status, response_headers, body = self.server.site.respond(
+            headers.get(":path", "/"), headers.get("accept-encoding", "")
+        )
+        self.server.count("requests")
+        self.ready.put((stream_id, status, response_headers, body))
+        try:
+            self.wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _start_responses(self) -> None:
+        while True:
+            try:
+                stream_id, status, headers, body = self.ready.get_nowait()
+            except queue.Empty:
+                return
+            fields = [(":status", str(status))] + [(name.lower(), value) for name, value in headers]
+            try:
+                self.h2.send_headers(stream_id, fields, end_stream=not body)
+            except h2.exceptions.StreamClosedError:
+                self.active -= 1
+                continue
+            if body:
+                self.pending[stream_id] = memoryview(body)
+            else:
+                self.active -= 1
+
+    def _pump(self) -> None:
+        # Send what the flow-control windows allow; WINDOW_UPDATEs resume the rest.
+        for stream_id, body in list(self.pending.items()):
+            try:
+                while body:
+                    size = min(
+                        self.h2.local_flow_control_window(stream_id), self.h2.max_outbound_frame_size, len(body)
+                    )
+                    if size <= 0:
+                        break
+                    self.h2.send_data(stream_id, body[:size].tobytes(), end_stream=size == len(body))
+                    body = body[size:]
+            except h2.exceptions.StreamClosedError:
+                body = memoryview(b"")
+            if body:
+                self.pending[stream_id] = body
+            else:
+                del self.pending[stream_id]
+                self.active -= 1
+
+    def _flush(self) -> None:
+        data = self.h2.data_to_send()
+        if data:
+            self.sock.sendall(data)
+
+class _Http1Handler(mock_webmd._Handler):
+    def do_GET(self) -> None:
+        self.server.count("requests")
+        super().do_GET()
+
+class TlsMockServer(mock_webmd._Server):
+    """
+    Threaded TLS server for a MockSite: HTTP/2 connections are handled by
+    _H2Connection, HTTP/1.1 ones by the plain mock's request handler.
+    """
+
+    def __init__(
+        self, address: Tuple[str, int], site: mock_webmd.MockSite, context: ssl.SSLContext, idle_timeout: float
+    ) -> None:
+        # The handler's socket timeout closes idle keep-alive connections.
+        handler_cls = type("MockHandler", (_Http1Handler,), {"site": site, "timeout": idle_timeout or None})
+        super().__init__(address, handler_cls)
+        self.site = site
+        self.context = context
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = {"connections": 0, "h2": 0, "http/1.1": 0, "resumed": 0, "requests": 0}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counters[key] += 1
+
+    def connection_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counters)
+
+    def finish_request(self, request: Any, client_address: Any) -> None:
+        # The handshake runs here, on the connection's own thread.
+        conn = self.context.wrap_socket(request, server_side=True)
+        try:
+            protocol = conn.selected_alpn_protocol() or "http/1.1"
+            self.count("connections")
+            self.count(protocol)
+            if conn.session_reused:
+                self.count("resumed")
+            if protocol == "h2":
+                _H2Connection(conn, self).serve()
+            else:
+                self.RequestHandlerClass(conn, client_address, self)
+        finally:
+            conn.close()
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that drop the connection mid-handshake are not worth a traceback.
+        if isinstance(sys.exc_info()[1], (ssl.SSLError, socket.timeout)):
+            return
+        super().handle_error(request, client_address)
+
+def start(
+    site: mock_webmd.MockSite,
+    cert: str,
+    key: str,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    http2: bool = True,
+    idle_timeout: float = 5.0,
+) -> TlsMockServer:
+    """
+    Serve `site` over TLS from a background thread. With http2=False only
+    HTTP/1.1 is offered. Port 0 picks a free port.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    context.set_alpn_protocols(["h2", "http/1.1"] if http2 else ["http/1.1"])
+    server = TlsMockServer((host, port), site, context, idle_timeout)
+    threading.Thread(target=server.serve_forever, name="mock-webmd-h2", daemon=True).start()
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind. Default: 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8443, help="Port to bind. Default: 8443.")
+    parser.add_argument("--cert", help="PEM certificate. Default: a generated self-signed one.")
+    parser.add_argument("--key", help="PEM private key for --cert.")
+    parser.add_argument("--no-h2", action="store_true", help="Offer HTTP/1.1 only.")
+    parser.add_argument("--idle-timeout", type=float, default=5.0, help="Close idle connections after this. Default: 5.")
+    mock_webmd.add_site_arguments(parser)
+    args = parser.parse_args()
+
+    cert, key = args.cert, args.key
+    if not cert:
+        cert, key = make_certificate(tempfile.mkdtemp(prefix="mock_webmd_h2_"))
+    server = start(
+        mock_webmd.site_from_args(args), cert, key, args.host, args.port, not args.no_h2, args.idle_timeout
+    )
+    host, port = server.server_address[:2]
+    print(f"Mock WebMD at https://{host}:{port}/find-a-doctor?zip=90210 (CA: {cert}; Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(server.connection_stats())
+
+if __name__ == "__main__":
+    main()
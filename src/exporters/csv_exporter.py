@@ -1,10 +1,18 @@
 import csv
 import json
 import logging
-from typing import Any, Dict, Iterable, List
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Set
+
+from exporters.tee import RecordWriter
+from models.records import as_dict
 
 logger = logging.getLogger(__name__)
 
+# Exported CSV cells hold whole review lists as JSON; allow more than csv's 128KB default.
+CSV_FIELD_LIMIT = 64 * 1024 * 1024
+
 def _flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
     """
     Flatten nested doctor record dict into a single-level dict suitable for CSV.
@@ -23,28 +31,78 @@ def _flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
 
     return flat
 
-def _fieldnames(records: Iterable[Dict[str, Any]]) -> List[str]:
-    fieldset = set()
-    for rec in records:
-        flat = _flatten_record(rec)
-        for key in flat.keys():
-            fieldset.add(key)
-    return sorted(fieldset)
+class CsvWriter(RecordWriter):
+    """
+    Streams flattened rows to a spool file next to `path`. The CSV header
+    must list every column seen, so close() writes the header and then
+    copies the spooled rows into the CSV.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._fields: Set[str] = set()
+        self._spool = tempfile.TemporaryFile(
+            "w+", encoding="utf-8", dir=os.path.dirname(os.path.abspath(path))
+        )
+
+    def write(self, record: Any) -> None:
+        flat = _flatten_record(as_dict(record))
+        self._fields.update(flat)
+        self._spool.write(json.dumps(flat, ensure_ascii=False))
+        self._spool.write("\n")
+        self.count += 1
+
+    def close(self) -> None:
+        if self._spool.closed:
+            return
+        self._spool.seek(0)
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=sorted(self._fields))
+            writer.writeheader()
+            for line in self._spool:
+                writer.writerow(json.loads(line))
+        self._spool.close()
 
 def export_csv(data: List[Dict[str, Any]], path: str) -> None:
     """
-    Export a list of doctor dictionaries to a CSV file.
+    Export a list of doctor dictionaries (or Doctor records) to a CSV file.
+    Rows are flattened on the fly rather than held in memory.
     """
     if not data:
         logger.info("No data to write to CSV. Skipping export.")
         return
 
     logger.info("Writing CSV output to %s", path)
-    flat_records = [_flatten_record(rec) for rec in data]
-    headers = _fieldnames(flat_records)
-
-    with open(path, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        for rec in flat_records:
-            writer.writerow(rec)
\ No newline at end of file
+    with CsvWriter(path) as writer:
+        for rec in data:
+            writer.write(rec)
+
+def read_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of an exported CSV file, undoing _flatten_record.
+    Scalar values come back as strings; empty cells are left out.
+    """
+    csv.field_size_limit(max(csv.field_size_limit(), CSV_FIELD_LIMIT))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        # "location.city" -> ("location", "city"); top-level columns get "".
+        columns = [tuple(name.partition(".")[::2]) for name in header]
+        for row in reader:
+            record: Dict[str, Any] = {}
+            for (key, sub_key), cell in zip(columns, row):
+                if not cell:
+                    continue
+                value: Any = cell
+                if cell[0] == "[":
+                    try:
+                        value = json.loads(cell)
+                    except ValueError:
+                        pass
+                if sub_key:
+                    record.setdefault(key, {})[sub_key] = value
+                else:
+                    record[key] = value
+            yield record
@@ -1,13 +1,78 @@
 import json
 import logging
-from typing import Any, Dict, List
+import re
+from typing import Any, Dict, Iterable, Iterator
+
+from exporters.tee import RecordWriter
+from models.records import as_dict
 
 logger = logging.getLogger(__name__)
 
-def export_json(data: List[Dict[str, Any]], path: str) -> None:
+# Exported JSON files are read back in chunks of this many characters.
+READ_CHUNK = 1024 * 1024
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+class JsonWriter(RecordWriter):
     """
-    Export a list of doctor dictionaries to a JSON file.
+    Streams records into a JSON array, laid out as json.dump(..., indent=2) would.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write("[")
+
+    def write(self, record: Any) -> None:
+        text = json.dumps(as_dict(record), ensure_ascii=False, indent=2)
+        # Strings never contain raw newlines in JSON, so this only indents structure.
+        self._f.write(",\n  " if self.count else "\n  ")
+        self._f.write(text.replace("\n", "\n  "))
+        self.count += 1
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.write("\n]" if self.count else "]")
+        self._f.close()
+
+def export_json(data: Iterable[Any], path: str) -> None:
+    """
+    Export doctor dictionaries (or Doctor records) to a JSON file.
+    Records are converted and written one at a time.
     """
     logger.info("Writing JSON output to %s", path)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    with JsonWriter(path) as writer:
+        for record in data:
+            writer.write(record)
+
+def read_json(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of an exported JSON array one at a time, reading the
+    file in chunks instead of loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(READ_CHUNK)
+        pos = _SEPARATORS.match(buf).end()
+        if buf[pos : pos + 1] != "[":
+            raise ValueError(f"{path} does not contain a JSON array.")
+        pos += 1
+
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("Need more data", buf, pos)
+                record, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Most likely the record continues in the next chunk.
+                more = f.read(READ_CHUNK)
+                if not more:
+                    raise ValueError(f"{path}: malformed or truncated record at the end of the file.")
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield record
@@ -0,0 +1,48 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator
+
+from exporters.tee import RecordWriter
+from models.records import as_dict
+
+logger = logging.getLogger(__name__)
+
+class JsonlWriter(RecordWriter):
+    """
+    Streams records to a JSON Lines file, one record per line.
+    """
+
+    def __init__(self, path: str, append: bool = False) -> None:
+        super().__init__(path)
+        self._f = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, record: Any) -> None:
+        self._f.write(json.dumps(as_dict(record), ensure_ascii=False))
+        self._f.write("\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._f.close()
+
+def append_jsonl(data: Iterable[Any], path: str) -> None:
+    """
+    Append doctor records to a JSON Lines file, one record per line.
+    Used for per-worker shards, which may be appended to by several runs.
+    """
+    with JsonlWriter(path, append=True) as writer:
+        for record in data:
+            writer.write(record)
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield records from a JSON Lines file, skipping blank or truncated lines.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping malformed line %d in %s", lineno, path)
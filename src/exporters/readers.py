@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# File extension -> format of exported output that can be read back.
+INPUT_FORMATS = {".json": "json", ".jsonl": "jsonl", ".csv": "csv", ".xml": "xml"}
+
+# Columns every exported CSV has, whatever else the records hold.
+_CSV_MARKERS = ("urls.profile", "name.full")
+
+# Bytes read to recognise a file as exported records.
+_SNIFF_BYTES = 64 * 1024
+
+def input_format(path: str) -> str:
+    fmt = INPUT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}; expected one of {', '.join(INPUT_FORMATS)}.")
+    return fmt
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream record dicts from an exported output file (json, jsonl, csv or xml).
+    CSV and XML values come back as strings, since those formats do not keep types.
+    """
+    fmt = fmt or input_format(path)
+    if fmt == "json":
+        from exporters.json_exporter import read_json
+
+        return read_json(path)
+    if fmt == "jsonl":
+        from exporters.jsonl_exporter import read_jsonl
+
+        return read_jsonl(path)
+    if fmt == "csv":
+        from exporters.csv_exporter import read_csv
+
+        return read_csv(path)
+    if fmt == "xml":
+        from exporters.xml_exporter import read_xml
+
+        return read_xml(path)
+    raise ValueError(f"Unsupported input format: {fmt}")
+
+def is_record_file(path: str, fmt: Optional[str] = None) -> bool:
+    """
+    Whether `path` looks like exported doctor records, judged from its first
+    bytes: a JSON array of objects, JSON Lines objects, a CSV with the
+    exporter's columns, or a <doctors> document. Lets a directory of outputs
+    hold other files (configs, notes) with the same extensions.
+    """
+    try:
+        fmt = fmt or input_format(path)
+        with open(path, "rb") as f:
+            head = f.read(_SNIFF_BYTES)
+    except (OSError, ValueError):
+        return False
+    text = head.decode("utf-8", errors="ignore").lstrip("\ufeff \t\r\n")
+
+    if fmt == "json":
+        if not text.startswith("["):
+            return False
+        return text[1:].lstrip()[:1] in ("{", "]")
+    if fmt == "jsonl":
+        line = text.split("\n", 1)[0].strip()
+        try:
+            return isinstance(json.loads(line), dict)
+        except ValueError:
+            return False
+    if fmt == "csv":
+        header = text.split("\n", 1)[0]
+        return any(marker in header for marker in _CSV_MARKERS)
+    if fmt == "xml":
+        if text.startswith("<?xml"):
+            text = text.split("?>", 1)[-1].lstrip()
+        return text.startswith("<doctors")
+    return False
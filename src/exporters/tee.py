@@ -0,0 +1,120 @@
+import abc
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RecordWriter(abc.ABC):
+    """
+    Base for streaming writers: write() one record at a time, then close().
+    Usable as a context manager.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.count = 0
+
+    @abc.abstractmethod
+    def write(self, record: Any) -> None:
+        """
+        Write one record and count it.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+class BufferedWriter(RecordWriter):
+    """
+    Adapts a list exporter (`exporter(records, path)`), such as a third-party
+    exporter plugin, to the writer interface by collecting records until close().
+    """
+
+    def __init__(self, exporter: Callable[[List[Any], str], None], path: str) -> None:
+        super().__init__(path)
+        self.exporter = exporter
+        self.records: List[Any] = []
+
+    def write(self, record: Any) -> None:
+        self.records.append(record)
+        self.count += 1
+
+    def close(self) -> None:
+        self.exporter(self.records, self.path)
+        self.records = []
+
+WriterFactory = Callable[[str], RecordWriter]
+
+class ExportTee:
+    """
+    Fans each record out to several writers as it is produced, so one scrape
+    can feed any number of output files.
+
+    Writers are opened on the first record, so a run that produces nothing
+    writes nothing. A writer that fails is logged and dropped; the others
+    carry on, and close() returns the paths that failed. Two outputs that
+    resolve to the same file are rejected with ValueError.
+    """
+
+    def __init__(self, outputs: List[Tuple[str, WriterFactory, str]]) -> None:
+        # (format name, writer factory, path)
+        seen: Dict[str, str] = {}
+        for _, _, path in outputs:
+            resolved = os.path.realpath(path)
+            if resolved in seen:
+                raise ValueError(f"Outputs {seen[resolved]} and {path} write to the same file.")
+            seen[resolved] = path
+        self.outputs = outputs
+        self.count = 0
+        self.writers: Optional[Dict[str, RecordWriter]] = None
+        self.failed: List[str] = []
+
+    def _open(self) -> Dict[str, RecordWriter]:
+        writers: Dict[str, RecordWriter] = {}
+        for fmt, factory, path in self.outputs:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                writers[path] = factory(path)
+                logger.info("Writing %s output to %s", fmt, path)
+            except Exception as e:
+                logger.error("Could not open %s output %s: %s", fmt, path, e)
+                self.failed.append(path)
+        return writers
+
+    def write(self, record: Any) -> None:
+        if self.writers is None:
+            self.writers = self._open()
+        for path, writer in list(self.writers.items()):
+            try:
+                writer.write(record)
+            except Exception as e:
+                logger.exception("Writing to %s failed; dropping this output: %s", path, e)
+                self.failed.append(path)
+                del self.writers[path]
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+        self.count += 1
+
+    def close(self) -> List[str]:
+        for path, writer in (self.writers or {}).items():
+            try:
+                writer.close()
+            except Exception as e:
+                logger.exception("Finishing %s failed: %s", path, e)
+                self.failed.append(path)
+        self.writers = {}
+        return self.failed
+
+    def written(self) -> List[str]:
+        """
+        Paths that received every record.
+        """
+        return [path for _, _, path in self.outputs if path not in self.failed]
@@ -1,8 +1,11 @@
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import xml.etree.ElementTree as ET
 
+from exporters.tee import RecordWriter
+from models.records import as_dict
+
 logger = logging.getLogger(__name__)
 
 def _dict_to_xml(parent: ET.Element, key: str, value: Any) -> None:
@@ -19,17 +22,59 @@ def _dict_to_xml(parent: ET.Element, key: str, value: Any) -> None:
         node = ET.SubElement(parent, key)
         node.text = "" if value is None else str(value)
 
+def _record_element(record: Any) -> ET.Element:
+    doc_el = ET.Element("doctor")
+    for key, value in as_dict(record).items():
+        _dict_to_xml(doc_el, key, value)
+    return doc_el
+
+class XmlWriter(RecordWriter):
+    """
+    Streams <doctor> elements into a <doctors> document.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._f = open(path, "wb")
+        self._f.write(b"<?xml version='1.0' encoding='utf-8'?>\n<doctors>")
+
+    def write(self, record: Any) -> None:
+        self._f.write(ET.tostring(_record_element(record), encoding="unicode").encode("utf-8"))
+        self.count += 1
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.write(b"</doctors>")
+        self._f.close()
+
 def export_xml(data: List[Dict[str, Any]], path: str) -> None:
     """
-    Export a list of doctor dictionaries to an XML file.
+    Export a list of doctor dictionaries (or Doctor records) to an XML file.
     """
     logger.info("Writing XML output to %s", path)
-    root = ET.Element("doctors")
+    with XmlWriter(path) as writer:
+        for record in data:
+            writer.write(record)
+
+def _element_value(el: Any) -> Any:
+    if not len(el):
+        return el.text or None
+    if el[0].tag == "item":
+        # Lists are written as <item><value>...</value></item>.
+        return [_element_value(item[0]) if len(item) else None for item in el]
+    return {child.tag: _element_value(child) for child in el}
 
-    for record in data:
-        doc_el = ET.SubElement(root, "doctor")
-        for key, value in record.items():
-            _dict_to_xml(doc_el, key, value)
+def read_xml(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of an exported XML file one <doctor> at a time.
+    Scalar values come back as strings; empty elements as None.
+    """
+    from lxml import etree
 
-    tree = ET.ElementTree(root)
-    tree.write(path, encoding="utf-8", xml_declaration=True)
\ No newline at end of file
+    for _, el in etree.iterparse(path, events=("end",), tag="doctor"):
+        yield {child.tag: _element_value(child) for child in el}
+        # Drop finished <doctor> elements so memory stays flat.
+        el.clear()
+        while el.getprevious() is not None:
+            del el.getparent()[0]
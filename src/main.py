@@ -1,24 +1,34 @@
 import argparse
+import functools
 import json
 import logging
 import os
 import sys
-from typing import Any, Dict, List, Optional
-
-from bs4 import BeautifulSoup
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 # Ensure local imports work when running as `python src/main.py`
 CURRENT_DIR = os.path.dirname(__file__)
 if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
-from utils.request_handler import RequestHandler  # noqa: E402
-from parsers.doctor_parser import parse_search_results, parse_doctor_profile  # noqa: E402
-from parsers.location_parser import parse_primary_location, parse_insurances  # noqa: E402
-from parsers.review_parser import parse_reviews  # noqa: E402
-from exporters.json_exporter import export_json  # noqa: E402
-from exporters.csv_exporter import export_csv  # noqa: E402
-from exporters.xml_exporter import export_xml  # noqa: E402
+PROJECT_DIR = os.path.dirname(os.path.abspath(CURRENT_DIR))
+
+# Only lightweight modules are imported up front. Parsers, exporters and the
+# fetch backend (bs4, lxml, requests, csv, xml) are loaded on first use
+# through utils.plugins, which keeps short CLI invocations fast.
+from utils import plugins  # noqa: E402
+from utils.memory_budget import MemoryBudget, default_caps  # noqa: E402
+from models.records import Doctor  # noqa: E402
+
+if TYPE_CHECKING:
+    from exporters.tee import ExportTee
+    from utils.job_queue import JobQueue
+    from utils.request_handler import RequestHandler
+    from utils.revisit_scheduler import RevisitScheduler
+    from utils.stage_profiler import StageProfiler
+    from utils.sweep_planner import SweepPlanner
 
 def load_config(path: Optional[str]) -> Dict[str, Any]:
     if not path:
@@ -49,24 +59,140 @@ def merge_config(config: Dict[str, Any], args: argparse.Namespace) -> Dict[str,
         merged["outputFormat"] = args.output_format
     if args.output_file:
         merged["outputFile"] = args.output_file
+    if args.output:
+        merged["outputs"] = [
+            {"format": fmt, "file": path or None} for fmt, _, path in (o.partition("=") for o in args.output)
+        ]
+    elif args.output_format or args.output_file:
+        # An explicit single output on the command line replaces configured ones.
+        merged.pop("outputs", None)
+    if args.memory_budget_mb:
+        merged["memoryBudgetMB"] = args.memory_budget_mb
+    if getattr(args, "queue", None):
+        merged["queuePath"] = args.queue
+    if getattr(args, "shard_dir", None):
+        merged["shardDir"] = args.shard_dir
+    if getattr(args, "lease_seconds", None):
+        merged["leaseSeconds"] = args.lease_seconds
+    if getattr(args, "budget", None):
+        merged["refreshBudget"] = args.budget
+    if getattr(args, "fill", False):
+        merged["refreshFillBudget"] = True
+    if getattr(args, "revisit_db", None):
+        merged["revisitDbPath"] = args.revisit_db
+    if getattr(args, "bbox", None):
+        merged["sweep"] = dict(merged.get("sweep") or {})
+        merged["sweep"]["bbox"] = [float(v) for v in args.bbox.split(",")]
+    if getattr(args, "cell_miles", None):
+        merged["sweep"] = dict(merged.get("sweep") or {})
+        merged["sweep"]["cellMiles"] = args.cell_miles
+    if getattr(args, "specialty", None):
+        merged["sweep"] = dict(merged.get("sweep") or {})
+        merged["sweep"]["specialties"] = args.specialty
+    if args.selector_stats:
+        merged["selectorStatsPath"] = args.selector_stats
+    if args.profile:
+        merged["profile"] = args.profile
+    if args.profile_dir:
+        merged["profileDir"] = args.profile_dir
+    if args.profile_interval_ms:
+        merged["profileIntervalMs"] = args.profile_interval_ms
     if args.proxy:
         merged.setdefault("proxyConfiguration", {})
         merged["proxyConfiguration"]["http"] = args.proxy
         merged["proxyConfiguration"]["https"] = args.proxy
+    if merged.get("memoryBudgetMB"):
+        # Under a memory budget, unbounded per-record lists get caps that scale with it.
+        for key, value in default_caps(merged["memoryBudgetMB"]).items():
+            if merged.get(key) is None:
+                merged[key] = value
 
     return merged
 
 def select_exporter(fmt: str):
-    fmt = fmt.lower()
-    if fmt == "json":
-        return export_json
-    if fmt == "csv":
-        return export_csv
-    if fmt in ("xml", "xls", "xmls"):  # accept minor typos
-        return export_xml
-    raise ValueError(f"Unsupported output format: {fmt}. Use json, csv, or xml.")
-
-def build_request_handler(config: Dict[str, Any]) -> RequestHandler:
+    try:
+        return plugins.load("exporter", fmt)
+    except KeyError:
+        formats = plugins.available("writer")
+        formats += [name for name in plugins.available("exporter") if name not in formats]
+        raise ValueError(f"Unsupported output format: {fmt}. Use one of: {', '.join(formats)}.") from None
+
+def resolve_outputs(config: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    (format, path) pairs to write: each entry of "outputs", or the single
+    outputFormat/outputFile. Outputs without a file are named after
+    outputFile (default data/sample_output) with the format as extension.
+    Raises ValueError for an entry that is not an object.
+    """
+    outputs = config.get("outputs") or [{"format": config.get("outputFormat"), "file": config.get("outputFile")}]
+    base = config.get("outputFile") or os.path.join(PROJECT_DIR, "data", "sample_output")
+    resolved = []
+    for output in outputs:
+        if not isinstance(output, dict):
+            raise ValueError(f'Each "outputs" entry must be an object with "format" and "file", got {output!r}')
+        fmt = (output.get("format") or "json").lower()
+        resolved.append((fmt, output.get("file") or f"{os.path.splitext(base)[0]}.{fmt}"))
+    return resolved
+
+def build_export_tee(config: Dict[str, Any]) -> "ExportTee":
+    """
+    One streaming writer per configured output. Raises ValueError for an
+    unknown format or a malformed "outputs" entry.
+    """
+    from exporters.tee import BufferedWriter, ExportTee
+
+    outputs = []
+    for fmt, path in resolve_outputs(config):
+        try:
+            factory = plugins.load("writer", fmt)
+        except KeyError:
+            exporter = select_exporter(fmt)
+            factory = functools.partial(BufferedWriter, exporter)
+        outputs.append((fmt, factory, path))
+    return ExportTee(outputs)
+
+def resolve_selector_stats_path(config: Dict[str, Any]) -> Optional[str]:
+    """
+    Absolute path of the selector stats file, or None when selector tuning
+    is off (the default). Relative paths are taken from the working directory.
+    """
+    path = config.get("selectorStatsPath")
+    return os.path.abspath(path) if path else None
+
+def load_selector_stats(config: Dict[str, Any]) -> Optional[str]:
+    """
+    Tune parser selector chains from selectorStatsPath, if configured.
+    Returns the path to save this run's stats to.
+    """
+    path = resolve_selector_stats_path(config)
+    if not path:
+        return None
+    from utils.selector_stats import DEFAULT_MIN_SAMPLES, DEFAULT_PIN_RATIO, REGISTRY
+
+    REGISTRY.load(
+        path,
+        min_samples=config.get("selectorMinSamples") or DEFAULT_MIN_SAMPLES,
+        pin_ratio=config.get("selectorPinRatio") or DEFAULT_PIN_RATIO,
+    )
+    return path
+
+def save_selector_stats(path: Optional[str]) -> None:
+    """
+    Warn about selector chains that look like a template change, then
+    merge this run's selector hits into the stats file.
+    """
+    if not path:
+        return
+    from utils.selector_stats import REGISTRY
+
+    for warning in REGISTRY.drift():
+        logging.warning("Selector drift (page template changed?): %s", warning)
+    try:
+        REGISTRY.save(path)
+    except OSError as e:
+        logging.error("Could not save selector stats to %s: %s", path, e)
+
+def build_request_handler(config: Dict[str, Any]) -> "RequestHandler":
     proxy_cfg = config.get("proxyConfiguration") or {}
     proxies = {}
 
@@ -77,67 +203,564 @@ def build_request_handler(config: Dict[str, Any]) -> RequestHandler:
 
     timeout = config.get("timeoutSeconds", 20)
     max_retries = config.get("maxRetries", 3)
+    max_response_bytes = config.get("maxResponseBytes", 10 * 1024 * 1024)
 
-    return RequestHandler(
+    backend = plugins.load("fetch", config.get("fetchBackend") or "requests")
+    return backend(
         proxies=proxies or None,
         timeout=timeout,
         max_retries=max_retries,
+        max_response_bytes=max_response_bytes,
     )
 
-def scrape(config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    search_url = config.get("searchUrl")
-    if not search_url:
-        raise ValueError("searchUrl must be provided via config or CLI arguments.")
-
+def get_max_items(config: Dict[str, Any]) -> int:
     max_items = config.get("maxItems") or 50
     if not isinstance(max_items, int) or max_items <= 0:
         max_items = 50
+    return max_items
 
-    handler = build_request_handler(config)
+def fetch_profile_urls(handler: "RequestHandler", search_url: str, max_items: int) -> List[str]:
+    """
+    Fetch a search results page and return up to max_items profile URLs.
+    """
+    from parsers.doctor_parser import parse_search_results
 
     logging.info("Fetching search results from %s", search_url)
-    search_html = handler.get(search_url)
-    if search_html is None:
+    # Links are extracted while the page downloads; the transfer stops at max_items.
+    profile_urls = handler.stream(
+        search_url,
+        lambda chunks, charset: parse_search_results(
+            chunks, base_url=search_url, max_items=max_items, encoding=charset
+        ),
+    )
+    if profile_urls is None:
         raise RuntimeError("Failed to fetch search results page.")
+    return profile_urls
+
+def build_memory_budget(config: Dict[str, Any], profiler: Optional["StageProfiler"] = None) -> MemoryBudget:
+    budget_mb = config.get("memoryBudgetMB")
+    if not budget_mb:
+        return MemoryBudget(None, profiler=profiler)
+    return MemoryBudget(
+        int(budget_mb * 1024 * 1024),
+        trace=bool(config.get("memoryTrace")),
+        profiler=profiler,
+        max_wait=config.get("memoryWaitSeconds", 30.0),
+    )
+
+def build_profiler(config: Dict[str, Any]) -> Optional["StageProfiler"]:
+    """
+    StageProfiler for the "profile" mode (deterministic or sampling), or None.
+    Raises ValueError for an unknown mode.
+    """
+    mode = config.get("profile")
+    if not mode:
+        return None
+    from utils.stage_profiler import DEFAULT_INTERVAL_MS, StageProfiler
+
+    out_dir = config.get("profileDir") or os.path.join(PROJECT_DIR, "data", "profile")
+    return StageProfiler(mode, out_dir, config.get("profileIntervalMs") or DEFAULT_INTERVAL_MS)
+
+def parse_profile_page(
+    body: bytes,
+    charset: Optional[str],
+    profile_url: str,
+    search_url: Optional[str],
+    config: Optional[Dict[str, Any]] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> Doctor:
+    """
+    Parse a fetched profile page into a Doctor record.
+
+    Parsing is bounded by maxParseElements and maxParseBytes of input,
+    parseTimeoutSeconds per page and extractorTimeoutSeconds per extractor.
+    A record cut short by any of them is returned with "partial": true and
+    the reasons in "partialReasons". `clock` times the parse limits.
+    """
+    from parsers.doctor_parser import parse_doctor_profile
+    from parsers.location_parser import parse_insurances, parse_primary_location
+    from parsers.review_parser import parse_reviews
+    from utils.parse_guard import DEFAULT_MAX_ELEMENTS, ParseGuard, limit_elements
+
+    config = config or {}
+    make_soup = plugins.load("parser", config.get("parserBackend") or "lxml")
+    guard = ParseGuard(
+        page_seconds=config.get("parseTimeoutSeconds", 5.0),
+        extractor_seconds=config.get("extractorTimeoutSeconds", 2.0),
+        max_scan_chars=config.get("maxScanChars", 1000000),
+        clock=clock,
+    )
+
+    # The parser recovers from either cut; profile fields sit near the top.
+    # The provider ID scan still sees the whole page.
+    raw_html = body
+    max_bytes = config.get("maxParseBytes", 5 * 1024 * 1024)
+    if max_bytes and len(body) > max_bytes:
+        guard.note(f"page truncated to {max_bytes} bytes")
+        body = body[:max_bytes]
+    max_elements = config.get("maxParseElements", DEFAULT_MAX_ELEMENTS)
+    body, cut = limit_elements(body, max_elements)
+    if cut:
+        guard.note(f"page truncated to {max_elements} elements")
+
+    # Hand raw bytes to the parser: no decoded copy of the page, no charset sniffing pass.
+    soup = make_soup(body, charset)
+    try:
+        doctor = parse_doctor_profile(soup, profile_url, guard=guard, raw_html=raw_html)
+        location = guard.run("location", parse_primary_location, {}, soup)
+        insurances = guard.run("insurances", parse_insurances, [], soup, max_insurances=config.get("maxInsurances"))
+        reviews = guard.run("reviews", parse_reviews, [], soup, max_reviews=config.get("maxReviews"))
+    finally:
+        # Parse trees are full of parent/child cycles; break them now rather
+        # than waiting for a full garbage collection.
+        soup.decompose()
+
+    doctor["searchUrl"] = search_url
+    doctor["location"] = location
+    doctor["insurances"] = insurances
+    doctor["reviews"] = reviews
+    if guard.partial:
+        logging.warning("Partial record for %s: %s", profile_url, "; ".join(guard.reasons))
+        doctor["partial"] = True
+        doctor["partialReasons"] = guard.reasons
+
+    return Doctor.from_dict(doctor)
+
+def scrape_profile(
+    handler: "RequestHandler",
+    profile_url: str,
+    search_url: Optional[str],
+    config: Optional[Dict[str, Any]] = None,
+    budget: Optional[MemoryBudget] = None,
+) -> Optional[Doctor]:
+    """
+    Fetch and parse a single doctor profile.
+    Returns None if the page could not be fetched. Parse errors and timeouts
+    yield a partial record (see parse_profile_page).
+    """
+    budget = budget or MemoryBudget(None)
+
+    with budget.stage("fetch"):
+        fetched = handler.get_bytes(profile_url)
+    if fetched is None:
+        logging.error("Skipping profile %s due to repeated request failures.", profile_url)
+        return None
+
+    with budget.stage("parse"):
+        body, charset = fetched
+        del fetched
+        return parse_profile_page(body, charset, profile_url, search_url, config)
+
+def scrape_records(
+    config: Dict[str, Any],
+    on_record: Callable[[Doctor], None],
+    budget: Optional[MemoryBudget] = None,
+) -> int:
+    """
+    Scrape the configured search, passing each compact Doctor record to
+    on_record as it is parsed. Returns the number of records.
+
+    With memoryBudgetMB set, fetching pauses while RSS is over the budget
+    and stops early if it stays there for memoryWaitSeconds.
+    """
+    search_url = config.get("searchUrl")
+    if not search_url:
+        raise ValueError("searchUrl must be provided via config or CLI arguments.")
+
+    max_items = get_max_items(config)
+    handler = build_request_handler(config)
+    budget = budget or build_memory_budget(config)
 
-    profile_urls = parse_search_results(search_html, base_url=search_url)
+    with budget.stage("search"):
+        profile_urls = fetch_profile_urls(handler, search_url, max_items)
     if not profile_urls:
         logging.warning("No doctor profile URLs found in search results.")
-        return []
-
-    if len(profile_urls) > max_items:
-        profile_urls = profile_urls[:max_items]
+        return 0
 
     logging.info("Found %d doctor profile URLs. Beginning profile scraping.", len(profile_urls))
+    return scrape_profiles(handler, [(url, search_url) for url in profile_urls], config, budget, on_record)
 
-    doctors: List[Dict[str, Any]] = []
+def scrape_profiles(
+    handler: "RequestHandler",
+    targets: List[Tuple[str, Optional[str]]],
+    config: Dict[str, Any],
+    budget: MemoryBudget,
+    on_record: Callable[[Doctor], None],
+) -> int:
+    """
+    Scrape (profile_url, search_url) pairs in order, skipping failures.
+    Each record is passed to on_record as soon as it is parsed and is not
+    kept afterwards. Returns the number of records.
+    """
+    scraped = 0
 
-    for idx, profile_url in enumerate(profile_urls, start=1):
-        logging.info("(%d/%d) Fetching profile: %s", idx, len(profile_urls), profile_url)
-        html = handler.get(profile_url)
-        if html is None:
-            logging.error("Skipping profile %s due to repeated request failures.", profile_url)
+    for idx, (profile_url, search_url) in enumerate(targets, start=1):
+        if not budget.wait_for_headroom():
+            logging.error(
+                "Memory budget still exceeded; stopping after %d of %d profiles.", idx - 1, len(targets)
+            )
+            break
+        logging.info("(%d/%d) Fetching profile: %s", idx, len(targets), profile_url)
+        try:
+            doctor = scrape_profile(handler, profile_url, search_url, config, budget)
+        except Exception as e:
+            logging.exception("Error parsing doctor profile %s: %s", profile_url, e)
             continue
+        if doctor is not None:
+            on_record(doctor)
+            scraped += 1
+
+    logging.info("Successfully scraped %d doctor profiles.", scraped)
+    return scraped
 
-        soup = BeautifulSoup(html, "lxml")
+def sweep_profile_urls(handler: "RequestHandler", planner: "SweepPlanner") -> List[Tuple[str, str]]:
+    """
+    Run a planned sweep of search pages, splitting truncated cells as needed.
+    Returns unique (profile_url, search_url) pairs in discovery order.
+    """
+    pending = deque(planner.initial_cells())
+    found: Dict[str, str] = {}
+    searches = 0
 
+    while pending:
+        cell = pending.popleft()
+        if planner.is_covered(cell):
+            # Covered by a search that finished after this cell was queued.
+            continue
+        search_url = planner.search_url(cell)
+        searches += 1
         try:
-            doctor = parse_doctor_profile(soup, profile_url)
-            location = parse_primary_location(soup)
-            insurances = parse_insurances(soup)
-            reviews = parse_reviews(soup)
+            profile_urls = fetch_profile_urls(handler, search_url, planner.result_cap)
+        except RuntimeError as e:
+            logging.error("Search %s failed: %s", search_url, e)
+            continue
+
+        for url in profile_urls:
+            found.setdefault(url, search_url)
+        pending.extend(planner.refine(cell, len(profile_urls)))
+
+    logging.info("Sweep used %d search requests and found %d unique profiles.", searches, len(found))
+    return list(found.items())
+
+def sweep_records(
+    config: Dict[str, Any],
+    on_record: Callable[[Doctor], None],
+    budget: Optional[MemoryBudget] = None,
+) -> int:
+    """
+    Scrape every profile found by the sweep configured under "sweep",
+    passing each record to on_record. Returns the number of records.
+    """
+    from utils.sweep_planner import SweepPlanner
+
+    planner = SweepPlanner.from_config(config, get_max_items(config))
+    handler = build_request_handler(config)
+    budget = budget or build_memory_budget(config)
+
+    with budget.stage("search"):
+        targets = sweep_profile_urls(handler, planner)
+    return scrape_profiles(handler, targets, config, budget, on_record)
+
+def scrape(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    scrape_records(config, lambda doctor: records.append(doctor.to_dict()))
+    return records
+
+def resolve_revisit_db_path(config: Dict[str, Any]) -> str:
+    """
+    Path of the revisit history database: revisitDbPath, or
+    data/revisit.sqlite. Scrapes record into it and refresh reads from it.
+    """
+    return config.get("revisitDbPath") or os.path.join(PROJECT_DIR, "data", "revisit.sqlite")
+
+def build_revisit_scheduler(config: Dict[str, Any]) -> "RevisitScheduler":
+    from utils.revisit_scheduler import RevisitScheduler
+
+    return RevisitScheduler(
+        resolve_revisit_db_path(config),
+        min_days=config.get("revisitMinDays", 1.0),
+        max_days=config.get("revisitMaxDays", 365.0),
+    )
 
-            doctor["searchUrl"] = search_url
-            doctor["location"] = location
-            doctor["insurances"] = insurances
-            doctor["reviews"] = reviews
+def refresh_records(
+    config: Dict[str, Any],
+    on_record: Callable[[Doctor], None],
+    budget: Optional[MemoryBudget] = None,
+) -> int:
+    """
+    Re-scrape the profiles most likely to have changed, up to refreshBudget
+    requests, passing each record to on_record. Returns the number of records.
+    """
+    from utils.revisit_scheduler import HistoryRecorder
 
-            doctors.append(doctor)
+    history = HistoryRecorder(build_revisit_scheduler(config))
+    targets = history.scheduler.worklist(
+        config.get("refreshBudget") or get_max_items(config), fill=bool(config.get("refreshFillBudget"))
+    )
+    if not targets:
+        logging.info("No profiles are due for a refresh.")
+        return 0
+
+    def observe(doctor: Doctor) -> None:
+        on_record(doctor)
+        history.observe(doctor.to_dict())
+
+    handler = build_request_handler(config)
+    budget = budget or build_memory_budget(config)
+    scraped = scrape_profiles(
+        # A blank searchUrl is stored as NULL so it never replaces a known one.
+        handler, [(url, search_url or None) for url, search_url in targets], config, budget, observe
+    )
+    history.finish([url for url, _ in targets])
+    return scraped
+
+def build_job_queue(config: Dict[str, Any]) -> "JobQueue":
+    from utils.job_queue import JobQueue
+
+    path = config.get("queuePath") or os.path.join(PROJECT_DIR, "data", "queue.sqlite")
+    return JobQueue(
+        path,
+        lease_seconds=config.get("leaseSeconds", 300),
+        max_attempts=config.get("maxAttempts", 3),
+    )
+
+def enqueue_searches(
+    queue: "JobQueue", search_urls: List[str], max_items: int, since: Optional[float] = None
+) -> int:
+    """
+    Queue search tasks. With `since` (the crawl's start time), searches and
+    the profiles they lead to are queued again if they finished before it.
+    """
+    added = 0
+    for url in search_urls:
+        payload: Dict[str, Any] = {"url": url, "maxItems": max_items}
+        if since:
+            payload["since"] = since
+        if queue.enqueue("search", url, payload, since=since):
+            added += 1
+    return added
+
+def enqueue_sweep(queue: "JobQueue", planner: "SweepPlanner", since: Optional[float] = None) -> int:
+    """
+    Queue the initial cells of a sweep. Workers split truncated cells themselves.
+    `since` re-queues finished tasks as in enqueue_searches().
+    """
+    added = 0
+    settings = planner.to_dict()
+    for cell in planner.initial_cells():
+        url = planner.search_url(cell)
+        payload = {"url": url, "maxItems": planner.result_cap, "cell": cell.to_dict(), "sweep": settings}
+        if since:
+            payload["since"] = since
+        if queue.enqueue("search", url, payload, since=since):
+            added += 1
+    return added
+
+def run_worker(
+    config: Dict[str, Any],
+    queue: "JobQueue",
+    worker_id: str,
+    shard_path: str,
+    wait: bool = False,
+    poll_interval: float = 2.0,
+) -> int:
+    """
+    Process search and profile tasks from the queue until it is drained
+    (or forever with wait=True). Search tasks enqueue profile tasks; profile
+    tasks append records to this worker's shard. Leases are renewed while a
+    task runs, so slow tasks are not handed to a second worker. Returns the
+    number of tasks completed.
+    """
+    from exporters.jsonl_exporter import append_jsonl
+
+    handler = build_request_handler(config)
+    budget = build_memory_budget(config)
+    completed = 0
+
+    while True:
+        # Stop leasing while over budget; if that does not help, leave the
+        # remaining tasks to workers with memory to spare.
+        if not budget.wait_for_headroom():
+            logging.error("[%s] Memory budget still exceeded; worker stopping.", worker_id)
+            break
+
+        task = queue.lease(worker_id)
+        if task is None:
+            if not wait and queue.is_drained():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        payload = task["payload"]
+        url = payload.get("url")
+        logging.info("[%s] %s task %d (attempt %d): %s", worker_id, task["kind"], task["id"], task["attempts"], url)
+
+        try:
+            if task["kind"] == "search":
+                max_items = payload.get("maxItems") or get_max_items(config)
+                with queue.renewing(task["id"], worker_id):
+                    profile_urls = fetch_profile_urls(handler, url, max_items)
+                new = 0
+                for profile_url in profile_urls:
+                    profile_payload = {"url": profile_url, "searchUrl": url}
+                    if queue.enqueue("profile", profile_url, profile_payload, since=payload.get("since")):
+                        new += 1
+                logging.info("[%s] Queued %d new profile URLs from %s", worker_id, new, url)
+                if payload.get("cell"):
+                    enqueue_refined_cells(queue, payload, len(profile_urls))
+            elif task["kind"] == "profile":
+                with queue.renewing(task["id"], worker_id):
+                    doctor = scrape_profile(handler, url, payload.get("searchUrl"), config, budget)
+                if doctor is None:
+                    queue.fail(task["id"], worker_id, "fetch failed")
+                    continue
+                append_jsonl([doctor], shard_path)
+            else:
+                queue.fail(task["id"], worker_id, f"unknown task kind {task['kind']}", retry=False)
+                continue
+        except RuntimeError as e:
+            # Fetch failures may succeed later or from another worker.
+            queue.fail(task["id"], worker_id, str(e))
+            continue
         except Exception as e:
-            logging.exception("Error parsing doctor profile %s: %s", profile_url, e)
+            logging.exception("Error processing task %d (%s): %s", task["id"], url, e)
+            queue.fail(task["id"], worker_id, repr(e), retry=False)
+            continue
 
-    logging.info("Successfully scraped %d doctor profiles.", len(doctors))
-    return doctors
+        if queue.complete(task["id"], worker_id):
+            completed += 1
+        else:
+            logging.warning("[%s] Lease on task %d expired before completion.", worker_id, task["id"])
+
+    logging.info("[%s] Worker finished after %d tasks. Queue: %s", worker_id, completed, queue.counts())
+    budget.log_report()
+    return completed
+
+def enqueue_refined_cells(queue: "JobQueue", payload: Dict[str, Any], found: int) -> None:
+    """
+    Split a sweep cell whose search was truncated.
+    """
+    from utils.sweep_planner import SearchCell, SweepPlanner
+
+    planner = SweepPlanner.from_dict(payload["sweep"])
+    for child in planner.refine(SearchCell.from_dict(payload["cell"]), found):
+        url = planner.search_url(child)
+        queue.enqueue("search", url, dict(payload, url=url, cell=child.to_dict()), since=payload.get("since"))
+
+def daemon_handler_factory(config: Dict[str, Any]) -> Callable[[], "RequestHandler"]:
+    """
+    Handler factory for the daemon's fetch threads. Thread-safe backends
+    (http2) are shared, so concurrent fetches to a host go out as streams on
+    one connection; others get a handler per thread.
+    """
+    backend = plugins.load("fetch", config.get("fetchBackend") or "requests")
+    if getattr(backend, "thread_safe", False):
+        shared = build_request_handler(config)
+        return lambda: shared
+    return lambda: build_request_handler(config)
+
+def run_daemon(config: Dict[str, Any], host: str, port: int, socket_path: Optional[str], workers: int) -> None:
+    """
+    Serve scrape jobs from a long-running process with warm sessions,
+    connection pools, parsers and result caches.
+    """
+    from service.daemon import ScrapeDaemon, serve
+
+    # Import parser modules now so the first job does not pay for them.
+    plugins.load("parser", config.get("parserBackend") or "lxml")
+    import parsers.doctor_parser  # noqa: F401
+    import parsers.location_parser  # noqa: F401
+    import parsers.review_parser  # noqa: F401
+
+    budget = build_memory_budget(config)
+    daemon = ScrapeDaemon(
+        daemon_handler_factory(config),
+        search_fn=fetch_profile_urls,
+        profile_fn=lambda h, url, search_url: scrape_profile(h, url, search_url, config, budget),
+        budget=budget,
+        workers=workers,
+        default_max_items=get_max_items(config),
+        cache_ttl=config.get("cacheTtlSeconds", 3600),
+        cache_entries=config.get("cacheMaxEntries", 10000),
+    )
+    serve(daemon, host=host, port=port, socket_path=socket_path)
+
+def expand_output_paths(paths: List[str], input_format: Optional[str] = None) -> List[str]:
+    """
+    Expand directories to the output files they contain (e.g. a shard
+    directory). Files in a directory that do not hold exported records,
+    such as a config.json, are skipped.
+    """
+    from exporters.readers import INPUT_FORMATS, is_record_file
+
+    files: List[str] = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for name in sorted(os.listdir(path)):
+            full_path = os.path.join(path, name)
+            if input_format is None and os.path.splitext(name)[1].lower() not in INPUT_FORMATS:
+                continue
+            if os.path.isfile(full_path) and is_record_file(full_path, input_format):
+                files.append(full_path)
+            else:
+                logging.info("Skipping %s: not exported doctor records.", full_path)
+    return files
+
+def run_stats(paths: List[str], input_format: Optional[str], top: int, as_json: bool) -> None:
+    """
+    Print summary statistics for exported output files. Directories are
+    expanded to the output files they contain (e.g. a shard directory).
+    """
+    from utils.dataset_stats import compute_stats, format_report, load_columns
+
+    report = compute_stats(load_columns(expand_output_paths(paths, input_format), input_format), top=top)
+    print(json.dumps(report, indent=2, ensure_ascii=False) if as_json else format_report(report))
+
+def run_query(paths: List[str], input_format: Optional[str], filters: Dict[str, Any], limit: int, mode: str) -> None:
+    """
+    Index exported output files and print the records matching every filter.
+    mode is "lines" (one summary line each), "json" (a JSON array) or "count".
+    """
+    from utils.doctor_index import format_doctor, load_index
+
+    start = time.perf_counter()
+    index = load_index(expand_output_paths(paths, input_format), input_format)
+    logging.info("Indexed %d doctors in %.2fs.", len(index), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    ids = index.match_ids(**filters)
+    logging.info("Query matched %d doctors in %.3f ms.", len(ids), (time.perf_counter() - start) * 1000)
+
+    if mode == "count":
+        print(len(ids))
+        return
+    matches = [index.records[i] for i in ids[:limit].tolist()]
+    if mode == "json":
+        print(json.dumps([doctor.to_dict() for doctor in matches], indent=2, ensure_ascii=False))
+    else:
+        for doctor in matches:
+            print(format_doctor(doctor))
+
+def collect_shards(shard_dir: str) -> Iterator[Doctor]:
+    """
+    Yield the records of all per-worker shards, dropping profiles written
+    twice (a task can be delivered more than once when a lease expires, or
+    queued again by a later crawl). Newer shards are read first, so a
+    re-crawl's records win.
+    """
+    from exporters.jsonl_exporter import read_jsonl
+
+    seen = set()
+    paths = [os.path.join(shard_dir, name) for name in os.listdir(shard_dir) if name.endswith(".jsonl")]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True):
+        for record in read_jsonl(path):
+            profile_url = (record.get("urls") or {}).get("profile")
+            if profile_url in seen:
+                continue
+            seen.add(profile_url)
+            yield Doctor.from_dict(record)
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -168,15 +791,140 @@ def parse_args() -> argparse.Namespace:
         "-o",
         help="Path to output file. Defaults to ./data/sample_output.<ext> based on format.",
     )
+    parser.add_argument(
+        "--output",
+        action="append",
+        metavar="FORMAT[=PATH]",
+        help="Write this output as well; repeat for several formats from one scrape "
+        "(e.g. --output json --output csv=data/doctors.csv). Overrides -f/-o.",
+    )
     parser.add_argument(
         "--proxy",
         help="Optional HTTP/HTTPS proxy URL. Applies to both http and https.",
     )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        help="Stop fetching when RSS cannot be kept under this many MB, and report peak memory per stage.",
+    )
+    parser.add_argument(
+        "--selector-stats",
+        help="Enable selector tuning with this JSON file of parser selector hit counts. A fallback "
+        "selector that matched nearly every page is tried first (never ahead of a more specific "
+        "one) and this run's hits are added on exit. Off by default.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["deterministic", "sampling"],
+        help="Profile the run per stage (search, fetch, parse, export): deterministic writes "
+        "<stage>.pstats, sampling writes collapsed stacks for flamegraphs. Both report fetch "
+        "wait separately from CPU time.",
+    )
+    parser.add_argument("--profile-dir", help="Directory for profile output. Default: data/profile.")
+    parser.add_argument(
+        "--profile-interval-ms", type=float, help="Sampling interval for --profile sampling. Default: 5."
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
         help="Logging level (DEBUG, INFO, WARNING, ERROR). Default: INFO.",
     )
+
+    # Optional work-queue mode. Global options above must precede the command.
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    enqueue = commands.add_parser("enqueue", help="Add search URLs to the work queue.")
+    enqueue.add_argument("urls", nargs="*", help="Search URLs (default: searchUrl from config).")
+    enqueue.add_argument("--queue", help="Path to the queue database (default: data/queue.sqlite).")
+    enqueue.add_argument(
+        "--requeue",
+        action="store_true",
+        help="Crawl again: queue searches and profiles even if earlier runs already finished them.",
+    )
+
+    worker = commands.add_parser("worker", help="Process tasks from the work queue.")
+    worker.add_argument("--queue", help="Path to the queue database (default: data/queue.sqlite).")
+    worker.add_argument("--shard-dir", help="Directory for per-worker output shards (default: data/shards).")
+    worker.add_argument("--worker-id", help="Worker name (default: <hostname>-<pid>).")
+    worker.add_argument("--lease-seconds", type=float, help="Task lease duration. Default: 300.")
+    worker.add_argument(
+        "--wait",
+        action="store_true",
+        help="Keep polling for new tasks instead of exiting once the queue is drained.",
+    )
+
+    sweep = commands.add_parser(
+        "sweep", help="Search a whole area (config \"sweep\" section), splitting truncated searches."
+    )
+    sweep.add_argument("--bbox", help="Area to cover as min_lat,min_lng,max_lat,max_lng.")
+    sweep.add_argument("--cell-miles", type=float, help="Initial cell size in miles. Default: 10.")
+    sweep.add_argument(
+        "--specialty", action="append", help="Specialty to sweep (repeatable). Default: template URL's own."
+    )
+    sweep.add_argument("--enqueue", action="store_true", help="Queue the sweep for workers instead of running it.")
+    sweep.add_argument("--queue", help="Path to the queue database (default: data/queue.sqlite).")
+    sweep.add_argument(
+        "--requeue", action="store_true", help="With --enqueue, queue cells and profiles finished by earlier runs."
+    )
+
+    daemon = commands.add_parser("daemon", help="Serve scrape jobs over a local HTTP API.")
+    daemon.add_argument("--host", default="127.0.0.1", help="Address to bind. Default: 127.0.0.1.")
+    daemon.add_argument("--port", type=int, default=8642, help="Port to bind. Default: 8642.")
+    daemon.add_argument("--socket", help="Serve on this Unix socket path instead of TCP.")
+    daemon.add_argument("--workers", type=int, default=4, help="Concurrent fetches shared by all jobs. Default: 4.")
+
+    refresh = commands.add_parser(
+        "refresh", help="Re-scrape known profiles that are due, most likely to have changed first."
+    )
+    refresh.add_argument("--budget", type=int, help="Maximum profile requests this run (default: maxItems).")
+    refresh.add_argument(
+        "--fill",
+        action="store_true",
+        help="Spend budget left after due profiles on the not-yet-due profiles most likely to have changed.",
+    )
+    refresh.add_argument("--revisit-db", help="Path to the revisit history database (default: data/revisit.sqlite).")
+
+    collect = commands.add_parser("collect", help="Merge worker shards into the configured output file.")
+    collect.add_argument("--shard-dir", help="Directory of per-worker shards (default: data/shards).")
+
+    stats = commands.add_parser("stats", help="Summarize exported output files (requires NumPy).")
+    stats.add_argument(
+        "paths", nargs="*", help="Output files or directories of them (default: the configured output file)."
+    )
+    stats.add_argument(
+        "--input-format",
+        choices=["json", "jsonl", "csv", "xml"],
+        help="Format of the input files. Default: from each file's extension.",
+    )
+    stats.add_argument("--top", type=int, default=20, help="Groups shown per table. Default: 20.")
+    stats.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    query = commands.add_parser(
+        "query", help="Look up doctors in exported output by NPI, provider ID, specialty, insurance, state or ZIP."
+    )
+    query.add_argument(
+        "paths", nargs="*", help="Output files or directories of them (default: the configured output file)."
+    )
+    query.add_argument(
+        "--input-format",
+        choices=["json", "jsonl", "csv", "xml"],
+        help="Format of the input files. Default: from each file's extension.",
+    )
+    query.add_argument("--npi", help="Exact NPI.")
+    query.add_argument("--provider-id", help="Exact provider ID.")
+    for field in ("specialty", "insurance", "state", "zip"):
+        query.add_argument(
+            f"--{field}", action="append", help=f"Required {field} (repeat to accept any of several)."
+        )
+    query.add_argument("--limit", type=int, default=20, help="Records printed. Default: 20.")
+    query_output = query.add_mutually_exclusive_group()
+    query_output.add_argument("--json", action="store_true", help="Print matching records as JSON.")
+    query_output.add_argument("--count", action="store_true", help="Print only the number of matches.")
+
+    commands.add_parser(
+        "selectors", help="Show which parser selectors have been matching (from selectorStatsPath)."
+    )
+
     return parser.parse_args()
 
 def main() -> None:
@@ -187,44 +935,163 @@ def main() -> None:
         format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
     )
 
-    default_config_path = args.config or os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "settings.example.json"
-    )
+    default_config_path = args.config or os.path.join(PROJECT_DIR, "config", "settings.example.json")
 
     config = load_config(default_config_path)
     config = merge_config(config, args)
 
-    output_format = (config.get("outputFormat") or "json").lower()
+    if args.command == "enqueue":
+        search_urls = args.urls or ([config["searchUrl"]] if config.get("searchUrl") else [])
+        if not search_urls:
+            logging.error("No search URLs given and no searchUrl in config.")
+            sys.exit(1)
+        queue = build_job_queue(config)
+        since = time.time() if args.requeue else None
+        added = enqueue_searches(queue, search_urls, get_max_items(config), since)
+        logging.info("Queued %d new search tasks in %s. Queue: %s", added, queue.path, queue.counts())
+        return
+
+    if args.command == "sweep" and args.enqueue:
+        from utils.sweep_planner import SweepPlanner
+
+        queue = build_job_queue(config)
+        since = time.time() if args.requeue else None
+        added = enqueue_sweep(queue, SweepPlanner.from_config(config, get_max_items(config)), since)
+        logging.info("Queued %d sweep cells in %s. Queue: %s", added, queue.path, queue.counts())
+        return
+
+    if args.command == "query":
+        filters = {
+            "npi": args.npi,
+            "providerid": args.provider_id,
+            "specialty": args.specialty,
+            "insurance": args.insurance,
+            "state": args.state,
+            "zip": args.zip,
+        }
+        mode = "count" if args.count else "json" if args.json else "lines"
+        try:
+            run_query(args.paths or [resolve_outputs(config)[0][1]], args.input_format, filters, args.limit, mode)
+        except ImportError as e:
+            logging.error("The query command requires NumPy (pip install numpy): %s", e)
+            sys.exit(1)
+        except (OSError, ValueError) as e:
+            logging.error("Could not read output: %s", e)
+            sys.exit(1)
+        return
+
+    if args.command == "selectors":
+        from utils.selector_stats import DEFAULT_PIN_RATIO, format_stats, read_stats
+
+        path = resolve_selector_stats_path(config)
+        if not path:
+            logging.error("Selector tuning is off; pass --selector-stats or set selectorStatsPath.")
+            sys.exit(1)
+        stats = read_stats(path)
+        if not stats:
+            logging.warning("No selector stats in %s.", path)
+            return
+        print(format_stats(stats, config.get("selectorPinRatio") or DEFAULT_PIN_RATIO))
+        return
+
+    if args.command == "stats":
+        try:
+            # Every output holds the same records; the first one stands for the run.
+            run_stats(args.paths or [resolve_outputs(config)[0][1]], args.input_format, args.top, args.json)
+        except ImportError as e:
+            logging.error("The stats command requires NumPy (pip install numpy): %s", e)
+            sys.exit(1)
+        except (OSError, ValueError) as e:
+            logging.error("Could not read output: %s", e)
+            sys.exit(1)
+        return
+
+    selector_stats_path = load_selector_stats(config)
+
+    if args.command == "daemon":
+        run_daemon(config, args.host, args.port, args.socket, args.workers)
+        save_selector_stats(selector_stats_path)
+        return
+
+    shard_dir = config.get("shardDir") or os.path.join(PROJECT_DIR, "data", "shards")
+
+    if args.command == "worker":
+        os.makedirs(shard_dir, exist_ok=True)
+        from utils.job_queue import default_worker_id
+
+        worker_id = args.worker_id or default_worker_id()
+        queue = build_job_queue(config)
+        try:
+            run_worker(config, queue, worker_id, os.path.join(shard_dir, f"{worker_id}.jsonl"), wait=args.wait)
+        finally:
+            save_selector_stats(selector_stats_path)
+        return
+
+    # Only the scraping commands below write output.
     try:
-        exporter = select_exporter(output_format)
+        tee = build_export_tee(config)
     except ValueError as e:
         logging.error(str(e))
         sys.exit(1)
 
-    output_file = config.get("outputFile")
-    if not output_file:
-        ext = output_format
-        base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
-        os.makedirs(base_dir, exist_ok=True)
-        output_file = os.path.join(base_dir, f"sample_output.{ext}")
-        config["outputFile"] = output_file
-
     try:
-        doctors = scrape(config)
-    except Exception as e:
-        logging.exception("Scraping failed: %s", e)
+        profiler = build_profiler(config)
+    except ValueError as e:
+        logging.error(str(e))
         sys.exit(1)
+    budget = build_memory_budget(config, profiler)
 
-    if not doctors:
-        logging.warning("No doctor data to export. Exiting without writing output.")
-        return
+    history = None
+    if args.command in (None, "sweep"):
+        # Seed change history in the same database refresh reads from.
+        from utils.revisit_scheduler import HistoryRecorder
+
+        history = HistoryRecorder(build_revisit_scheduler(config))
+
+    def export(doctor: Doctor) -> None:
+        # Every output gets the record as soon as it is parsed; nothing keeps it after that.
+        with budget.stage("export"):
+            tee.write(doctor)
+        if history is not None:
+            history.observe(doctor.to_dict())
 
     try:
-        exporter(doctors, output_file)
-        logging.info("Exported %d records to %s", len(doctors), output_file)
-    except Exception as e:
-        logging.exception("Failed to export data: %s", e)
-        sys.exit(1)
+        try:
+            if args.command == "collect":
+                for doctor in collect_shards(shard_dir):
+                    export(doctor)
+            elif args.command == "sweep":
+                sweep_records(config, export, budget)
+            elif args.command == "refresh":
+                refresh_records(config, export, budget)
+            else:
+                scrape_records(config, export, budget)
+
+            if history is not None:
+                history.finish()
+        except Exception as e:
+            logging.exception("Scraping failed: %s", e)
+            # Keep the output files valid for whatever was written before the failure.
+            tee.close()
+            sys.exit(1)
+
+        if not tee.count:
+            logging.warning("No doctor data to export. Exiting without writing output.")
+            return
+
+        with budget.stage("export"):
+            failed = tee.close()
+        for path in tee.written():
+            logging.info("Exported %d records to %s", tee.count, path)
+        if failed:
+            logging.error("Failed to export to: %s", ", ".join(failed))
+            sys.exit(1)
+
+        budget.log_report()
+    finally:
+        save_selector_stats(selector_stats_path)
+        if profiler is not None:
+            profiler.finish()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,288 @@
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+class _Missing:
+    """
+    Marker for keys that were absent from the source dict, so that
+    to_dict() can reproduce the original record without inventing keys.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+MISSING: Any = _Missing()
+
+def intern_str(value: Any) -> Any:
+    """
+    Intern short, highly repetitive strings (states, cities, specialties, ...).
+    Non-string values are returned unchanged.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+def _intern_list(values: Any) -> Any:
+    if isinstance(values, list):
+        return tuple(intern_str(v) for v in values)
+    return values
+
+def _as_list(values: Any) -> Any:
+    if isinstance(values, tuple):
+        return list(values)
+    return values
+
+def _canonical_order(data: Dict[str, Any], fields: Tuple[str, ...]) -> bool:
+    """
+    Whether `data` lists the known fields in `fields` order, followed by any
+    other keys: the order to_dict() writes them back in.
+    """
+    keys = list(data)
+    known = [k for k in keys if k in fields]
+    return known == [f for f in fields if f in data] and keys[: len(known)] == known
+
+def _unpack(
+    source: Dict[str, Any], key: str, fields: Tuple[str, ...], extra: Dict[str, Any]
+) -> Optional[Tuple[Any, ...]]:
+    """
+    Split a fixed-shape sub-dict (e.g. name, urls) into a tuple of values.
+    Returns None when the key is absent; anything that does not match the
+    expected shape (including its key order) is kept verbatim in `extra`.
+    """
+    if key not in source:
+        return None
+    value = source[key]
+    if not isinstance(value, dict) or any(k not in fields for k in value) or not _canonical_order(value, fields):
+        extra[key] = value
+        return None
+    return tuple(value.get(f, MISSING) for f in fields)
+
+def _pack(fields: Tuple[str, ...], values: Optional[Tuple[Any, ...]]) -> Any:
+    if values is None:
+        return MISSING
+    return {f: v for f, v in zip(fields, values) if v is not MISSING}
+
+class Location:
+    """
+    Compact practice location record (see parsers.location_parser).
+    """
+
+    __slots__ = ("name", "address", "city", "state", "zip", "phone", "_extra")
+
+    FIELDS = ("name", "address", "city", "state", "zip", "phone")
+
+    def __init__(
+        self,
+        name: Any = None,
+        address: Any = None,
+        city: Any = None,
+        state: Any = None,
+        zip: Any = None,
+        phone: Any = None,
+    ) -> None:
+        self.name = intern_str(name)
+        self.address = address
+        self.city = intern_str(city)
+        self.state = intern_str(state)
+        self.zip = intern_str(zip)
+        self.phone = phone
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Location":
+        loc = cls(*(data.get(f, MISSING) for f in cls.FIELDS))
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS}
+        loc._extra = extra or None
+        return loc
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f: getattr(self, f) for f in self.FIELDS if getattr(self, f) is not MISSING}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+class Review:
+    """
+    Compact patient review record (see parsers.review_parser).
+    """
+
+    __slots__ = ("rating", "text", "date", "_extra")
+
+    FIELDS = ("rating", "text", "date")
+
+    def __init__(self, rating: Any = None, text: Any = None, date: Any = None) -> None:
+        self.rating = intern_str(rating)
+        self.text = text
+        self.date = intern_str(date)
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Review":
+        review = cls(*(data.get(f, MISSING) for f in cls.FIELDS))
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS}
+        review._extra = extra or None
+        return review
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f: getattr(self, f) for f in self.FIELDS if getattr(self, f) is not MISSING}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+_NAME_FIELDS = ("first", "last", "full")
+_EDUCATION_FIELDS = ("graduationYear",)
+_RATINGS_FIELDS = ("averageRating", "reviewCount")
+_URL_FIELDS = ("profile", "appointment", "website")
+
+# Top-level keys in the order they appear in exported output.
+_DOCTOR_KEYS = (
+    "providerid",
+    "name",
+    "gender",
+    "npi",
+    "specialties",
+    "degrees",
+    "education",
+    "photos",
+    "bio",
+    "ratings",
+    "urls",
+    "searchUrl",
+    "location",
+    "insurances",
+    "reviews",
+)
+
+# Key orders seen in source dicts, shared between records.
+_KEY_ORDERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+def _key_order(data: Dict[str, Any]) -> Tuple[str, ...]:
+    order = tuple(data)
+    return _KEY_ORDERS.setdefault(order, order)
+
+class Doctor:
+    """
+    Compact doctor record used by the in-memory stages (scrape, merge, export).
+
+    Nested dicts are flattened into slots, list fields are stored as tuples of
+    interned strings, and to_dict() converts back to the exported dict schema.
+    """
+
+    __slots__ = (
+        "providerid",
+        "name",
+        "gender",
+        "npi",
+        "specialties",
+        "degrees",
+        "education",
+        "photos",
+        "bio",
+        "ratings",
+        "urls",
+        "search_url",
+        "location",
+        "insurances",
+        "reviews",
+        "_extra",
+        "_order",
+    )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Doctor":
+        doctor = cls.__new__(cls)
+        extra: Dict[str, Any] = {}
+
+        doctor.providerid = data.get("providerid", MISSING)
+        doctor.name = _unpack(data, "name", _NAME_FIELDS, extra)
+        doctor.gender = intern_str(data.get("gender", MISSING))
+        doctor.npi = data.get("npi", MISSING)
+        doctor.specialties = _intern_list(data.get("specialties", MISSING))
+        doctor.degrees = _intern_list(data.get("degrees", MISSING))
+        doctor.education = _unpack(data, "education", _EDUCATION_FIELDS, extra)
+        doctor.photos = data.get("photos", MISSING)
+        doctor.bio = data.get("bio", MISSING)
+        doctor.ratings = _unpack(data, "ratings", _RATINGS_FIELDS, extra)
+        doctor.urls = _unpack(data, "urls", _URL_FIELDS, extra)
+        doctor.search_url = intern_str(data.get("searchUrl", MISSING))
+        doctor.insurances = _intern_list(data.get("insurances", MISSING))
+
+        # Dicts whose keys are not in the order to_dict() writes are kept as
+        # they are, so exported output matches the source byte for byte.
+        location = data.get("location", MISSING)
+        if isinstance(location, dict) and _canonical_order(location, Location.FIELDS):
+            location = Location.from_dict(location)
+        doctor.location = location
+
+        reviews = data.get("reviews", MISSING)
+        if isinstance(reviews, list) and all(
+            isinstance(r, dict) and _canonical_order(r, Review.FIELDS) for r in reviews
+        ):
+            reviews = tuple(Review.from_dict(r) for r in reviews)
+        doctor.reviews = reviews
+
+        for key, value in data.items():
+            if key not in _DOCTOR_KEYS:
+                extra[key] = value
+        doctor._extra = extra or None
+        doctor._order = None if _canonical_order(data, _DOCTOR_KEYS) else _key_order(data)
+        return doctor
+
+    @property
+    def profile_url(self) -> Optional[str]:
+        """
+        urls.profile, also when urls was kept as a dict (e.g. read from CSV).
+        """
+        if self.urls is not None:
+            profile = self.urls[0]
+        else:
+            urls = (self._extra or {}).get("urls")
+            profile = urls.get("profile") if isinstance(urls, dict) else None
+        return profile if isinstance(profile, str) else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        extra = self._extra or {}
+        values = {
+            "providerid": self.providerid,
+            "name": _pack(_NAME_FIELDS, self.name),
+            "gender": self.gender,
+            "npi": self.npi,
+            "specialties": _as_list(self.specialties),
+            "degrees": _as_list(self.degrees),
+            "education": _pack(_EDUCATION_FIELDS, self.education),
+            "photos": self.photos,
+            "bio": self.bio,
+            "ratings": _pack(_RATINGS_FIELDS, self.ratings),
+            "urls": _pack(_URL_FIELDS, self.urls),
+            "searchUrl": self.search_url,
+            "location": self.location.to_dict() if isinstance(self.location, Location) else self.location,
+            "insurances": _as_list(self.insurances),
+            "reviews": (
+                [r.to_dict() for r in self.reviews] if isinstance(self.reviews, tuple) else self.reviews
+            ),
+        }
+
+        data: Dict[str, Any] = {}
+        for key in _DOCTOR_KEYS:
+            if key in extra:
+                data[key] = extra[key]
+                continue
+            value = values[key]
+            if value is not MISSING:
+                data[key] = value
+        for key, value in extra.items():
+            if key not in _DOCTOR_KEYS:
+                data[key] = value
+        if self._order is not None:
+            data = {key: data[key] for key in self._order}
+        return data
+
+def as_dict(record: Any) -> Dict[str, Any]:
+    """
+    Convert a record to the exported dict schema. Plain dicts pass through.
+    """
+    if isinstance(record, (Doctor, Location, Review)):
+        return record.to_dict()
+    return record
+
@@ -1,34 +1,58 @@
 import logging
 import re
-from typing import Any, Dict, List, Optional
-from urllib.parse import urljoin
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import urldefrag, urljoin
 
 from bs4 import BeautifulSoup
+from lxml import etree
 
-from utils.data_cleaner import clean_text, safe_int
+from utils import parse_guard, selector_stats
+from utils.data_cleaner import clean_text, normalize_record, safe_int
 
 logger = logging.getLogger(__name__)
 
-def _extract_name(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
-    """
-    Attempt to extract the doctor's name from multiple possible selectors.
-    """
-    name_text: Optional[str] = None
+_GENDER_RE = re.compile(r"gender[:\s]+([A-Za-z]+)")
+_GUID_RE = re.compile(r"[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}", re.IGNORECASE)
+_GUID_BYTES_RE = re.compile(_GUID_RE.pattern.encode("ascii"), re.IGNORECASE)
 
-    # Try common WebMD-style selectors.
-    selectors = [
+# Selector fallbacks, tried in declared order unless one is pinned (see utils.selector_stats).
+_NAME_SELECTORS = selector_stats.chain(
+    "name",
+    [
         "h1[data-qa-id*=doctor-name]",
         "h1[class*=doctor-name]",
         "h1[class*=provider-name]",
         "h1[itemprop=name]",
         "h1",
-    ]
+    ],
+)
+_BIO_SELECTORS = selector_stats.chain(
+    "bio",
+    [
+        "[data-qa-id*=bio]",
+        "[class*=bio]",
+        "[id*=bio]",
+        "section[aria-label*=Bio]",
+    ],
+)
+_PHOTO_SELECTORS = selector_stats.chain(
+    "photos",
+    [
+        "img[alt*=Doctor]",
+        "img[alt*=Profile]",
+        "img[class*=avatar]",
+        "img[class*=headshot]",
+        "img[itemprop=image]",
+    ],
+)
 
-    for sel in selectors:
-        el = soup.select_one(sel)
-        if el and clean_text(el.get_text()):
-            name_text = clean_text(el.get_text())
-            break
+def _extract_name(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
+    """
+    Attempt to extract the doctor's name from multiple possible selectors.
+    """
+    # Try common WebMD-style selectors.
+    el = _NAME_SELECTORS.select(soup, lambda el: clean_text(el.get_text()))
+    name_text = clean_text(el.get_text()) if el else None
 
     if not name_text:
         return {"first": None, "last": None, "full": None}
@@ -49,8 +73,17 @@ def _search_label_value(soup: BeautifulSoup, label_keywords: List[str]) -> Optio
     This is heuristic-based and robust against minor HTML changes.
     """
     lowered_keywords = [kw.lower() for kw in label_keywords]
+    # clean_text only collapses whitespace, so a single-word keyword missing
+    # from the raw node is missing from the cleaned one too.
+    prefilter = all(kw.split() == [kw] for kw in lowered_keywords)
 
     for tag in soup.find_all(text=True):
+        if parse_guard.expired():
+            return None
+        if prefilter:
+            raw = tag.lower()
+            if not any(kw in raw for kw in lowered_keywords):
+                continue
         text = clean_text(tag)
         if not text:
             continue
@@ -59,7 +92,7 @@ def _search_label_value(soup: BeautifulSoup, label_keywords: List[str]) -> Optio
             # Check siblings or parent for value.
             parent = tag.parent
             # Case: "Gender: Female"
-            match = re.search(r"gender[:\s]+([A-Za-z]+)", lower)
+            match = _GENDER_RE.search(lower)
             if match:
                 return clean_text(match.group(1))
 
@@ -101,7 +134,7 @@ def _extract_npi(soup: BeautifulSoup) -> Optional[str]:
         return clean_text(npi_el.get("data-npi"))
 
     # Fallback: text search
-    text = clean_text(soup.get_text(" "))
+    text = parse_guard.limit_text(clean_text(soup.get_text(" "))) or ""
     match = re.search(r"\bNPI[:\s]+(\d{8,15})\b", text, re.IGNORECASE)
     if match:
         return match.group(1)
@@ -162,7 +195,7 @@ def _extract_degrees(soup: BeautifulSoup) -> List[str]:
 
 def _extract_education(soup: BeautifulSoup) -> Dict[str, Any]:
     education: Dict[str, Any] = {}
-    text = clean_text(soup.get_text(" ")) or ""
+    text = parse_guard.limit_text(clean_text(soup.get_text(" "))) or ""
 
     year_match = re.search(r"\b(19|20)\d{2}\b", text)
     if year_match:
@@ -171,18 +204,9 @@ def _extract_education(soup: BeautifulSoup) -> Dict[str, Any]:
 
 def _extract_bio(soup: BeautifulSoup) -> Optional[str]:
     # Find a section that looks like biography
-    selectors = [
-        "[data-qa-id*=bio]",
-        "[class*=bio]",
-        "[id*=bio]",
-        "section[aria-label*=Bio]",
-    ]
-    for sel in selectors:
-        el = soup.select_one(sel)
-        if el:
-            text = clean_text(el.get_text(" "))
-            if text:
-                return text
+    el = _BIO_SELECTORS.select(soup, lambda el: clean_text(el.get_text(" ")))
+    if el:
+        return clean_text(el.get_text(" "))
 
     # Fallback: first paragraph under main content
     main = soup.find("main") or soup.body
@@ -200,6 +224,8 @@ def _extract_ratings(soup: BeautifulSoup) -> Dict[str, Any]:
     # Look for overall rating
     overall = None
     for el in soup.select("[data-qa-id*=overall-rating], [class*=overall-rating], [class*=rating]"):
+        if parse_guard.expired():
+            break
         text = clean_text(el.get_text(" "))
         if not text:
             continue
@@ -219,7 +245,7 @@ def _extract_ratings(soup: BeautifulSoup) -> Dict[str, Any]:
         ratings["averageRating"] = overall
 
     # Review count
-    text = clean_text(soup.get_text(" "))
+    text = parse_guard.limit_text(clean_text(soup.get_text(" "))) or ""
     match = re.search(r"(\d+)\s+Reviews?", text, re.IGNORECASE)
     if match:
         ratings["reviewCount"] = safe_int(match.group(1))
@@ -228,24 +254,16 @@ def _extract_ratings(soup: BeautifulSoup) -> Dict[str, Any]:
 
 def _extract_photos(soup: BeautifulSoup) -> Optional[str]:
     # Try dedicated avatar/headshot image
-    selectors = [
-        "img[alt*=Doctor]",
-        "img[alt*=Profile]",
-        "img[class*=avatar]",
-        "img[class*=headshot]",
-        "img[itemprop=image]",
-    ]
-    for sel in selectors:
-        img = soup.select_one(sel)
-        if img and img.get("src"):
-            return img["src"]
-    return None
+    img = _PHOTO_SELECTORS.select(soup, lambda img: img.get("src"))
+    return img["src"] if img else None
 
 def _extract_urls(profile_url: str, soup: BeautifulSoup) -> Dict[str, Optional[str]]:
     urls: Dict[str, Optional[str]] = {"profile": profile_url, "appointment": None, "website": None}
 
     # Appointment links often contain specific phrases
     for a in soup.find_all("a", href=True):
+        if parse_guard.expired():
+            break
         text = clean_text(a.get_text(" ")) or ""
         href = a["href"]
         if "appointment" in text.lower() or "book" in text.lower():
@@ -255,7 +273,7 @@ def _extract_urls(profile_url: str, soup: BeautifulSoup) -> Dict[str, Optional[s
 
     return urls
 
-def _extract_provider_id(soup: BeautifulSoup, profile_url: str) -> Optional[str]:
+def _extract_provider_id(soup: BeautifulSoup, profile_url: str, raw_html: Optional[bytes] = None) -> Optional[str]:
     # Data attribute
     el = soup.find(attrs={"data-provider-id": True})
     if el:
@@ -266,62 +284,144 @@ def _extract_provider_id(soup: BeautifulSoup, profile_url: str) -> Optional[str]
     if meta and meta.get("content"):
         return clean_text(meta["content"])
 
-    # Fallback: GUID-like substring in the HTML
-    html = soup.decode()
-    match = re.search(
-        r"[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}", html, re.IGNORECASE
-    )
+    # Fallback: GUID-like substring in the HTML. Scan the page as fetched when
+    # we have it; re-serializing the tree costs more than the scan itself.
+    if raw_html is not None:
+        match = _GUID_BYTES_RE.search(raw_html)
+        if match:
+            return match.group(0).decode("ascii")
+        return None
+
+    match = _GUID_RE.search(parse_guard.limit_text(soup.decode()) or "")
     if match:
         return match.group(0)
 
     # As a last resort, use hashed URL (not ideal but deterministic)
     return None
 
-def parse_search_results(html: str, base_url: Optional[str] = None) -> List[str]:
+# Search pages are fed to the link extractor in chunks of this many characters.
+SEARCH_FEED_CHUNK = 64 * 1024
+
+class _ProfileLinkTarget:
     """
-    Parse the search results page and return a list of doctor profile URLs.
+    lxml parser target that only looks at <a href> start tags.
+    No tree is built; matching hrefs are queued until the caller drains them.
     """
-    soup = BeautifulSoup(html, "lxml")
-    urls: List[str] = []
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if not href:
-            continue
+    def __init__(self) -> None:
+        self.hrefs: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == "a":
+            href = attrib.get("href")
+            # Heuristic: WebMD doctor profile URLs usually contain '/doctor/'.
+            if href and "/doctor/" in href:
+                self.hrefs.append(href)
+
+    def end(self, tag: str) -> None:
+        pass
+
+    def data(self, data: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+def _iter_chunks(html: Union[str, bytes, Iterable[Any]], size: int) -> Iterator[Any]:
+    if isinstance(html, (str, bytes)):
+        for start in range(0, len(html), size):
+            yield html[start:start + size]
+    else:
+        yield from html
+
+def iter_profile_urls(
+    html: Union[str, bytes, Iterable[Any]],
+    base_url: Optional[str] = None,
+    limit: Optional[int] = None,
+    encoding: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Stream canonical, de-duplicated doctor profile URLs out of a search page.
 
-        # Heuristic: WebMD doctor profile URLs usually contain '/doctor/'.
-        if "/doctor/" in href:
-            full_url = urljoin(base_url, href) if base_url else href
-            urls.append(full_url)
+    `html` may be the whole page or an iterable of str/bytes chunks (e.g. raw
+    bytes straight off the socket, with `encoding` taken from Content-Type).
+    Parsing stops as soon as `limit` URLs have been produced.
+    """
+    if limit is not None and limit <= 0:
+        return
 
-    # Deduplicate
+    target = _ProfileLinkTarget()
+    parser = etree.HTMLParser(target=target, encoding=encoding)
     seen = set()
-    unique: List[str] = []
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            unique.append(u)
 
+    def drain() -> Iterator[str]:
+        for href in target.hrefs:
+            full_url = urldefrag(urljoin(base_url, href) if base_url else href)[0]
+            if full_url not in seen:
+                seen.add(full_url)
+                yield full_url
+        target.hrefs.clear()
+
+    for chunk in _iter_chunks(html, SEARCH_FEED_CHUNK):
+        if not chunk:
+            continue
+        parser.feed(chunk)
+        for url in drain():
+            yield url
+            if limit is not None and len(seen) >= limit:
+                return
+
+    # Flush anything still buffered in the parser.
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    for url in drain():
+        yield url
+        if limit is not None and len(seen) >= limit:
+            return
+
+def parse_search_results(
+    html: Union[str, bytes, Iterable[Any]],
+    base_url: Optional[str] = None,
+    max_items: Optional[int] = None,
+    encoding: Optional[str] = None,
+) -> List[str]:
+    """
+    Parse the search results page and return a list of doctor profile URLs,
+    stopping early once max_items unique URLs have been found.
+    """
+    unique = list(iter_profile_urls(html, base_url=base_url, limit=max_items, encoding=encoding))
     logger.debug("Extracted %d unique profile URLs from search results.", len(unique))
     return unique
 
-def parse_doctor_profile(soup: BeautifulSoup, profile_url: str) -> Dict[str, Any]:
+def parse_doctor_profile(
+    soup: BeautifulSoup,
+    profile_url: str,
+    guard: Optional[parse_guard.ParseGuard] = None,
+    raw_html: Optional[bytes] = None,
+) -> Dict[str, Any]:
     """
     Parse a doctor profile page and return a dictionary with core doctor fields.
 
+    Each extractor runs under `guard`; one that fails or runs out of time
+    leaves its field empty and is listed in guard.reasons.
     Location, insurances, and reviews are parsed in their respective parser modules.
     """
-    name = _extract_name(soup)
-    gender = _extract_gender(soup)
-    npi = _extract_npi(soup)
-    specialties = _extract_specialties(soup)
-    degrees = _extract_degrees(soup)
-    education = _extract_education(soup)
-    bio = _extract_bio(soup)
-    ratings = _extract_ratings(soup)
-    photos = _extract_photos(soup)
-    urls = _extract_urls(profile_url, soup)
-    providerid = _extract_provider_id(soup, profile_url)
+    guard = guard or parse_guard.ParseGuard()
+    empty_name: Dict[str, Optional[str]] = {"first": None, "last": None, "full": None}
+
+    name = guard.run("name", _extract_name, empty_name, soup)
+    gender = guard.run("gender", _extract_gender, None, soup)
+    npi = guard.run("npi", _extract_npi, None, soup)
+    specialties = guard.run("specialties", _extract_specialties, [], soup)
+    degrees = guard.run("degrees", _extract_degrees, [], soup)
+    education = guard.run("education", _extract_education, {}, soup)
+    bio = guard.run("bio", _extract_bio, None, soup)
+    ratings = guard.run("ratings", _extract_ratings, {}, soup)
+    photos = guard.run("photos", _extract_photos, None, soup)
+    urls = guard.run("urls", _extract_urls, {"profile": profile_url, "appointment": None, "website": None}, profile_url, soup)
+    providerid = guard.run("providerid", _extract_provider_id, None, soup, profile_url, raw_html)
 
     doctor: Dict[str, Any] = {
         "providerid": providerid,
@@ -336,6 +436,9 @@ def parse_doctor_profile(soup: BeautifulSoup, profile_url: str) -> Dict[str, Any
         "ratings": ratings,
         "urls": urls,
     }
+    # Extractors clean what they match on; this catches the rest (attribute
+    # values, fallbacks) in one pass.
+    doctor = normalize_record(doctor)
 
     logger.debug("Parsed doctor profile for %s: %s", profile_url, doctor)
     return doctor
\ No newline at end of file
@@ -3,10 +3,22 @@ from typing import Any, Dict, List, Optional
 
 from bs4 import BeautifulSoup
 
-from utils.data_cleaner import clean_text
+from utils import parse_guard, selector_stats
+from utils.data_cleaner import clean_text, find_phone
 
 logger = logging.getLogger(__name__)
 
+_LOCATION_SELECTORS = selector_stats.chain(
+    "location",
+    [
+        "[data-qa-id*=location-card]",
+        "[class*=location-card]",
+        "[class*=practice-location]",
+        "[class*=office-location]",
+        "section[aria-label*=Location]",
+    ],
+)
+
 def _extract_text_lines(container: Optional[BeautifulSoup]) -> List[str]:
     if not container:
         return []
@@ -29,18 +41,7 @@ def parse_primary_location(soup: BeautifulSoup) -> Dict[str, Any]:
     }
 
     # Heuristic: use the first address-like block.
-    container = None
-    selectors = [
-        "[data-qa-id*=location-card]",
-        "[class*=location-card]",
-        "[class*=practice-location]",
-        "[class*=office-location]",
-        "section[aria-label*=Location]",
-    ]
-    for sel in selectors:
-        container = soup.select_one(sel)
-        if container:
-            break
+    container = _LOCATION_SELECTORS.select(soup)
 
     if not container:
         # Fallback: first address tag
@@ -80,16 +81,11 @@ def parse_primary_location(soup: BeautifulSoup) -> Dict[str, Any]:
             location["address"] = " ".join(lines[1:])
 
     # Phone number search within container
-    text_full = " ".join(lines)
-    for token in text_full.split():
-        digits = "".join(ch for ch in token if ch.isdigit())
-        if len(digits) >= 10:
-            location["phone"] = token
-            break
+    location["phone"] = find_phone(" ".join(lines))
 
     return location
 
-def parse_insurances(soup: BeautifulSoup) -> List[str]:
+def parse_insurances(soup: BeautifulSoup, max_insurances: Optional[int] = None) -> List[str]:
     """
     Parse accepted insurance providers from the profile page soup.
     Returns a list of insurance provider names.
@@ -99,6 +95,8 @@ def parse_insurances(soup: BeautifulSoup) -> List[str]:
     # Look for a section labeled as insurance
     containers = []
     for heading in soup.find_all(["h2", "h3", "h4"]):
+        if parse_guard.expired():
+            break
         text = clean_text(heading.get_text(" "))
         if not text:
             continue
@@ -113,6 +111,8 @@ def parse_insurances(soup: BeautifulSoup) -> List[str]:
         containers = soup.select("[class*=insurance]")
 
     for container in containers:
+        if parse_guard.expired():
+            break
         # List items first
         for li in container.find_all("li"):
             text = clean_text(li.get_text(" "))
@@ -134,6 +134,8 @@ def parse_insurances(soup: BeautifulSoup) -> List[str]:
         if ins not in seen:
             seen.add(ins)
             unique.append(ins)
+            if max_insurances is not None and len(unique) >= max_insurances:
+                break
 
     logger.debug("Parsed %d unique insurance providers.", len(unique))
     return unique
\ No newline at end of file
@@ -3,7 +3,8 @@ from typing import Any, Dict, List, Optional
 
 from bs4 import BeautifulSoup
 
-from utils.data_cleaner import clean_text, parse_date
+from utils import parse_guard
+from utils.data_cleaner import clean_text, clean_texts, normalize_records
 
 logger = logging.getLogger(__name__)
 
@@ -29,8 +30,7 @@ def _extract_text(block: BeautifulSoup) -> Optional[str]:
     # Prefer paragraph-level text.
     paragraphs = block.find_all("p")
     if paragraphs:
-        texts = [clean_text(p.get_text(" ")) for p in paragraphs]
-        texts = [t for t in texts if t]
+        texts = [t for t in clean_texts(p.get_text(" ") for p in paragraphs) if t]
         if texts:
             return " ".join(texts)
 
@@ -39,15 +39,13 @@ def _extract_text(block: BeautifulSoup) -> Optional[str]:
         return text
     return None
 
-def _extract_date(block: BeautifulSoup) -> Optional[str]:
-    # Look for a small, muted, or date-like span
+def _date_text(block: BeautifulSoup) -> Optional[str]:
+    # Look for a small, muted, or date-like span. parse_date keeps text it
+    # cannot parse, so the first non-empty one is the date.
     for el in block.find_all(["span", "time"]):
         text = clean_text(el.get_text(" "))
-        if not text:
-            continue
-        parsed = parse_date(text)
-        if parsed:
-            return parsed
+        if text:
+            return text
     return None
 
 def parse_reviews(soup: BeautifulSoup, max_reviews: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -64,22 +62,31 @@ def parse_reviews(soup: BeautifulSoup, max_reviews: Optional[int] = None) -> Lis
         candidates = soup.find_all("article")
 
     for block in candidates:
+        # Nested review wrappers make this loop quadratic in the page size;
+        # keep what we have once the guard runs out of time or text budget.
+        if parse_guard.expired():
+            break
         text = _extract_text(block)
         if not text:
             continue
+        if not parse_guard.charge(len(text)):
+            break
 
         rating = _extract_rating(block)
-        date_str = _extract_date(block)
 
         review: Dict[str, Any] = {
             "rating": rating,
             "text": text,
-            "date": date_str,
+            "date": _date_text(block),
         }
         reviews.append(review)
 
         if max_reviews is not None and len(reviews) >= max_reviews:
             break
 
+    # Normalize the page's reviews as one batch; most pages repeat a
+    # handful of dates.
+    reviews = normalize_records(reviews)
+
     logger.debug("Parsed %d reviews from profile page.", len(reviews))
     return reviews
\ No newline at end of file
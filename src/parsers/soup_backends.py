@@ -0,0 +1,17 @@
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+def lxml_soup(body: bytes, charset: Optional[str] = None) -> BeautifulSoup:
+    """
+    Build a soup with lxml. Raw bytes go straight to libxml2, which handles
+    decoding (from `charset` or the page's own meta tag).
+    """
+    return BeautifulSoup(body, "lxml", from_encoding=charset)
+
+def stdlib_soup(body: bytes, charset: Optional[str] = None) -> BeautifulSoup:
+    """
+    Build a soup with Python's html.parser. Slower, but has no C dependency
+    and is more lenient with some badly broken markup.
+    """
+    return BeautifulSoup(body, "html.parser", from_encoding=charset)
@@ -0,0 +1,428 @@
+import itertools
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from utils.memory_budget import MemoryBudget
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after ttl seconds.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored, value = entry
+            if time.time() - stored > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+def validate_spec(spec: Any) -> None:
+    """
+    Raise ValueError unless spec is a job object the daemon can run.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("A job must be a JSON object.")
+    if not spec.get("searchUrl") and not spec.get("profileUrls"):
+        raise ValueError("A job needs searchUrl and/or profileUrls.")
+    if spec.get("searchUrl") is not None and not isinstance(spec["searchUrl"], str):
+        raise ValueError("searchUrl must be a string.")
+    profile_urls = spec.get("profileUrls")
+    if profile_urls is not None and (
+        not isinstance(profile_urls, list) or not all(isinstance(url, str) for url in profile_urls)
+    ):
+        raise ValueError("profileUrls must be a list of strings.")
+    max_items = spec.get("maxItems")
+    if max_items is not None and (not isinstance(max_items, int) or isinstance(max_items, bool) or max_items <= 0):
+        raise ValueError("maxItems must be a positive integer.")
+
+class Job:
+    """
+    One scrape request: a search URL and/or explicit profile URLs.
+    Results are kept as exported dicts so they can be streamed to clients.
+    """
+
+    def __init__(self, job_id: str, spec: Dict[str, Any], default_max_items: int) -> None:
+        self.id = job_id
+        self.search_url: Optional[str] = spec.get("searchUrl")
+        self.max_items = spec.get("maxItems") or default_max_items
+        self.state = QUEUED
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.results: List[Dict[str, Any]] = []
+        self.failed = 0
+        self.total = 0
+        self.in_flight = 0
+        # Tasks are ("search", url, None) or ("profile", url, search_url).
+        self.pending: Deque[Tuple[str, str, Optional[str]]] = deque()
+
+        if self.search_url:
+            self.pending.append(("search", self.search_url, None))
+        for url in spec.get("profileUrls") or []:
+            self.pending.append(("profile", url, self.search_url))
+            self.total += 1
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "searchUrl": self.search_url,
+            "profiles": self.total,
+            "completed": len(self.results),
+            "failed": self.failed,
+            "error": self.error,
+            "elapsedSeconds": round((self.finished or time.time()) - self.created, 3),
+        }
+
+class ScrapeDaemon:
+    """
+    Long-running scraper holding warm HTTP sessions, parser modules and
+    result caches. Jobs share a fixed pool of fetch threads; each free thread
+    takes the next task from the jobs in round-robin order, so a large job
+    cannot starve small ones. Every thread gets its request handler from
+    handler_factory: a new one per thread for backends whose sessions are
+    not thread-safe, or one shared instance for backends that multiplex
+    concurrent requests (see main.daemon_handler_factory).
+
+    With a memory budget, a thread does not take its next task while RSS
+    is over the budget; it keeps waiting (tasks are not failed) until
+    memory is released or the daemon stops.
+    """
+
+    def __init__(
+        self,
+        handler_factory: Callable[[], Any],
+        search_fn: Callable[[Any, str, int], List[str]],
+        profile_fn: Callable[[Any, str, Optional[str]], Any],
+        workers: int = 4,
+        default_max_items: int = 50,
+        cache_ttl: float = 3600,
+        cache_entries: int = 10000,
+        keep_finished: int = 100,
+        budget: Optional["MemoryBudget"] = None,
+    ) -> None:
+        self.handler_factory = handler_factory
+        self.budget = budget
+        self.search_fn = search_fn
+        self.profile_fn = profile_fn
+        self.default_max_items = default_max_items
+        self.keep_finished = keep_finished
+        self.search_cache = TTLCache(cache_entries, cache_ttl)
+        self.profile_cache = TTLCache(cache_entries, cache_ttl)
+
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._rr = 0
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"fetch-{n}", daemon=True) for n in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    # Job API
+
+    def submit(self, spec: Dict[str, Any]) -> Job:
+        validate_spec(spec)
+        with self._cond:
+            job = Job(str(next(self._ids)), spec, self.default_max_items)
+            self.jobs[job.id] = job
+            self._prune()
+            self._cond.notify_all()
+        logger.info("Job %s submitted: %s", job.id, job.search_url or f"{job.total} profiles")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job and not job.is_finished:
+                job.pending.clear()
+                self._finish(job, CANCELLED)
+            return job
+
+    def iter_results(self, job: Job, start: int = 0, timeout: Optional[float] = None):
+        """
+        Yield the job's results from index `start` as they are produced,
+        until the job finishes (or no result arrives within timeout).
+        """
+        index = start
+        while True:
+            with self._cond:
+                while index >= len(job.results) and not job.is_finished:
+                    if not self._cond.wait(timeout):
+                        return
+                batch = job.results[index:]
+                finished = job.is_finished
+            for record in batch:
+                yield record
+            index += len(batch)
+            if finished and index >= len(job.results):
+                return
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    # Scheduling
+
+    def _prune(self) -> None:
+        finished = [j for j in self.jobs.values() if j.is_finished]
+        for job in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.id]
+
+    def _finish(self, job: Job, state: str, error: Optional[str] = None) -> None:
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        self._cond.notify_all()
+        logger.info("Job %s %s: %s", job.id, state, job.status())
+
+    def _next_task(self) -> Optional[Tuple[Job, Tuple[str, str, Optional[str]]]]:
+        active = [j for j in self.jobs.values() if j.pending]
+        if not active:
+            return None
+        job = active[self._rr % len(active)]
+        self._rr += 1
+        job.state = RUNNING
+        job.in_flight += 1
+        return job, job.pending.popleft()
+
+    def _wait_for_memory(self) -> None:
+        if self.budget is None:
+            return
+        while not self.budget.wait_for_headroom():
+            if self._stopping:
+                return
+            logger.error("Memory budget still exceeded; %s keeps waiting.", threading.current_thread().name)
+
+    def _work(self) -> None:
+        handler = self.handler_factory()
+        while True:
+            self._wait_for_memory()
+            with self._cond:
+                item = self._next_task()
+                while item is None:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                    item = self._next_task()
+            job, (kind, url, search_url) = item
+
+            try:
+                if kind == "search":
+                    self._run_search(handler, job, url)
+                else:
+                    self._run_profile(handler, job, url, search_url)
+            except Exception as e:
+                logger.exception("Job %s task %s failed: %s", job.id, url, e)
+                with self._cond:
+                    if kind == "search":
+                        job.error = str(e)
+                    else:
+                        job.failed += 1
+
+            with self._cond:
+                job.in_flight -= 1
+                if not job.is_finished and not job.pending and job.in_flight == 0:
+                    if job.error and not job.results:
+                        self._finish(job, FAILED, job.error)
+                    else:
+                        self._finish(job, DONE, job.error)
+                self._cond.notify_all()
+
+    def _run_search(self, handler: Any, job: Job, url: str) -> None:
+        key = f"{job.max_items}:{url}"
+        profile_urls = self.search_cache.get(key)
+        if profile_urls is None:
+            profile_urls = self.search_fn(handler, url, job.max_items)
+            self.search_cache.put(key, profile_urls)
+        with self._cond:
+            if job.is_finished:
+                return
+            for profile_url in profile_urls:
+                job.pending.append(("profile", profile_url, url))
+            job.total += len(profile_urls)
+            self._cond.notify_all()
+
+    def _run_profile(self, handler: Any, job: Job, url: str, search_url: Optional[str]) -> None:
+        if job.is_finished:
+            return
+        doctor = self.profile_cache.get(url)
+        if doctor is None:
+            doctor = self.profile_fn(handler, url, search_url)
+            if doctor is not None:
+                self.profile_cache.put(url, doctor)
+
+        with self._cond:
+            if doctor is None:
+                job.failed += 1
+                return
+            if job.is_finished:
+                return
+            record = doctor.to_dict()
+            record["searchUrl"] = search_url
+            job.results.append(record)
+            self._cond.notify_all()
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """
+    Local job API:
+
+        POST   /jobs                 submit {"searchUrl", "maxItems", "profileUrls"}
+        GET    /jobs                 list job statuses
+        GET    /jobs/<id>            job status
+        GET    /jobs/<id>/results    stream results as JSON Lines (?from=N to resume)
+        DELETE /jobs/<id>            cancel
+    """
+
+    daemon: ScrapeDaemon = None  # set by serve()
+    server_version = "webmd-scraper-daemon"
+
+    def address_string(self) -> str:
+        # Unix socket peers have no host address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> Tuple[List[str], Dict[str, str]]:
+        path, _, query = self.path.partition("?")
+        params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+        return [p for p in path.split("/") if p], params
+
+    def do_POST(self) -> None:
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            return self._send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            job = self.daemon.submit(spec)
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(202, job.status())
+
+    def do_GET(self) -> None:
+        parts, params = self._route()
+        if parts == ["jobs"]:
+            return self._send_json(200, [job.status() for job in list(self.daemon.jobs.values())])
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._send_json(404, {"error": "not found"})
+
+        job = self.daemon.get(parts[1])
+        if job is None:
+            return self._send_json(404, {"error": "no such job"})
+        if len(parts) == 2:
+            return self._send_json(200, job.status())
+        if parts[2:] != ["results"]:
+            return self._send_json(404, {"error": "not found"})
+
+        try:
+            start = int(params.get("from", 0))
+        except ValueError:
+            return self._send_json(400, {"error": "from must be an integer"})
+        if start < 0:
+            return self._send_json(400, {"error": "from must not be negative"})
+
+        # HTTP/1.0 response without Content-Length: the stream ends when we close.
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for record in self.daemon.iter_results(job, start=start):
+                self.wfile.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Client disconnected from job %s results stream.", job.id)
+
+    def do_DELETE(self) -> None:
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._send_json(404, {"error": "not found"})
+        job = self.daemon.cancel(parts[1])
+        if job is None:
+            return self._send_json(404, {"error": "no such job"})
+        self._send_json(200, job.status())
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+def serve(daemon: ScrapeDaemon, host: str = "127.0.0.1", port: int = 8642, socket_path: Optional[str] = None) -> None:
+    """
+    Serve the job API on a local TCP port, or on a Unix socket if socket_path is given.
+    Blocks until interrupted.
+    """
+    handler_cls = type("ApiHandler", (_ApiHandler,), {"daemon": daemon})
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, handler_cls)
+        where = socket_path
+    else:
+        server = ThreadingHTTPServer((host, port), handler_cls)
+        where = f"http://{host}:{server.server_address[1]}"
+
+    logger.info("Scrape daemon listening on %s", where)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down daemon.")
+    finally:
+        daemon.stop()
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
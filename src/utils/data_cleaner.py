@@ -1,47 +1,203 @@
 import logging
 import re
 from datetime import datetime
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Distinct date strings remembered by parse_date. Review dates repeat a lot
+# within and across pages, and most spans tried as dates are not dates at all.
+DATE_CACHE_SIZE = 4096
+
+_DATE_FORMATS = [
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%Y-%m-%d",
+    "%b %d, %Y",
+    "%B %d, %Y",
+]
+
+# One pattern for every format above; the matching group picks the format.
+# Shapes strptime would also accept but these do not (e.g. a space-padded
+# day) fall through to the strptime loop, so results never differ.
+_DATE_RE = re.compile(
+    r"(?P<m>[0-9]{1,2})/(?P<d>[0-9]{1,2})/(?:(?P<Y>[0-9]{4})|(?P<y>[0-9]{2}))"
+    r"|(?P<iY>[0-9]{4})-(?P<im>[0-9]{1,2})-(?P<id>[0-9]{1,2})"
+    r"|(?P<month>[A-Za-z]+)\s+(?P<nd>[0-9]{1,2}),\s+(?P<nY>[0-9]{4})"
+)
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [
+            ("jan", "january"),
+            ("feb", "february"),
+            ("mar", "march"),
+            ("apr", "april"),
+            ("may",),
+            ("jun", "june"),
+            ("jul", "july"),
+            ("aug", "august"),
+            ("sep", "september"),
+            ("oct", "october"),
+            ("nov", "november"),
+            ("dec", "december"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+# A whitespace-delimited token with at least ten digits in it.
+_PHONE_RE = re.compile(r"(?<!\S)(?=(?:[^\s\d]*\d){10})\S+")
+
 def clean_text(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", value).strip()
+    # Normalize whitespace. str.split() splits on exactly the characters
+    # re's \s matches, without the regex machinery.
+    text = " ".join(value.split())
     return text or None
 
+def clean_texts(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """
+    clean_text over a batch, cleaning each distinct value once.
+    """
+    values = list(values)
+    cleaned = {value: clean_text(value) for value in dict.fromkeys(values)}
+    return [cleaned[value] for value in values]
+
 def safe_int(value: Any) -> Optional[int]:
     try:
         return int(str(value))
     except (TypeError, ValueError):
         return None
 
+def _format_date(year: int, month: int, day: int) -> str:
+    dt = datetime(year, month, day)
+    if year >= 1000:
+        return f"{month}/{day}/{year}"
+    return dt.strftime("%-m/%-d/%Y")
+
+def _match_date(text: str) -> Optional[str]:
+    match = _DATE_RE.fullmatch(text)
+    if match is None:
+        return None
+    groups = match.groupdict()
+    if groups["m"] is not None:
+        if groups["Y"] is not None:
+            year = int(groups["Y"])
+        else:
+            # strptime's %y pivot: 69-99 -> 1900s, 00-68 -> 2000s.
+            short = int(groups["y"])
+            year = short + (1900 if short >= 69 else 2000)
+        return _format_date(year, int(groups["m"]), int(groups["d"]))
+    if groups["iY"] is not None:
+        return _format_date(int(groups["iY"]), int(groups["im"]), int(groups["id"]))
+    month = _MONTHS.get(groups["month"].lower())
+    if month is None:
+        return None
+    return _format_date(int(groups["nY"]), month, int(groups["nd"]))
+
+def _strptime_date(text: str) -> Optional[str]:
+    if "/" not in text and "-" not in text and "," not in text:
+        # Every format has one of these; skip five failing strptime calls.
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            dt = datetime.strptime(text, fmt)
+            return dt.strftime("%-m/%-d/%Y") if hasattr(dt, "strftime") else dt.strftime("%m/%d/%Y")
+        except ValueError:
+            continue
+    return None
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(text: str) -> str:
+    try:
+        parsed = _match_date(text)
+    except ValueError:
+        # Matched a shape but not a real date (e.g. 2/30/2024); let strptime decide.
+        parsed = None
+    if parsed is None:
+        parsed = _strptime_date(text)
+    if parsed is None:
+        # As a very loose fallback, return the original string
+        logger.debug("Could not parse date '%s'; returning unmodified.", text)
+        return text
+    return parsed
+
 def parse_date(value: Optional[str]) -> Optional[str]:
     """
     Parse various human-friendly date strings and normalize them to MM/DD/YYYY.
-    If parsing fails, returns None.
+    Empty values give None; text that is not a recognised date is returned
+    stripped but otherwise unchanged.
     """
     if not value:
         return None
     text = value.strip()
+    if not text:
+        return text
+    return _parse_date(str(text))
 
-    # Try common patterns
-    formats = [
-        "%m/%d/%Y",
-        "%m/%d/%y",
-        "%Y-%m-%d",
-        "%b %d, %Y",
-        "%B %d, %Y",
-    ]
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(text, fmt)
-            return dt.strftime("%-m/%-d/%Y") if hasattr(dt, "strftime") else dt.strftime("%m/%d/%Y")
-        except ValueError:
-            continue
+def parse_dates(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """
+    parse_date over a batch, parsing each distinct value once.
+    """
+    values = list(values)
+    parsed = {value: parse_date(value) for value in dict.fromkeys(values)}
+    return [parsed[value] for value in values]
 
-    # As a very loose fallback, return the original string
-    logger.debug("Could not parse date '%s'; returning unmodified.", value)
-    return text
\ No newline at end of file
+def find_phone(text: Optional[str]) -> Optional[str]:
+    """
+    First whitespace-delimited token containing at least ten digits.
+    """
+    if not text:
+        return None
+    if text.isascii():
+        match = _PHONE_RE.search(text)
+        return match.group(0) if match else None
+    # str.isdigit() also accepts digits outside \d (superscripts, circled digits).
+    for token in text.split():
+        if sum(ch.isdigit() for ch in token) >= 10:
+            return token
+    return None
+
+def normalize_records(
+    records: Iterable[Dict[str, Any]], date_fields: Sequence[str] = ("date",)
+) -> List[Dict[str, Any]]:
+    """
+    Normalize a batch of parsed records in one pass: whitespace in every
+    string field (nested dicts and lists included; empty strings become
+    None), then every value under a key in `date_fields` at any depth
+    through parse_date. Each distinct string and date in the batch is
+    handled once. Returns new dicts.
+    """
+    strings: Dict[str, Optional[str]] = {}
+    dated: List[Tuple[Dict[str, Any], str]] = []
+
+    def clean(value: Any) -> Any:
+        if isinstance(value, str):
+            if value not in strings:
+                strings[value] = clean_text(value)
+            return strings[value]
+        if isinstance(value, dict):
+            cleaned = {key: clean(item) for key, item in value.items()}
+            for field in date_fields:
+                if isinstance(cleaned.get(field), str):
+                    dated.append((cleaned, field))
+            return cleaned
+        if isinstance(value, list):
+            return [clean(item) for item in value]
+        return value
+
+    normalized = [clean(record) for record in records]
+    for (record, field), date in zip(dated, parse_dates(record[field] for record, field in dated)):
+        record[field] = date
+    return normalized
+
+def normalize_record(record: Dict[str, Any], date_fields: Sequence[str] = ("date",)) -> Dict[str, Any]:
+    """
+    normalize_records for a single record.
+    """
+    return normalize_records([record], date_fields)[0]
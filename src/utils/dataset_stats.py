@@ -0,0 +1,394 @@
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from exporters.readers import iter_records
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+# Review-count histogram bucket edges; the last bucket is open-ended.
+REVIEW_COUNT_EDGES = (0, 1, 5, 10, 25, 50, 100, 250)
+
+NUMERIC_FIELDS = ("averageRating", "reviewCount", "graduationYear")
+
+# Rows are converted to NumPy arrays in batches of this size.
+BATCH_ROWS = 65536
+
+class _Codes:
+    """
+    Maps category labels to dense integer codes in order of first appearance.
+    Missing labels (None or "") get -1.
+    """
+
+    def __init__(self) -> None:
+        self.index: Dict[Optional[str], int] = {None: -1, "": -1}
+        self.labels: List[str] = []
+
+    def encode(self, values: List[Optional[str]]) -> np.ndarray:
+        index = self.index
+        for label in dict.fromkeys(values):
+            if label not in index:
+                index[label] = len(self.labels)
+                self.labels.append(label)
+        return np.fromiter(map(index.__getitem__, values), dtype=np.intc, count=len(values))
+
+def _number(value: Any) -> float:
+    if value is None or value == "":
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+def _floats(values: List[Any]) -> np.ndarray:
+    try:
+        # Numbers, numeric strings and None (as NaN) convert in one call.
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.fromiter(map(_number, values), dtype=np.float64, count=len(values))
+
+class DatasetColumns:
+    """
+    Doctor records held column-wise: numeric fields as float64 (NaN when
+    missing), single-valued categories as integer codes (-1 when missing) and
+    multi-valued categories as parallel (row, code) arrays.
+
+    append() only stores raw values in lists; every BATCH_ROWS rows they are
+    converted and encoded in bulk, so per-record work stays a few list
+    appends. Call finish() before reading the arrays.
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.partial = 0
+        self.states = _Codes()
+        self.genders = _Codes()
+        self.specialties = _Codes()
+        self.insurances = _Codes()
+        self.arrays: Dict[str, np.ndarray] = {}
+        self._chunks: Dict[str, List[np.ndarray]] = defaultdict(list)
+
+        self._rating: List[Any] = []
+        self._review_count: List[Any] = []
+        self._graduation_year: List[Any] = []
+        self._state: List[Optional[str]] = []
+        self._gender: List[Optional[str]] = []
+        self._specialties: List[str] = []
+        self._specialty_counts: List[int] = []
+        self._insurances: List[str] = []
+        self._insurance_counts: List[int] = []
+
+    def append(
+        self,
+        rating: Any,
+        review_count: Any,
+        graduation_year: Any,
+        state: Optional[str],
+        gender: Optional[str],
+        specialties: Sequence[str],
+        insurances: Sequence[str],
+        partial: bool = False,
+    ) -> None:
+        self._rating.append(rating)
+        self._review_count.append(review_count)
+        self._graduation_year.append(graduation_year)
+        self._state.append(state)
+        self._gender.append(gender)
+        self._specialties.extend(specialties)
+        self._specialty_counts.append(len(specialties))
+        self._insurances.extend(insurances)
+        self._insurance_counts.append(len(insurances))
+        if partial:
+            self.partial += 1
+        self.rows += 1
+        if len(self._state) >= BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        n = len(self._state)
+        if not n:
+            return
+        rows = np.arange(self.rows - n, self.rows, dtype=np.intc)
+        chunks = self._chunks
+
+        chunks["averageRating"].append(_floats(self._rating))
+        chunks["reviewCount"].append(_floats(self._review_count))
+        chunks["graduationYear"].append(_floats(self._graduation_year))
+        chunks["state"].append(self.states.encode(self._state))
+        chunks["gender"].append(self.genders.encode(self._gender))
+        chunks["specialtyRows"].append(np.repeat(rows, self._specialty_counts))
+        chunks["specialtyCodes"].append(self.specialties.encode(self._specialties))
+        chunks["insuranceRows"].append(np.repeat(rows, self._insurance_counts))
+        chunks["insuranceCodes"].append(self.insurances.encode(self._insurances))
+
+        for pending in (
+            self._rating,
+            self._review_count,
+            self._graduation_year,
+            self._state,
+            self._gender,
+            self._specialties,
+            self._specialty_counts,
+            self._insurances,
+            self._insurance_counts,
+        ):
+            pending.clear()
+
+    def finish(self) -> "DatasetColumns":
+        self._flush()
+        for name, chunks in self._chunks.items():
+            self.arrays[name] = np.concatenate(chunks)
+        self._chunks.clear()
+        return self
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        A finished column: a NUMERIC_FIELDS name, "state", "gender",
+        "specialtyRows"/"specialtyCodes" or "insuranceRows"/"insuranceCodes".
+        """
+        if name in self.arrays:
+            return self.arrays[name]
+        return np.zeros(0, dtype=np.float64 if name in NUMERIC_FIELDS else np.intc)
+
+# Loading
+
+def _add_record(cols: DatasetColumns, record: Dict[str, Any]) -> None:
+    ratings = record.get("ratings") or {}
+    location = record.get("location") or {}
+    cols.append(
+        ratings.get("averageRating"),
+        ratings.get("reviewCount"),
+        (record.get("education") or {}).get("graduationYear"),
+        location.get("state"),
+        record.get("gender"),
+        record.get("specialties") or (),
+        record.get("insurances") or (),
+        # CSV and XML give back the string "True".
+        record.get("partial") in (True, "True"),
+    )
+
+def load_columns(paths: Sequence[str], fmt: Optional[str] = None) -> DatasetColumns:
+    """
+    Stream exported output files (json, jsonl, csv or xml) into columns.
+    A profile URL already loaded is skipped, so one run exported in several
+    formats (or re-scraped by two workers) is counted once.
+    """
+    cols = DatasetColumns()
+    profiles: Set[str] = set()
+    for path in paths:
+        before = cols.rows
+        skipped = 0
+        for record in iter_records(path, fmt):
+            if not isinstance(record, dict):
+                continue
+            urls = record.get("urls")
+            profile = urls.get("profile") if isinstance(urls, dict) else None
+            if isinstance(profile, str) and profile:
+                if profile in profiles:
+                    skipped += 1
+                    continue
+                profiles.add(profile)
+            _add_record(cols, record)
+        logger.info("Loaded %d records from %s (%d already loaded)", cols.rows - before, path, skipped)
+    return cols.finish()
+
+# Aggregates
+
+def _round(value: float, digits: int = 3) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+def _describe(values: np.ndarray) -> Dict[str, Any]:
+    valid = values[~np.isnan(values)]
+    if not valid.size:
+        return {"count": 0}
+    p50, p90 = np.percentile(valid, [50, 90])
+    return {
+        "count": int(valid.size),
+        "mean": _round(valid.mean()),
+        "min": _round(valid.min()),
+        "p50": _round(p50),
+        "p90": _round(p90),
+        "max": _round(valid.max()),
+    }
+
+def _grouped(
+    codes: np.ndarray,
+    rows: np.ndarray,
+    groups: int,
+    label: Callable[[int], str],
+    rating: np.ndarray,
+    review_count: np.ndarray,
+    top: int,
+) -> List[Dict[str, Any]]:
+    """
+    Doctor count, mean rating and mean review count per group code, for the
+    `top` largest groups. rows[i] is the record that codes[i] belongs to.
+    """
+    if not groups or not codes.size:
+        return []
+    doctors = np.bincount(codes, minlength=groups)
+
+    r = rating[rows]
+    rated = ~np.isnan(r)
+    n_rated = np.bincount(codes[rated], minlength=groups)
+    rating_sum = np.bincount(codes[rated], weights=r[rated], minlength=groups)
+
+    c = review_count[rows]
+    counted = ~np.isnan(c)
+    n_counted = np.bincount(codes[counted], minlength=groups)
+    count_sum = np.bincount(codes[counted], weights=c[counted], minlength=groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_rating = rating_sum / n_rated
+        mean_count = count_sum / n_counted
+
+    order = np.argsort(-doctors, kind="stable")[:top]
+    return [
+        {
+            "group": label(int(i)),
+            "doctors": int(doctors[i]),
+            "rated": int(n_rated[i]),
+            "meanRating": _round(mean_rating[i], 2),
+            "meanReviewCount": _round(mean_count[i], 1),
+        }
+        for i in order
+        if doctors[i]
+    ]
+
+def _review_count_histogram(review_count: np.ndarray) -> List[Dict[str, Any]]:
+    valid = review_count[~np.isnan(review_count)]
+    edges = list(REVIEW_COUNT_EDGES) + [np.inf]
+    counts, _ = np.histogram(valid, bins=edges)
+    buckets = []
+    for lo, hi, n in zip(edges, edges[1:], counts):
+        if hi == np.inf:
+            name = f"{lo}+"
+        elif hi - lo == 1:
+            name = str(lo)
+        else:
+            name = f"{lo}-{hi - 1}"
+        buckets.append({"reviews": name, "doctors": int(n)})
+    return buckets
+
+def compute_stats(cols: DatasetColumns, top: int = 20) -> Dict[str, Any]:
+    """
+    Summary statistics and grouped aggregates over loaded columns.
+    Multi-specialty doctors count once in each of their specialties.
+    """
+    n = cols.rows
+    rating = cols.column("averageRating")
+    review_count = cols.column("reviewCount")
+    state = cols.column("state")
+    gender = cols.column("gender")
+    spec_rows = cols.column("specialtyRows")
+    spec_codes = cols.column("specialtyCodes")
+    ins_rows = cols.column("insuranceRows")
+    ins_codes = cols.column("insuranceCodes")
+
+    state_labels = cols.states.labels
+    spec_labels = cols.specialties.labels
+    n_states = len(state_labels)
+
+    has_state = state >= 0
+    state_rows = np.flatnonzero(has_state)
+
+    spec_state = state[spec_rows]
+    both = spec_state >= 0
+    combined = spec_codes[both].astype(np.int64) * n_states + spec_state[both]
+
+    ins_doctors = np.bincount(ins_codes, minlength=len(cols.insurances.labels)) if ins_codes.size else np.zeros(0, int)
+    ins_order = np.argsort(-ins_doctors, kind="stable")[:top]
+    with_any = int(np.count_nonzero(np.bincount(ins_rows, minlength=n))) if n else 0
+
+    gender_counts = np.bincount(gender[gender >= 0], minlength=len(cols.genders.labels)) if n else []
+
+    return {
+        "records": n,
+        "partial": cols.partial,
+        "fields": {name: _describe(cols.column(name)) for name in NUMERIC_FIELDS},
+        "reviewCountHistogram": _review_count_histogram(review_count),
+        "gender": {label: int(count) for label, count in zip(cols.genders.labels, gender_counts)},
+        "bySpecialty": _grouped(
+            spec_codes, spec_rows, len(spec_labels), spec_labels.__getitem__, rating, review_count, top
+        ),
+        "byState": _grouped(
+            state[has_state], state_rows, n_states, state_labels.__getitem__, rating, review_count, top
+        ),
+        "bySpecialtyAndState": _grouped(
+            combined,
+            spec_rows[both],
+            len(spec_labels) * n_states,
+            lambda i: f"{spec_labels[i // n_states]} / {state_labels[i % n_states]}",
+            rating,
+            review_count,
+            top,
+        ),
+        "insurances": {
+            "doctorsWithAny": with_any,
+            "distinct": len(cols.insurances.labels),
+            "top": [
+                {
+                    "insurance": cols.insurances.labels[i],
+                    "doctors": int(ins_doctors[i]),
+                    "share": round(int(ins_doctors[i]) / n, 3),
+                }
+                for i in ins_order
+                if ins_doctors[i]
+            ],
+        },
+    }
+
+# Report
+
+def _fmt(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+def _table(title: str, rows: List[Dict[str, Any]], columns: Sequence[str]) -> List[str]:
+    if not rows:
+        return [title, "  (none)"]
+    cells = [[_fmt(row.get(col)) for col in columns] for row in rows]
+    widths = [max(len(col), *(len(r[i]) for r in cells)) for i, col in enumerate(columns)]
+    lines = [title]
+    lines.append("  " + "  ".join(col.ljust(w) if i == 0 else col.rjust(w) for i, (col, w) in enumerate(zip(columns, widths))))
+    for r in cells:
+        lines.append("  " + "  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(r, widths))))
+    return lines
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"Records: {report['records']:,} ({report['partial']:,} partial)", ""]
+
+    field_rows = [dict(field=name, **values) for name, values in report["fields"].items()]
+    lines += _table("Fields", field_rows, ["field", "count", "mean", "min", "p50", "p90", "max"])
+    lines.append("")
+    lines.append(
+        "Review counts: " + "  ".join(f"{b['reviews']}: {b['doctors']:,}" for b in report["reviewCountHistogram"])
+    )
+    lines.append("Gender: " + ("  ".join(f"{k}: {v:,}" for k, v in report["gender"].items()) or "-"))
+    lines.append("")
+
+    group_columns = ["group", "doctors", "rated", "meanRating", "meanReviewCount"]
+    for key, title in (
+        ("bySpecialty", "By specialty"),
+        ("byState", "By state"),
+        ("bySpecialtyAndState", "By specialty and state"),
+    ):
+        lines += _table(title, report[key], group_columns)
+        lines.append("")
+
+    ins = report["insurances"]
+    lines += _table(
+        f"Insurances ({ins['distinct']:,} distinct, {ins['doctorsWithAny']:,} doctors list any)",
+        ins["top"],
+        ["insurance", "doctors", "share"],
+    )
+    return "\n".join(lines)
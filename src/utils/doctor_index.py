@@ -0,0 +1,249 @@
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from exporters.readers import iter_records
+from models.records import Doctor, Location, as_dict
+
+logger = logging.getLogger(__name__)
+
+# Fields with an inverted index, as accepted by DoctorIndex.find().
+TERM_FIELDS = ("specialty", "insurance", "state", "zip")
+
+Terms = Union[str, Sequence[str], None]
+
+def _term(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = " ".join(str(value).split()).casefold()
+    return text or None
+
+def _zip_term(value: Any) -> Optional[str]:
+    text = _term(value)
+    # ZIP+4 and 5-digit ZIPs index under the same 5-digit key.
+    return text[:5] if text and text[:5].isdigit() else text
+
+def _key(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip().casefold()
+    return text or None
+
+_NORMALIZE = {"specialty": _term, "insurance": _term, "state": _term, "zip": _zip_term}
+
+# Postings holding at least 1/DENSE_RATIO of all records get a cached bitset
+# for membership tests; the bitset is then at most twice the posting's size.
+DENSE_RATIO = 64
+
+class DoctorIndex:
+    """
+    Doctor records in memory with lookup indexes:
+
+    - hash indexes from NPI and provider ID to a record
+    - inverted indexes from specialty, insurance, state and ZIP to the
+      ids of the records carrying them
+
+    Record ids are assigned in insertion order, so every posting list is an
+    append-only array of ascending int32s. find() intersects the postings of
+    a conjunctive query starting from the shortest list and tests the
+    survivors against the longer ones, by bitset for dense postings and by
+    vectorized binary search otherwise, so a query costs about its smallest
+    posting list whatever the index size. Matching is case- and
+    whitespace-insensitive.
+
+    Records can be added while a scrape runs (pass index.add as on_record)
+    or loaded from exported output with load_index(). A record whose
+    profile URL is already indexed is skipped. Not thread-safe: callers
+    adding from one thread and querying from another must lock around both.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[Doctor] = []
+        self.by_npi: Dict[str, int] = {}
+        self.by_provider: Dict[str, int] = {}
+        self.terms: Dict[str, Dict[str, array]] = {field: {} for field in TERM_FIELDS}
+        self._profiles: set = set()
+        # (field, term) -> (posting length when built, packed membership bits)
+        self._bitsets: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: Union[Doctor, Dict[str, Any]]) -> bool:
+        """
+        Index a Doctor or exported record dict. Returns False for duplicates.
+        """
+        doctor = record if isinstance(record, Doctor) else Doctor.from_dict(record)
+        profile = doctor.profile_url
+        if profile:
+            if profile in self._profiles:
+                return False
+            self._profiles.add(profile)
+
+        doc_id = len(self.records)
+        self.records.append(doctor)
+
+        npi = _key(doctor.npi) if isinstance(doctor.npi, (str, int)) else None
+        if npi:
+            self.by_npi[npi] = doc_id
+        provider = _key(doctor.providerid) if isinstance(doctor.providerid, str) else None
+        if provider:
+            self.by_provider[provider] = doc_id
+
+        location = doctor.location
+        if isinstance(location, Location):
+            state, zip_code = location.state, location.zip
+        elif isinstance(location, dict):
+            # Kept as a dict when its keys are not in Location's order (e.g. read from CSV).
+            state, zip_code = location.get("state"), location.get("zip")
+        else:
+            state = zip_code = None
+        self._post("specialty", doctor.specialties if isinstance(doctor.specialties, tuple) else (), doc_id)
+        self._post("insurance", doctor.insurances if isinstance(doctor.insurances, tuple) else (), doc_id)
+        self._post("state", (state,), doc_id)
+        self._post("zip", (zip_code,), doc_id)
+        return True
+
+    def _post(self, field: str, values: Iterable[Any], doc_id: int) -> None:
+        postings = self.terms[field]
+        normalize = _NORMALIZE[field]
+        last = None
+        for value in values:
+            term = normalize(value) if isinstance(value, (str, int)) else None
+            if not term or term == last:
+                continue
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = array("i")
+            # A record lists each value once per field, even if repeated.
+            if not posting or posting[-1] != doc_id:
+                posting.append(doc_id)
+            last = term
+
+    # Lookups
+
+    def get_npi(self, npi: Any) -> Optional[Doctor]:
+        doc_id = self.by_npi.get(_key(npi) or "")
+        return None if doc_id is None else self.records[doc_id]
+
+    def get_provider(self, providerid: Any) -> Optional[Doctor]:
+        doc_id = self.by_provider.get(_key(providerid) or "")
+        return None if doc_id is None else self.records[doc_id]
+
+    def _field_ids(self, field: str, values: Terms) -> Tuple[np.ndarray, Optional[Tuple[str, str]]]:
+        """
+        Ids carrying any of `values`, and the (field, term) key when that is
+        a single posting list (which can then be tested by bitset).
+        """
+        if isinstance(values, str):
+            values = [values]
+        postings = self.terms[field]
+        normalize = _NORMALIZE[field]
+        terms = [normalize(v) for v in values or ()]
+        lists = [(term, postings[term]) for term in terms if term in postings]
+        if not lists:
+            return np.zeros(0, dtype=np.int32), None
+        if len(lists) == 1:
+            term, posting = lists[0]
+            return np.frombuffer(posting, dtype=np.int32), (field, term)
+        # Several values for one field match any of them.
+        return np.unique(np.concatenate([np.frombuffer(p, dtype=np.int32) for _, p in lists])), None
+
+    def _bitset(self, key: Tuple[str, str], ids: np.ndarray) -> np.ndarray:
+        cached = self._bitsets.get(key)
+        if cached is not None and cached[0] == len(ids):
+            return cached[1]
+        member = np.zeros(int(ids[-1]) + 1, dtype=bool)
+        member[ids] = True
+        bits = np.packbits(member, bitorder="little")
+        self._bitsets[key] = (len(ids), bits)
+        return bits
+
+    def match_ids(
+        self,
+        specialty: Terms = None,
+        insurance: Terms = None,
+        state: Terms = None,
+        zip: Terms = None,
+        npi: Optional[str] = None,
+        providerid: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Ascending ids of records matching every given filter. A filter given
+        several values matches any of them. With no filters, every record.
+        """
+        candidates: List[Tuple[np.ndarray, Optional[Tuple[str, str]]]] = []
+        for key, index in ((npi, self.by_npi), (providerid, self.by_provider)):
+            if key is not None:
+                doc_id = index.get(_key(key) or "")
+                candidates.append((np.array([] if doc_id is None else [doc_id], dtype=np.int32), None))
+        for field, values in (("specialty", specialty), ("insurance", insurance), ("state", state), ("zip", zip)):
+            if values is not None:
+                candidates.append(self._field_ids(field, values))
+
+        if not candidates:
+            return np.arange(len(self.records), dtype=np.int32)
+        candidates.sort(key=lambda candidate: len(candidate[0]))
+        ids = candidates[0][0]
+        for other, key in candidates[1:]:
+            if not len(ids):
+                break
+            if key is not None and len(other) * DENSE_RATIO >= len(self.records):
+                bits = self._bitset(key, other)
+                # Ids past the posting's last id cannot be in it.
+                ids = ids[: np.searchsorted(ids, len(bits) * 8)]
+                ids = ids[(bits[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1 == 1]
+            else:
+                positions = np.searchsorted(other, ids)
+                positions[positions == len(other)] = 0
+                ids = ids[other[positions] == ids]
+        # Never hand out a view of a posting list: it would block appends to it.
+        return ids if ids.flags.owndata else ids.copy()
+
+    def find(self, limit: Optional[int] = None, **filters: Any) -> List[Doctor]:
+        """
+        Records matching every filter (see match_ids), in insertion order.
+        """
+        ids = self.match_ids(**filters)
+        if limit is not None:
+            ids = ids[:limit]
+        records = self.records
+        return [records[i] for i in ids.tolist()]
+
+    def count(self, **filters: Any) -> int:
+        return int(len(self.match_ids(**filters)))
+
+    def values(self, field: str) -> Dict[str, int]:
+        """
+        Indexed values of a term field with their record counts, most common first.
+        """
+        postings = self.terms[field]
+        return dict(sorted(((term, len(p)) for term, p in postings.items()), key=lambda item: -item[1]))
+
+# Loading exported output
+
+def load_index(paths: Sequence[str], fmt: Optional[str] = None, index: Optional[DoctorIndex] = None) -> DoctorIndex:
+    """
+    Index exported output files, skipping profiles already indexed.
+    """
+    index = index or DoctorIndex()
+    for path in paths:
+        before = len(index)
+        for record in iter_records(path, fmt):
+            if isinstance(record, dict):
+                index.add(record)
+        logger.info("Indexed %d records from %s", len(index) - before, path)
+    return index
+
+def format_doctor(record: Union[Doctor, Dict[str, Any]]) -> str:
+    """
+    One-line summary of a record for CLI output.
+    """
+    data = as_dict(record)
+    name = (data.get("name") or {}).get("full") or "?"
+    location = data.get("location") or {}
+    place = " ".join(v for v in (location.get("city") and f"{location['city']},", location.get("state"), location.get("zip")) if v)
+    specialties = ", ".join(data.get("specialties") or [])
+    return f"{data.get('npi') or '-':<12} {name} | {specialties or '-'} | {place or '-'}"
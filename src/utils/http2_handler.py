@@ -0,0 +1,226 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import ssl
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+try:
+    import h2  # noqa: F401
+    import httpx
+except ImportError as e:
+    raise ImportError(
+        "The http2 fetch backend requires httpx with HTTP/2 support (pip install 'httpx[http2]')"
+    ) from e
+
+from utils.request_handler import STREAM_CHUNK_SIZE, RequestHandler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Idle connections are kept this long. With HTTP/2 there is usually one per
+# host, so dropping it means a new handshake for the next request.
+KEEPALIVE_SECONDS = 60.0
+
+def _accept_encoding() -> str:
+    # httpx decodes gzip and deflate itself, br with brotli or brotlicffi
+    # installed and zstd (from 0.27.1) with zstandard installed.
+    encodings = ["gzip", "deflate"]
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        encodings.append("br")
+    if importlib.util.find_spec("zstandard"):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+class _SessionCachingObject(ssl.SSLObject):
+    """
+    SSLObject that hands its TLS session to the context once it can be
+    resumed. TLS 1.3 session tickets arrive after the handshake, with the
+    first records read, so the session is picked up in read().
+    """
+
+    def read(self, len: int = 1024, buffer: Any = None) -> Any:
+        data = super().read(len, buffer)
+        if not getattr(self, "_session_cached", False):
+            session = self.session
+            if session is not None and (session.has_ticket or self.version() != "TLSv1.3"):
+                self.context.remember_session(self.server_hostname, session)
+                self._session_cached = True
+        return data
+
+class _SessionReusingContext(ssl.SSLContext):
+    """
+    Client SSLContext that offers the last session seen for a host when it
+    opens another connection to it, so reconnects skip the full handshake.
+
+    Only documented ssl hooks are used: the sslobject_class attribute and
+    the session argument of wrap_bio(), which asyncio and anyio (under
+    httpx) call for every TLS connection. A TLS layer that does not go
+    through wrap_bio() simply gets full handshakes, and a session the
+    server will not take falls back to a full handshake too.
+    """
+
+    sslobject_class = _SessionCachingObject
+
+    def __init__(self, protocol: int) -> None:
+        super().__init__()
+        self.sessions: Dict[str, ssl.SSLSession] = {}
+        # Sessions are stored from the event loop thread but may be read
+        # from any thread that opens a connection with this context.
+        self._sessions_lock = threading.Lock()
+
+    def remember_session(self, host: Optional[str], session: ssl.SSLSession) -> None:
+        if host:
+            with self._sessions_lock:
+                self.sessions[host] = session
+
+    def wrap_bio(
+        self,
+        incoming: ssl.MemoryBIO,
+        outgoing: ssl.MemoryBIO,
+        server_side: bool = False,
+        server_hostname: Any = None,
+        session: Optional[ssl.SSLSession] = None,
+    ) -> ssl.SSLObject:
+        if session is None and not server_side and server_hostname:
+            # anyio passes the IDNA-encoded name; server_hostname reads back as str.
+            host = server_hostname.decode("ascii") if isinstance(server_hostname, bytes) else server_hostname
+            with self._sessions_lock:
+                session = self.sessions.get(host)
+            if session is not None:
+                try:
+                    return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+                except ValueError as e:
+                    # e.g. a session from another context; not worth failing the request.
+                    logger.debug("Not resuming TLS session for %s: %s", host, e)
+                    session = None
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+def _ssl_context() -> ssl.SSLContext:
+    context = _SessionReusingContext(ssl.PROTOCOL_TLS_CLIENT)
+    # HTTP/2 over TLS requires TLS 1.2 or later (RFC 9113, section 9.2).
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    # The CA bundle requests would use: its env overrides, then certifi.
+    for name in ("REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE", "SSL_CERT_FILE"):
+        path = os.environ.get(name)
+        if path:
+            if os.path.isdir(path):
+                context.load_verify_locations(capath=path)
+            else:
+                context.load_verify_locations(cafile=path)
+            return context
+    import certifi
+
+    context.load_verify_locations(cafile=certifi.where())
+    return context
+
+async def _next_chunk(chunks: Any) -> Optional[bytes]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+class _LoopResponse:
+    """
+    An httpx response living on the handler's event loop, read from the
+    calling thread with the interface RequestHandler expects.
+    """
+
+    def __init__(self, response: httpx.Response, run: Callable[[Awaitable[Any]], Any]) -> None:
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self._run = run
+
+    @property
+    def text(self) -> str:
+        return self.response.text
+
+    def raise_for_status(self) -> None:
+        self.response.raise_for_status()
+
+    def iter_bytes(self, chunk_size: int) -> Iterator[bytes]:
+        chunks = self.response.aiter_bytes(chunk_size)
+        while True:
+            chunk = self._run(_next_chunk(chunks))
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self._run(self.response.aclose())
+
+class Http2RequestHandler(RequestHandler):
+    """
+    RequestHandler over an httpx client speaking HTTP/2.
+
+    Requests to the same host share a connection as concurrent streams
+    instead of each taking its own, so threads sharing one handler (daemon
+    workers) need one TCP/TLS connection per host rather than one per
+    in-flight request. New connections to a host resume the previous TLS
+    session. Plain http:// URLs are fetched over HTTP/1.1.
+
+    httpcore's synchronous HTTP/2 connections are not safe to share between
+    threads (concurrent requests can put new stream ids on the wire out of
+    order), so every request runs on one event loop thread owned by the
+    handler and callers block until it is done.
+
+    Retries, backoff, proxies, timeouts, headers and the response size cap
+    behave as in RequestHandler. Select it with "fetchBackend": "http2".
+    """
+
+    # HTTPStatusError (from raise_for_status) is an HTTPError too.
+    transport_errors = (httpx.HTTPError,)
+    # Every request runs on the handler's event loop thread.
+    thread_safe = True
+    # Unlike urllib3, httpcore does not check that an idle connection is
+    # still open before reusing it, so a server closing it shows up as an
+    # error on the next request. The dead connection is discarded, and the
+    # retry (which counts against max_retries) opens a new one.
+    reconnect_errors = (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError)
+
+    def default_headers(self) -> Dict[str, str]:
+        headers = super().default_headers()
+        # Connection-specific headers are not allowed in HTTP/2.
+        del headers["Connection"]
+        headers["Accept-Encoding"] = _accept_encoding()
+        return headers
+
+    def _build_session(self) -> Any:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="http2-fetch", daemon=True).start()
+
+        context = _ssl_context()
+        limits = httpx.Limits(keepalive_expiry=KEEPALIVE_SECONDS)
+        # Configured proxies win over HTTP(S)_PROXY from the environment.
+        mounts = {
+            f"{scheme}://": httpx.AsyncHTTPTransport(proxy=url, http2=True, verify=context, limits=limits)
+            for scheme, url in self.proxies.items()
+            if url
+        }
+        return httpx.AsyncClient(
+            http2=True,
+            verify=context,
+            headers=self.default_headers(),
+            timeout=self.timeout,
+            # requests follows redirects by default; httpx does not.
+            follow_redirects=True,
+            limits=limits,
+            mounts=mounts,
+        )
+
+    def _run(self, awaitable: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(awaitable, self._loop).result()
+
+    def _send(self, url: str, params: Optional[Dict[str, Any]], stream: bool) -> Any:
+        request = self.session.build_request("GET", url, params=params)
+        return _LoopResponse(self._run(self.session.send(request, stream=stream)), self._run)
+
+    def _iter_chunks(self, response: Any) -> Iterator[bytes]:
+        return response.iter_bytes(chunk_size=STREAM_CHUNK_SIZE)
+
+    def close(self) -> None:
+        self._run(self.session.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,194 @@
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    task_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_expires);
+"""
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class JobQueue:
+    """
+    SQLite-backed task queue with leases.
+
+    Workers lease one task at a time. A lease that is not completed before it
+    expires (e.g. the worker died) becomes available to other workers again,
+    up to max_attempts. Delivery is at-least-once. A task that may outlive
+    its lease should run under renewing(), which keeps extending the lease
+    while the worker is alive.
+
+    A kind/key is queued once; later enqueues of it are ignored, so a crawl
+    fans out to each URL once. A new crawl of the same URLs passes `since`
+    (its start time) to queue again the tasks that finished before it.
+
+    The database may live on a filesystem shared between hosts, as long as
+    that filesystem supports POSIX locks (SQLite's rollback journal relies on them).
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode; transactions are opened explicitly below.
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def enqueue(self, kind: str, key: str, payload: Dict[str, Any], since: Optional[float] = None) -> bool:
+        """
+        Add a task unless one with the same kind/key already exists. With
+        `since`, an existing task that finished (done or failed) before that
+        time is queued again with the new payload and a fresh attempt count.
+        Returns True if the task was added or queued again.
+        """
+        cur = self.conn.execute(
+            "INSERT INTO tasks (kind, task_key, payload, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(task_key) DO UPDATE SET payload = excluded.payload, state = 'pending', "
+            "attempts = 0, error = NULL, updated = excluded.updated "
+            "WHERE state IN ('done', 'failed') AND updated < ?",
+            (kind, f"{kind}:{key}", json.dumps(payload), time.time(), since),
+        )
+        return cur.rowcount > 0
+
+    def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim the next available task for worker_id.
+        Returns a dict with id, kind, payload and attempts, or None if nothing is available.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases held by dead workers that have used up their attempts are given up on.
+            self.conn.execute(
+                "UPDATE tasks SET state = 'failed', error = 'lease expired', updated = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT id, kind, payload, attempts FROM tasks "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+
+            task_id, kind, payload, attempts = row
+            self.conn.execute(
+                "UPDATE tasks SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, task_id),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return {"id": task_id, "kind": kind, "payload": json.loads(payload), "attempts": attempts + 1}
+
+    def renew(self, task_id: int, worker_id: str) -> bool:
+        """
+        Extend a held lease by lease_seconds from now. Returns False if the
+        lease had already passed to another worker.
+        """
+        now = time.time()
+        cur = self.conn.execute(
+            "UPDATE tasks SET lease_expires = ?, updated = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (now + self.lease_seconds, now, task_id, worker_id),
+        )
+        return cur.rowcount > 0
+
+    @contextlib.contextmanager
+    def renewing(self, task_id: int, worker_id: str, interval: Optional[float] = None) -> Iterator[None]:
+        """
+        Renew the lease on a task every `interval` seconds (default a third
+        of lease_seconds) while the block runs. Renewal stops once the lease
+        is lost; complete() then reports it.
+        """
+        interval = interval or self.lease_seconds / 3
+        stop = threading.Event()
+
+        def renew_loop() -> None:
+            # SQLite connections stay on the thread that opened them.
+            queue = JobQueue(self.path, lease_seconds=self.lease_seconds, max_attempts=self.max_attempts)
+            try:
+                while not stop.wait(interval):
+                    if not queue.renew(task_id, worker_id):
+                        logger.warning("Lost the lease on task %d; renewal stopped.", task_id)
+                        break
+            finally:
+                queue.close()
+
+        thread = threading.Thread(target=renew_loop, name=f"lease-{task_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        """
+        Mark a task done. Returns False if the lease had already passed to another worker.
+        """
+        cur = self.conn.execute(
+            "UPDATE tasks SET state = 'done', lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (time.time(), task_id, worker_id),
+        )
+        return cur.rowcount > 0
+
+    def fail(self, task_id: int, worker_id: str, error: str, retry: bool = True) -> None:
+        """
+        Release a task after an error. It is re-queued while attempts remain.
+        """
+        self.conn.execute(
+            "UPDATE tasks SET state = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END, "
+            "lease_owner = NULL, lease_expires = NULL, error = ?, updated = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (1 if retry else 0, self.max_attempts, error, time.time(), task_id, worker_id),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update({state: n for state, n in rows})
+        return counts
+
+    def is_drained(self) -> bool:
+        """
+        True once no task is pending or leased (expired leases count as pending).
+        """
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE state IN ('pending', 'leased')"
+        ).fetchone()
+        return row[0] == 0
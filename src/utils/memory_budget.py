@@ -0,0 +1,230 @@
+import contextlib
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from utils.stage_profiler import StageProfiler
+
+logger = logging.getLogger(__name__)
+
+# Seconds between RSS samples while a stage is running.
+SAMPLE_INTERVAL = 0.05
+
+def peak_rss() -> int:
+    """
+    Highest resident set size this process has reached, in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux/BSD.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes.
+    Uses /proc on Linux; elsewhere falls back to the peak RSS from getrusage.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+def default_caps(budget_mb: float) -> Dict[str, int]:
+    """
+    Per-record list caps that keep one oversized profile from taking a
+    large share of a memory budget: one review (a paragraph of text) and
+    two insurance names per MB, with floors that leave ordinary profiles whole.
+    """
+    return {
+        "maxReviews": max(20, int(budget_mb)),
+        "maxInsurances": max(50, int(budget_mb * 2)),
+    }
+
+def _load_malloc_trim():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return libc.malloc_trim
+    except (OSError, AttributeError):
+        # Not glibc (e.g. musl).
+        return None
+
+_malloc_trim = _load_malloc_trim()
+
+def release_memory() -> None:
+    """
+    Run a full collection and hand freed heap pages back to the OS where
+    the allocator supports it (glibc), so RSS reflects what is really in use.
+    """
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+class MemoryBudget:
+    """
+    Keeps a run under an RSS budget and records peak memory per pipeline stage.
+
+    Over the budget, callers are held back rather than stopped: see
+    wait_for_headroom(). With budget_bytes=None the budget never blocks, so
+    callers can use it unconditionally. An attached StageProfiler is told
+    about every stage either way.
+
+    Stage peaks are measured from RSS: sampled every SAMPLE_INTERVAL seconds
+    while a stage runs, and taken from getrusage when the stage raised the
+    process's high-water mark, so short spikes between samples still count.
+    Stages may run concurrently (daemon threads); since RSS is per process,
+    each reports the process peak seen while it ran. trace=True adds
+    tracemalloc peaks of Python allocations. tracemalloc hooks every allocation (there is no
+    sampling mode) and made profile parsing about five times slower on the
+    mock site's pages, so leave it off outside of investigations.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: Optional[int] = None,
+        soft_ratio: float = 0.85,
+        trace: bool = False,
+        profiler: Optional["StageProfiler"] = None,
+        max_wait: float = 30.0,
+    ) -> None:
+        self.budget_bytes = budget_bytes
+        self.profiler = profiler
+        self.soft_limit = int(budget_bytes * soft_ratio) if budget_bytes else None
+        self.trace = bool(budget_bytes) and trace
+        self.max_wait = max_wait
+        self.stage_peaks: Dict[str, Dict[str, int]] = {}
+        # Highest RSS sampled so far for each running stage.
+        self._running: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+
+        if self.trace and not tracemalloc.is_tracing():
+            # One frame per allocation is the cheapest tracing mode.
+            tracemalloc.start(1)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.budget_bytes)
+
+    def has_headroom(self) -> bool:
+        """
+        Check whether another fetch may start. Above the soft limit freed
+        memory is released first; returns False only if RSS is still over budget.
+        """
+        if not self.enabled:
+            return True
+        if current_rss() < self.soft_limit:
+            return True
+
+        release_memory()
+        return current_rss() < self.budget_bytes
+
+    def wait_for_headroom(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Block until another fetch may start. While over budget, freed memory
+        is released and the caller backs off (doubling pauses, up to
+        max_wait seconds in total) so other threads and in-flight work can
+        finish and drop what they hold. Returns False if RSS is still over
+        budget afterwards.
+        """
+        if self.has_headroom():
+            return True
+
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        pause = 0.1
+        logger.warning(
+            "RSS %.1f MB is over the memory budget of %.1f MB; pausing.",
+            current_rss() / 1e6,
+            self.budget_bytes / 1e6,
+        )
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(pause, remaining))
+            pause *= 2
+            if self.has_headroom():
+                logger.info("RSS back under the memory budget; resuming.")
+                return True
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Record peak traced allocations and RSS while the block runs.
+        Stages should not be nested within one thread.
+        """
+        if self.profiler is not None:
+            self.profiler.stage_enter(name)
+        try:
+            if not self.enabled:
+                yield
+                return
+
+            if self.trace:
+                tracemalloc.reset_peak()
+            high_water = peak_rss()
+            sampled = [current_rss()]
+            with self._lock:
+                self._running[id(sampled)] = sampled
+                if self._sampler is None:
+                    self._sampler = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+                    self._sampler.start()
+            try:
+                yield
+            finally:
+                with self._lock:
+                    del self._running[id(sampled)]
+                rss = max(sampled[0], current_rss())
+                new_high = peak_rss()
+                if new_high > high_water:
+                    # The process peaked during this stage: that is the exact peak.
+                    rss = max(rss, new_high)
+                self._record_peaks(name, rss)
+        finally:
+            if self.profiler is not None:
+                self.profiler.stage_exit(name)
+
+    def _sample(self) -> None:
+        # Runs while any stage does; the next stage starts a new sampler.
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            rss = current_rss()
+            with self._lock:
+                if not self._running:
+                    self._sampler = None
+                    return
+                for sampled in self._running.values():
+                    if rss > sampled[0]:
+                        sampled[0] = rss
+
+    def _record_peaks(self, name: str, rss: int) -> None:
+        with self._lock:
+            peaks = self.stage_peaks.setdefault(name, {"traced": 0, "rss": 0})
+            if self.trace:
+                peaks["traced"] = max(peaks["traced"], tracemalloc.get_traced_memory()[1])
+            peaks["rss"] = max(peaks["rss"], rss)
+
+    def log_report(self) -> None:
+        if not self.enabled:
+            return
+        for name, peaks in self.stage_peaks.items():
+            if self.trace:
+                logger.info(
+                    "Memory stage %-8s peak traced %.1f MB, peak RSS %.1f MB",
+                    name,
+                    peaks["traced"] / 1e6,
+                    peaks["rss"] / 1e6,
+                )
+            else:
+                logger.info("Memory stage %-8s peak RSS %.1f MB", name, peaks["rss"] / 1e6)
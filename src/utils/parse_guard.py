@@ -0,0 +1,166 @@
+import contextlib
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+_START_TAG = re.compile(rb"<[A-Za-z]")
+
+# Default for limit_elements(). Profiles run to a few thousand elements even
+# with long review and insurance lists; a page several times larger than
+# that is generated filler, and building its tree alone takes seconds.
+DEFAULT_MAX_ELEMENTS = 50000
+
+class ParseGuard:
+    """
+    Time and size limits for parsing one profile page.
+
+    Extractors run through run(); each gets extractor_seconds, and none
+    start once the page_seconds deadline has passed. Python cannot interrupt
+    a running extractor, so long loops inside extractors poll expired() and
+    stop early, keeping what they have; loops whose cost grows with the text
+    they read also charge() it against max_scan_chars. Anything cut short is
+    listed in `reasons` so the record can be flagged as partial.
+
+    The timeouts are a backstop. limit_elements() caps the size of the tree
+    every extractor walks, well above ordinary profiles; pages past the cap
+    are cut, and pages just under it rely on the timeouts. `clock` is the
+    time source for all deadlines.
+    """
+
+    def __init__(
+        self,
+        page_seconds: Optional[float] = None,
+        extractor_seconds: Optional[float] = None,
+        max_scan_chars: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.clock = clock
+        self.page_deadline = clock() + page_seconds if page_seconds else None
+        self.extractor_seconds = extractor_seconds
+        self.max_scan_chars = max_scan_chars
+        self.reasons: List[str] = []
+        self._scanned = 0
+        self._name: Optional[str] = None
+        self._deadline: Optional[float] = None
+        self._expired = False
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.reasons)
+
+    def note(self, reason: str) -> None:
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+    def expired(self) -> bool:
+        if self._expired:
+            return True
+        if self._deadline is not None and self.clock() > self._deadline:
+            self._expired = True
+        return self._expired
+
+    def limit_text(self, text: Optional[str]) -> Optional[str]:
+        """
+        Truncate a whole-document text scan to max_scan_chars.
+        """
+        if text and self.max_scan_chars and len(text) > self.max_scan_chars:
+            self.note(f"{self._name or 'page'}: text scan truncated")
+            return text[: self.max_scan_chars]
+        return text
+
+    def charge(self, chars: int) -> bool:
+        """
+        Count text read by the running extractor. Returns False, once, when
+        the extractor has read more than max_scan_chars in total.
+        """
+        if not self.max_scan_chars:
+            return True
+        self._scanned += chars
+        if self._scanned > self.max_scan_chars:
+            self.note(f"{self._name or 'page'}: text scan truncated")
+            return False
+        return True
+
+    @contextlib.contextmanager
+    def active(self) -> Iterator["ParseGuard"]:
+        """
+        Make this the guard seen by expired()/limit_text() in this thread.
+        """
+        previous = getattr(_local, "guard", None)
+        _local.guard = self
+        try:
+            yield self
+        finally:
+            _local.guard = previous
+
+    def run(self, name: str, fn: Callable[..., Any], default: Any, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run one extractor under the guard. Returns `default` if the page is
+        already out of time or the extractor raises.
+        """
+        now = self.clock()
+        if self.page_deadline is not None and now > self.page_deadline:
+            self.note("page time limit")
+            self.note(f"{name}: skipped")
+            return default
+
+        deadlines = [d for d in (self.page_deadline, now + self.extractor_seconds if self.extractor_seconds else None) if d]
+        self._name = name
+        self._deadline = min(deadlines) if deadlines else None
+        self._expired = False
+        self._scanned = 0
+        try:
+            with self.active():
+                return fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning("Extractor %s failed: %s", name, e)
+            self.note(f"{name}: error")
+            return default
+        finally:
+            if self._expired:
+                self.note(f"{name}: time limit")
+            self._name = None
+            self._deadline = None
+            self._expired = False
+
+def current_guard() -> Optional[ParseGuard]:
+    return getattr(_local, "guard", None)
+
+def expired() -> bool:
+    """
+    True if the extractor running under the current thread's guard is out of time.
+    Cheap enough to call once per node in a loop.
+    """
+    guard = getattr(_local, "guard", None)
+    return guard is not None and guard.expired()
+
+def limit_text(text: Optional[str]) -> Optional[str]:
+    guard = getattr(_local, "guard", None)
+    return guard.limit_text(text) if guard is not None else text
+
+def charge(chars: int) -> bool:
+    guard = getattr(_local, "guard", None)
+    return guard is None or guard.charge(chars)
+
+def limit_elements(body: bytes, max_elements: Optional[int]) -> Tuple[bytes, bool]:
+    """
+    Cut an HTML page just before its (max_elements + 1)th start tag.
+
+    Building the soup and every selector pass cost time per element, so this
+    bounds the whole parse. Start tags are counted with a byte scan, before
+    any parsing; tags inside comments and scripts count too, which only
+    makes the cut earlier. Returns the page and whether it was cut.
+    """
+    if not max_elements or len(body) <= max_elements * 4:
+        # Every start tag takes at least four bytes (<a/>), so this page cannot be over.
+        return body, False
+    for count, match in enumerate(_START_TAG.finditer(body), start=1):
+        if count > max_elements:
+            return body[: match.start()], True
+    return body, False
@@ -0,0 +1,86 @@
+import importlib
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Built-in plugins as "module:attribute" paths. Nothing here is imported until
+# it is selected, so the CLI does not pay for bs4/requests/csv/xml it won't use.
+BUILTIN_PLUGINS: Dict[str, Dict[str, str]] = {
+    "exporter": {
+        "json": "exporters.json_exporter:export_json",
+        "csv": "exporters.csv_exporter:export_csv",
+        "xml": "exporters.xml_exporter:export_xml",
+        # Accept minor typos.
+        "xls": "exporters.xml_exporter:export_xml",
+        "xmls": "exporters.xml_exporter:export_xml",
+    },
+    # Streaming writers used for output; exporters without one are buffered.
+    "writer": {
+        "json": "exporters.json_exporter:JsonWriter",
+        "jsonl": "exporters.jsonl_exporter:JsonlWriter",
+        "csv": "exporters.csv_exporter:CsvWriter",
+        "xml": "exporters.xml_exporter:XmlWriter",
+        "xls": "exporters.xml_exporter:XmlWriter",
+        "xmls": "exporters.xml_exporter:XmlWriter",
+    },
+    "parser": {
+        "lxml": "parsers.soup_backends:lxml_soup",
+        "html.parser": "parsers.soup_backends:stdlib_soup",
+    },
+    "fetch": {
+        "requests": "utils.request_handler:RequestHandler",
+        "http2": "utils.http2_handler:Http2RequestHandler",
+    },
+}
+
+# Third-party plugins can register under these entry point groups.
+ENTRY_POINT_GROUP = "webmd_scraper.{kind}"
+
+_loaded: Dict[str, Any] = {}
+
+def _entry_points(kind: str) -> Dict[str, Any]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return {}
+    group = ENTRY_POINT_GROUP.format(kind=kind)
+    try:
+        eps = entry_points(group=group)
+    except TypeError:
+        # Python < 3.10
+        eps = entry_points().get(group, [])
+    return {ep.name: ep for ep in eps}
+
+def available(kind: str) -> List[str]:
+    """
+    Names of the plugins of a kind, built-in ones first. Entry points are
+    listed from package metadata without being imported.
+    """
+    names = list(BUILTIN_PLUGINS.get(kind, {}))
+    names.extend(name for name in _entry_points(kind) if name not in names)
+    return names
+
+def load(kind: str, name: str) -> Any:
+    """
+    Import and return the plugin `name` of the given kind
+    ("exporter", "writer", "parser" or "fetch"). Raises KeyError if it is unknown.
+    """
+    name = name.lower()
+    cache_key = f"{kind}:{name}"
+    if cache_key in _loaded:
+        return _loaded[cache_key]
+
+    target = BUILTIN_PLUGINS.get(kind, {}).get(name)
+    if target is not None:
+        module_name, _, attr = target.partition(":")
+        plugin = getattr(importlib.import_module(module_name), attr)
+    else:
+        ep = _entry_points(kind).get(name)
+        if ep is None:
+            raise KeyError(f"Unknown {kind} plugin: {name} (available: {', '.join(available(kind))})")
+        plugin = ep.load()
+
+    logger.debug("Loaded %s plugin %s", kind, name)
+    _loaded[cache_key] = plugin
+    return plugin
@@ -1,16 +1,47 @@
 import logging
+import re
 import time
-from typing import Any, Dict, Optional
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
 
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Size of raw body chunks handed to streaming consumers.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class ResponseTooLarge(requests.RequestException):
+    """
+    Raised while streaming a body that exceeds the handler's max_response_bytes.
+    """
+
+def _charset_from_headers(headers: Any) -> Optional[str]:
+    match = re.search(r"charset=[\"']?([\w.:-]+)", headers.get("Content-Type") or "", re.IGNORECASE)
+    return match.group(1) if match else None
+
 class RequestHandler:
     """
     Thin wrapper around requests.Session with retry and proxy support.
+
+    Other fetch backends subclass it and replace the transport
+    (_build_session, _send, _iter_chunks and transport_errors), keeping
+    the retry loop.
     """
 
+    # Failures worth another attempt: connection errors, timeouts, broken
+    # bodies and 5xx responses (via raise_for_status).
+    transport_errors: Tuple[type, ...] = (requests.RequestException,)
+    # Whether one instance may serve several threads at once. A
+    # requests.Session may not, so concurrent callers each need their own.
+    thread_safe = False
+    # Transport errors that mean a pooled connection had gone stale. The
+    # first attempt failing this way is retried at once, without backoff.
+    reconnect_errors: Tuple[type, ...] = ()
+
     def __init__(
         self,
         proxies: Optional[Dict[str, str]] = None,
@@ -18,32 +49,110 @@ class RequestHandler:
         max_retries: int = 3,
         backoff_factor: float = 1.5,
         user_agent: Optional[str] = None,
+        max_response_bytes: Optional[int] = None,
     ) -> None:
-        self.session = requests.Session()
         self.proxies = proxies or {}
         self.timeout = timeout
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
+        self.max_response_bytes = max_response_bytes
         self.user_agent = user_agent or (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/120.0 Safari/537.36"
         )
 
-        self.session.headers.update(
-            {
-                "User-Agent": self.user_agent,
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Connection": "keep-alive",
-            }
+        self.session = self._build_session()
+
+    def default_headers(self) -> Dict[str, str]:
+        return {
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            # gzip/deflate, plus br/zstd when urllib3 can decode them.
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive",
+        }
+
+    def _build_session(self) -> Any:
+        session = requests.Session()
+        session.headers.update(self.default_headers())
+        return session
+
+    def _send(self, url: str, params: Optional[Dict[str, Any]], stream: bool) -> Any:
+        """
+        Issue one GET. The response needs status_code, headers, text,
+        raise_for_status() and close(); the body is read by _iter_chunks.
+        """
+        return self.session.get(
+            url,
+            params=params,
+            proxies=self.proxies or None,
+            timeout=self.timeout,
+            stream=stream,
         )
 
+    def _iter_chunks(self, response: Any) -> Iterator[bytes]:
+        return response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+
+    def close(self) -> None:
+        self.session.close()
+
     def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         Perform a GET request with retries.
         Returns response text on success, or None on repeated failure.
         """
+        return self._request(url, params, lambda response: response.text, stream=False)
+
+    def stream(
+        self,
+        url: str,
+        consume: Callable[[Iterator[bytes], Optional[str]], T],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Optional[T]:
+        """
+        Perform a streaming GET request with retries.
+
+        `consume` receives an iterator of decompressed body chunks (as they
+        arrive from the socket) and the charset declared in Content-Type, if any.
+        It may stop early; the connection is released either way. Returns
+        consume's result, or None on repeated failure or an oversized body.
+        """
+        def handle(response: Any) -> T:
+            return consume(self._iter_body(response, url), _charset_from_headers(response.headers))
+
+        return self._request(url, params, handle, stream=True)
+
+    def get_bytes(
+        self, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Fetch the raw (decompressed) body without decoding it.
+        Returns (body, declared charset), or None on failure.
+        """
+        return self.stream(url, lambda chunks, charset: (b"".join(chunks), charset), params=params)
+
+    def _iter_body(self, response: Any, url: str) -> Iterator[bytes]:
+        limit = self.max_response_bytes
+        declared = response.headers.get("Content-Length")
+        if limit and declared and declared.isdigit() and int(declared) > limit:
+            raise ResponseTooLarge(f"Response from {url} declares {declared} bytes (limit {limit})")
+
+        received = 0
+        for chunk in self._iter_chunks(response):
+            received += len(chunk)
+            if limit and received > limit:
+                raise ResponseTooLarge(f"Response from {url} exceeded {limit} bytes")
+            yield chunk
+
+    def _request(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        handle: Callable[[Any], T],
+        stream: bool,
+    ) -> Optional[T]:
         last_exception: Optional[Exception] = None
 
         for attempt in range(1, self.max_retries + 1):
@@ -51,23 +160,27 @@ class RequestHandler:
                 logger.debug(
                     "Requesting %s (attempt %d/%d)", url, attempt, self.max_retries
                 )
-                response = self.session.get(
-                    url,
-                    params=params,
-                    proxies=self.proxies or None,
-                    timeout=self.timeout,
-                )
-                if response.status_code >= 400:
-                    logger.warning(
-                        "Received HTTP %s for %s", response.status_code, url
-                    )
-                    if 400 <= response.status_code < 500:
-                        # Client errors are usually unrecoverable
-                        break
-                response.raise_for_status()
-                return response.text
-            except Exception as e:
+                with closing(self._send(url, params, stream)) as response:
+                    if response.status_code >= 400:
+                        logger.warning(
+                            "Received HTTP %s for %s", response.status_code, url
+                        )
+                        if 400 <= response.status_code < 500:
+                            # Client errors are usually unrecoverable
+                            break
+                    response.raise_for_status()
+                    return handle(response)
+            except ResponseTooLarge as e:
+                # Retrying would download the same oversized page again.
+                logger.error("%s; skipping.", e)
+                return None
+            except self.transport_errors as e:
+                # Anything else (e.g. a bug in `consume`) is not the network's
+                # fault; fetching the page again would fail the same way.
                 last_exception = e
+                if attempt == 1 and isinstance(e, self.reconnect_errors):
+                    logger.debug("Connection for %s was closed (%s); reconnecting.", url, e)
+                    continue
                 wait_time = self.backoff_factor * attempt
                 logger.warning(
                     "Request to %s failed on attempt %d/%d: %s. Retrying in %.1fs...",
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    url TEXT PRIMARY KEY,
+    search_url TEXT,
+    first_fetch REAL,
+    last_fetch REAL,
+    last_change REAL,
+    fetch_count INTEGER NOT NULL DEFAULT 0,
+    change_count INTEGER NOT NULL DEFAULT 0,
+    fingerprint TEXT,
+    next_due REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS profiles_due ON profiles (next_due);
+"""
+
+# Fields that describe how a record was scraped rather than the profile itself.
+_NON_CONTENT_FIELDS = ("searchUrl", "partial", "partialReasons")
+
+def record_fingerprint(record: Dict[str, Any]) -> str:
+    """
+    Stable hash of a doctor record's content. searchUrl is ignored since the
+    same profile can be reached from different searches, and the partial
+    flags since they describe the parse, not the profile.
+    """
+    content = {k: v for k, v in record.items() if k not in _NON_CONTENT_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class RevisitScheduler:
+    """
+    Tracks per-profile fetch/change history and decides when each profile
+    should be re-scraped.
+
+    A profile's change rate is estimated as (changes + prior_changes) /
+    (observed days + prior_days), so new profiles start near one change per
+    prior_days. The next visit is scheduled revisit_factor / rate days after
+    the last fetch, clamped to [min_days, max_days]. Profiles that change
+    weekly are revisited often; ones that change yearly rarely.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        min_days: float = 1.0,
+        max_days: float = 365.0,
+        revisit_factor: float = 0.5,
+        prior_changes: float = 0.5,
+        prior_days: float = 30.0,
+    ) -> None:
+        self.path = path
+        self.min_days = min_days
+        self.max_days = max_days
+        self.revisit_factor = revisit_factor
+        self.prior_changes = prior_changes
+        self.prior_days = prior_days
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def change_rate(self, first_fetch: Optional[float], last_fetch: Optional[float], change_count: int) -> float:
+        """
+        Estimated changes per day.
+        """
+        observed_days = ((last_fetch or 0) - (first_fetch or 0)) / DAY if first_fetch else 0.0
+        return (change_count + self.prior_changes) / (observed_days + self.prior_days)
+
+    def _interval_days(self, rate: float) -> float:
+        return min(self.max_days, max(self.min_days, self.revisit_factor / rate))
+
+    def register(self, urls: Iterable[Tuple[str, Optional[str]]]) -> int:
+        """
+        Add (profile_url, search_url) pairs that have not been seen yet.
+        New profiles are due immediately and rank first in the worklist.
+        Returns the number added.
+        """
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO profiles (url, search_url, next_due) VALUES (?, ?, 0)", urls
+            )
+        return cur.rowcount
+
+    def observe(self, url: str, record: Dict[str, Any], fetched_at: Optional[float] = None) -> bool:
+        """
+        Record a successful fetch of a profile and reschedule it.
+        Returns True if the content changed since the previous fetch.
+
+        A partial record (some extractors failed or timed out) says nothing
+        reliable about the content: the fingerprint is left alone and the
+        profile is retried like a failed fetch.
+        """
+        now = fetched_at or time.time()
+        if record.get("partial"):
+            self.register([(url, record.get("searchUrl"))])
+            self.observe_failure(url, now)
+            return False
+
+        fingerprint = record_fingerprint(record)
+        row = self.conn.execute(
+            "SELECT first_fetch, fingerprint, change_count, last_change FROM profiles WHERE url = ?", (url,)
+        ).fetchone()
+
+        first_fetch, old_fingerprint, change_count, last_change = row or (None, None, 0, None)
+        changed = old_fingerprint is not None and old_fingerprint != fingerprint
+        if changed:
+            change_count += 1
+            last_change = now
+        if first_fetch is None:
+            first_fetch = now
+            last_change = now
+
+        rate = self.change_rate(first_fetch, now, change_count)
+        next_due = now + self._interval_days(rate) * DAY
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO profiles (url, search_url, first_fetch, last_fetch, last_change, fetch_count, "
+                "change_count, fingerprint, next_due) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET search_url = COALESCE(excluded.search_url, search_url), "
+                "first_fetch = excluded.first_fetch, last_fetch = excluded.last_fetch, "
+                "last_change = excluded.last_change, fetch_count = fetch_count + 1, "
+                "change_count = excluded.change_count, fingerprint = excluded.fingerprint, "
+                "next_due = excluded.next_due",
+                (url, record.get("searchUrl"), first_fetch, now, last_change, change_count, fingerprint, next_due),
+            )
+        return changed
+
+    def observe_failure(self, url: str, fetched_at: Optional[float] = None) -> None:
+        """
+        Push a profile that could not be fetched back by min_days so it does
+        not take the budget of every run.
+        """
+        now = fetched_at or time.time()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE profiles SET next_due = ? WHERE url = ?", (now + self.min_days * DAY, url)
+            )
+
+    def worklist(
+        self, budget: int, now: Optional[float] = None, fill: bool = False
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Pick up to `budget` due profiles, most likely to have changed first.
+        Never-fetched profiles come before everything else. With fill=True,
+        budget left over after the due profiles goes to the not-yet-due
+        profiles most likely to have changed.
+        """
+        now = now or time.time()
+        # The probability of at least one change since the last fetch
+        # (Poisson) rises with rate * elapsed, so SQLite can rank by that
+        # product (the same rate as change_rate()) and stop at the budget.
+        params = {
+            "now": now,
+            "day": DAY,
+            "prior_changes": self.prior_changes,
+            "prior_days": self.prior_days,
+            "budget": budget,
+        }
+        rows = self.conn.execute(
+            "SELECT url, search_url FROM profiles"
+            + ("" if fill else " WHERE next_due <= :now")
+            + " ORDER BY last_fetch IS NULL DESC, next_due <= :now DESC, "
+            "(change_count + :prior_changes) / ((last_fetch - first_fetch) / :day + :prior_days) "
+            "* (:now - last_fetch) DESC, rowid "
+            "LIMIT :budget",
+            params,
+        ).fetchall()
+        (due,) = self.conn.execute("SELECT COUNT(*) FROM profiles WHERE next_due <= ?", (now,)).fetchone()
+        logger.info("%d profiles due; refreshing %d.", due, len(rows))
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        total, fetched, due = self.conn.execute(
+            "SELECT COUNT(*), COUNT(last_fetch), SUM(next_due <= ?) FROM profiles", (time.time(),)
+        ).fetchone()
+        return {"profiles": total, "fetched": fetched, "due": due or 0}
+
+class HistoryRecorder:
+    """
+    Feeds records into a RevisitScheduler as they are scraped, keeping only
+    their profile URLs. finish() reschedules attempted profiles that
+    produced no record as failures and logs a summary.
+    """
+
+    def __init__(self, scheduler: RevisitScheduler) -> None:
+        self.scheduler = scheduler
+        self.scraped: Set[str] = set()
+        self.changed = 0
+
+    def observe(self, record: Dict[str, Any]) -> None:
+        url = (record.get("urls") or {}).get("profile")
+        if not url:
+            return
+        self.scraped.add(url)
+        if self.scheduler.observe(url, record):
+            self.changed += 1
+
+    def finish(self, attempted: Iterable[str] = ()) -> None:
+        for url in attempted:
+            if url not in self.scraped:
+                self.scheduler.observe_failure(url)
+        logger.info(
+            "Revisit history: %d profiles fetched, %d changed. %s",
+            len(self.scraped),
+            self.changed,
+            self.scheduler.stats(),
+        )
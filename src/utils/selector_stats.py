@@ -0,0 +1,321 @@
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Key recorded when no selector in a chain matched.
+MISS = "(miss)"
+# Pages observed (persisted + this run) before a chain is reordered.
+DEFAULT_MIN_SAMPLES = 50
+# Share of hits at which the top selector is pinned ahead of the others.
+DEFAULT_PIN_RATIO = 0.95
+# Persisted counts are scaled down past this many pages, so a template
+# change takes over within about this many pages instead of never.
+DEFAULT_MAX_SAMPLES = 2000
+# Reorder after this many new observations rather than on every page.
+REORDER_EVERY = 32
+
+# A compound selector: optional tag, then classes, ids and attribute tests.
+_COMPOUND_RE = re.compile(r"(?P<tag>\*|[A-Za-z][\w-]*)?(?P<tests>(?:\.[\w-]+|#[\w-]+|\[[^\]]+\])*)")
+_TEST_RE = re.compile(r"\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<value>[^\]]*))?\]")
+
+Test = Tuple[str, str, str]
+
+def _parse_compound(selector: str) -> Optional[Tuple[Optional[str], List[Test]]]:
+    """
+    Tag and (attribute, operator, value) tests of a compound selector, or
+    None for anything more complex (combinators, pseudo-classes, lists).
+    """
+    match = _COMPOUND_RE.fullmatch(selector.strip())
+    if not match:
+        return None
+    tag = match.group("tag")
+    tests = []
+    for test in _TEST_RE.finditer(match.group("tests")):
+        if test.group("cls"):
+            tests.append(("class", "~=", test.group("cls")))
+        elif test.group("id"):
+            tests.append(("id", "=", test.group("id")))
+        else:
+            value = (test.group("value") or "").strip().strip("\"'")
+            tests.append((test.group("attr").lower(), test.group("op") or "", value))
+    return (None if tag in (None, "*") else tag.lower()), tests
+
+def _implies(narrow: Test, broad: Test) -> bool:
+    attr, op, value = narrow
+    broad_attr, broad_op, broad_value = broad
+    if attr != broad_attr:
+        return False
+    if not broad_op or narrow == broad:
+        return True
+    if broad_op == "*=":
+        return op in ("=", "~=", "|=", "^=", "$=", "*=") and broad_value in value
+    if broad_op == "^=":
+        return op in ("=", "|=", "^=") and value.startswith(broad_value)
+    if broad_op == "$=":
+        return op in ("=", "$=") and value.endswith(broad_value)
+    if broad_op == "~=":
+        return op == "=" and broad_value in value.split()
+    return False
+
+def _nested(first: str, second: str) -> bool:
+    """
+    True unless the two selectors are known not to match subsets of each
+    other (e.g. "h1" matches everything "h1[class*=name]" does). Selectors
+    too complex to compare count as nested.
+    """
+    a, b = _parse_compound(first), _parse_compound(second)
+    if a is None or b is None:
+        return True
+
+    def within(narrow: Tuple[Optional[str], List[Test]], broad: Tuple[Optional[str], List[Test]]) -> bool:
+        if broad[0] is not None and broad[0] != narrow[0]:
+            return False
+        return all(any(_implies(test, broad_test) for test in narrow[1]) for broad_test in broad[1])
+
+    return within(a, b) or within(b, a)
+
+class SelectorChain:
+    """
+    An ordered list of CSS selector fallbacks for one extractor.
+
+    select() returns the first element matched by a selector in the chain
+    (and accepted by `accept`), counting which selector hit. Tuning only
+    ever pins: once enough pages have been seen, a selector that won at
+    least pin_ratio of the hits is tried first, with the rest in declared
+    order. Every selector is still tried before select() reports a miss, so
+    the coverage never changes.
+
+    Pinning does change the result on a page where an earlier-declared
+    selector matches a different element than the pinned one: the pinned
+    selector's element is returned. Since the pinned selector won nearly
+    every page so far, such pages are rare, and on them it is the selector
+    the site's current template uses. A selector is never pinned ahead of
+    an earlier one it is nested with, as that would change the result on
+    every page both match: the catch-all "h1" is not pinned ahead of
+    "h1[class*=doctor-name]" however often it hits.
+    """
+
+    def __init__(self, name: str, selectors: List[str], registry: "SelectorRegistry") -> None:
+        self.name = name
+        self.selectors = list(selectors)
+        self.registry = registry
+        # Counts loaded from disk and counts observed by this process.
+        self.base: Dict[str, float] = {}
+        self.run: Dict[str, int] = {}
+        self.order = list(range(len(self.selectors)))
+        self.pinned: Optional[str] = None
+        self._since_reorder = 0
+        # Earlier selectors each one is nested with, and so may not be pinned ahead of.
+        self.after: List[Set[int]] = [
+            {i for i in range(j) if _nested(self.selectors[i], self.selectors[j])} for j in range(len(self.selectors))
+        ]
+
+    def select(self, soup: Any, accept: Optional[Callable[[Any], Any]] = None) -> Any:
+        for index in self.order:
+            el = soup.select_one(self.selectors[index])
+            if el is not None and (accept is None or accept(el)):
+                self._record(self.selectors[index])
+                return el
+        self._record(MISS)
+        return None
+
+    def _record(self, key: str) -> None:
+        # Parsers run on several threads in the daemon.
+        with self.registry.lock:
+            self.run[key] = self.run.get(key, 0) + 1
+            self._since_reorder += 1
+            if self._since_reorder >= REORDER_EVERY:
+                self.reorder()
+
+    def totals(self) -> Dict[str, float]:
+        counts = dict(self.base)
+        for key, value in self.run.items():
+            counts[key] = counts.get(key, 0) + value
+        return counts
+
+    def reorder(self) -> None:
+        """
+        Recompute the selector order. Call with the registry lock held.
+        """
+        self._since_reorder = 0
+        registry = self.registry
+        counts = self.totals()
+        if not registry.tuning or sum(counts.values()) < registry.min_samples:
+            self.order = list(range(len(self.selectors)))
+            self.pinned = None
+            return
+
+        hits = [counts.get(sel, 0) for sel in self.selectors]
+        best = max(range(len(self.selectors)), key=lambda i: (hits[i], -i))
+        total_hits = sum(hits)
+        if total_hits and hits[best] / total_hits >= registry.pin_ratio and not self.after[best]:
+            self.pinned = self.selectors[best]
+            self.order = [best] + [i for i in range(len(self.selectors)) if i != best]
+        else:
+            self.pinned = None
+            self.order = list(range(len(self.selectors)))
+
+class SelectorRegistry:
+    """
+    All selector chains in the process, plus the stats file they are tuned from.
+
+    Chains are registered when their parser module is imported; stats can be
+    loaded before or after that. Without load() (tuning disabled) chains keep
+    their declared order but still count hits, so save() works either way.
+    `lock` guards the counts and orders of every chain.
+    """
+
+    def __init__(self) -> None:
+        self.chains: Dict[str, SelectorChain] = {}
+        self.loaded: Dict[str, Dict[str, float]] = {}
+        self.tuning = False
+        self.min_samples = DEFAULT_MIN_SAMPLES
+        self.pin_ratio = DEFAULT_PIN_RATIO
+        self.max_samples = DEFAULT_MAX_SAMPLES
+        self.lock = threading.Lock()
+
+    def chain(self, name: str, selectors: List[str]) -> SelectorChain:
+        with self.lock:
+            chain = self.chains.get(name)
+            if chain is None:
+                chain = self.chains[name] = SelectorChain(name, selectors, self)
+                self._seed(chain)
+            return chain
+
+    def _seed(self, chain: SelectorChain) -> None:
+        counts = self.loaded.get(chain.name) or {}
+        chain.base = {key: value for key, value in counts.items() if key in chain.selectors or key == MISS}
+        chain.reorder()
+
+    def load(
+        self,
+        path: str,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        pin_ratio: float = DEFAULT_PIN_RATIO,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+    ) -> None:
+        """
+        Enable tuning from the stats at `path` (a missing file starts empty).
+        """
+        loaded = read_stats(path)
+        with self.lock:
+            self.tuning = True
+            self.min_samples = min_samples
+            self.pin_ratio = pin_ratio
+            self.max_samples = max_samples
+            self.loaded = loaded
+            for chain in self.chains.values():
+                self._seed(chain)
+
+    def save(self, path: str) -> None:
+        """
+        Add this run's counts to the stats at `path`. The file is re-read
+        and replaced under an exclusive lock on `path`.lock, so concurrent
+        workers do not overwrite each other's counts.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.lock, _file_lock(f"{path}.lock"):
+            stats = read_stats(path)
+            for chain in self.chains.values():
+                if not chain.run and chain.name not in stats:
+                    continue
+                counts = stats.setdefault(chain.name, {})
+                for key, value in chain.run.items():
+                    counts[key] = counts.get(key, 0) + value
+                pages = sum(counts.values())
+                if pages > self.max_samples:
+                    scale = self.max_samples / pages
+                    for key in counts:
+                        counts[key] = round(counts[key] * scale, 2)
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+
+            self.loaded = stats
+            for chain in self.chains.values():
+                chain.run = {}
+                self._seed(chain)
+
+    def drift(self) -> List[str]:
+        """
+        Warnings for chains whose pinned selector lost its hold during this
+        run (or that started missing), which usually means the page template changed.
+        """
+        warnings = []
+        with self.lock:
+            runs = [(chain, dict(chain.run)) for chain in self.chains.values()]
+        for chain, run in runs:
+            pages = sum(run.values())
+            if pages < self.min_samples:
+                continue
+            misses = run.get(MISS, 0)
+            if chain.pinned:
+                share = run.get(chain.pinned, 0) / pages
+                if share < self.pin_ratio:
+                    warnings.append(
+                        f"{chain.name}: pinned selector {chain.pinned!r} matched {share:.0%} of {pages} pages this run"
+                    )
+            base_pages = sum(chain.base.values())
+            if base_pages and misses / pages > 2 * chain.base.get(MISS, 0) / base_pages + 0.05:
+                warnings.append(f"{chain.name}: no selector matched {misses} of {pages} pages this run")
+        return warnings
+
+@contextlib.contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on `path` (created if missing). Without
+    fcntl (Windows) saves from separate processes are not serialized.
+    """
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def read_stats(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable selector stats %s: %s", path, e)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def format_stats(stats: Dict[str, Dict[str, float]], pin_ratio: float = DEFAULT_PIN_RATIO) -> str:
+    """
+    Human-readable table of persisted selector stats, most used first per chain.
+    """
+    lines = []
+    for name, counts in sorted(stats.items()):
+        pages = sum(counts.values())
+        hits = sum(value for key, value in counts.items() if key != MISS)
+        lines.append(f"{name} ({pages:g} pages)")
+        for key, value in sorted(counts.items(), key=lambda item: -item[1]):
+            share = value / pages if pages else 0.0
+            pinned = key != MISS and hits and value / hits >= pin_ratio
+            lines.append(f"  {share:>6.1%}  {value:>9g}  {key}{'  [pinned]' if pinned else ''}")
+    return "\n".join(lines)
+
+# Shared by all parser modules.
+REGISTRY = SelectorRegistry()
+
+def chain(name: str, selectors: List[str]) -> SelectorChain:
+    return REGISTRY.chain(name, selectors)
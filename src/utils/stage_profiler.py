@@ -0,0 +1,175 @@
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Counter, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("deterministic", "sampling")
+DEFAULT_INTERVAL_MS = 5.0
+# Samples taken while no stage is active (startup, logging, bookkeeping).
+OUTSIDE_STAGE = "other"
+
+def _frame_name(frame: Any) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+class StageProfiler:
+    """
+    Profiles a run per pipeline stage (search, fetch, parse, export).
+
+    Every stage records wall time and the profiled thread's CPU time, so
+    time spent waiting on the network (wall - cpu) is reported apart from
+    the CPU spent parsing and exporting. On top of that:
+
+    - deterministic: one cProfile per stage, written as <stage>.pstats
+    - sampling: a background thread samples the profiled thread's stack
+      every interval_ms and writes collapsed stacks (<stage>.folded and
+      all.folded with the stage as root frame) for flamegraph.pl or speedscope
+
+    Stages are entered through stage_enter/stage_exit (MemoryBudget.stage
+    calls them). A nested stage pauses the outer one until it exits.
+    """
+
+    def __init__(self, mode: str, out_dir: str, interval_ms: float = DEFAULT_INTERVAL_MS) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}. Use one of: {', '.join(PROFILE_MODES)}.")
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval = max(interval_ms, 0.1) / 1000
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+
+        # stage -> [entries, wall seconds, cpu seconds]
+        self.totals: Dict[str, List[float]] = {}
+        # Open stages: [name, wall start, cpu start]
+        self.stack: List[List[Any]] = []
+        self.profiles: Dict[str, Any] = {}
+        self.samples: Dict[str, Counter[str]] = collections.defaultdict(collections.Counter)
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+        if mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, name="stage-sampler", daemon=True)
+            self._sampler.start()
+
+    # Stage scoping
+
+    def _profile(self, name: str) -> Any:
+        profile = self.profiles.get(name)
+        if profile is None:
+            import cProfile
+
+            profile = self.profiles[name] = cProfile.Profile()
+        return profile
+
+    def stage_enter(self, name: str) -> None:
+        if threading.get_ident() != self.thread_id:
+            return
+        if self.stack and self.mode == "deterministic":
+            self.profiles[self.stack[-1][0]].disable()
+        self.stack.append([name, time.perf_counter(), time.thread_time()])
+        if self.mode == "deterministic":
+            self._profile(name).enable()
+
+    def stage_exit(self, name: str) -> None:
+        if threading.get_ident() != self.thread_id or not self.stack or self.stack[-1][0] != name:
+            return
+        if self.mode == "deterministic":
+            self.profiles[name].disable()
+        _, wall_start, cpu_start = self.stack.pop()
+        totals = self.totals.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += time.perf_counter() - wall_start
+        totals[2] += time.thread_time() - cpu_start
+        if self.stack and self.mode == "deterministic":
+            self.profiles[self.stack[-1][0]].enable()
+
+    # Sampling
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            try:
+                stage = self.stack[-1][0]
+            except IndexError:
+                stage = OUTSIDE_STAGE
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            names.reverse()
+            self.samples[stage][";".join(names)] += 1
+
+    # Output
+
+    def finish(self) -> List[str]:
+        """
+        Stop profiling, write the profile files and the summary, and log the
+        per-stage breakdown. Returns the paths written.
+        """
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        while self.stack:
+            self.stage_exit(self.stack[-1][0])
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        written = []
+        if self.mode == "deterministic":
+            for name, profile in self.profiles.items():
+                path = os.path.join(self.out_dir, f"{name}.pstats")
+                profile.dump_stats(path)
+                written.append(path)
+        else:
+            combined: Counter[str] = collections.Counter()
+            for name, stacks in sorted(self.samples.items()):
+                path = os.path.join(self.out_dir, f"{name}.folded")
+                self._write_folded(path, stacks)
+                written.append(path)
+                for stack, count in stacks.items():
+                    combined[f"{name};{stack}"] += count
+            path = os.path.join(self.out_dir, "all.folded")
+            self._write_folded(path, combined)
+            written.append(path)
+
+        summary = self.summary()
+        path = os.path.join(self.out_dir, "summary.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+        written.append(path)
+
+        for line in summary.splitlines():
+            logger.info("%s", line)
+        logger.info("Wrote %s profile to %s", self.mode, self.out_dir)
+        return written
+
+    @staticmethod
+    def _write_folded(path: str, stacks: Counter[str]) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self) -> str:
+        """
+        Per-stage table: entries, wall seconds, CPU seconds and wait (wall - CPU).
+        """
+        wall_total = time.perf_counter() - self.started
+        lines = [f"{'stage':<8} {'entries':>8} {'wall s':>9} {'cpu s':>9} {'wait s':>9} {'wall %':>7}"]
+        staged = 0.0
+        for name, (entries, wall, cpu) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            staged += wall
+            lines.append(
+                f"{name:<8} {int(entries):>8} {wall:>9.3f} {cpu:>9.3f} {max(wall - cpu, 0.0):>9.3f} "
+                f"{wall / wall_total:>7.1%}"
+            )
+        lines.append(f"{OUTSIDE_STAGE:<8} {'':>8} {max(wall_total - staged, 0.0):>9.3f}")
+        if self.mode == "sampling":
+            taken = sum(sum(stacks.values()) for stacks in self.samples.values())
+            lines.append(f"{taken} samples at {self.interval * 1000:g} ms")
+        return "\n".join(lines)
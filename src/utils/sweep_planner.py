@@ -0,0 +1,249 @@
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+MILES_PER_DEGREE_LAT = 69.0
+
+# Location-specific parameters dropped from the template URL, since a cell is
+# addressed by its own coordinates.
+_LOCATION_PARAMS = ("zip", "zc", "city", "state")
+
+class SearchCell:
+    """
+    A square search area: center point, half the side length in miles,
+    an optional specialty, and how many times it has been split.
+    """
+
+    __slots__ = ("lat", "lng", "half_miles", "specialty", "depth")
+
+    def __init__(self, lat: float, lng: float, half_miles: float, specialty: Optional[str] = None, depth: int = 0) -> None:
+        self.lat = lat
+        self.lng = lng
+        self.half_miles = half_miles
+        self.specialty = specialty
+        self.depth = depth
+
+    @property
+    def radius_miles(self) -> float:
+        # Circle through the corners, so the search covers the whole square.
+        return self.half_miles * math.sqrt(2)
+
+    @property
+    def search_radius(self) -> int:
+        """
+        Radius requested from the site: whole miles, at least one.
+        """
+        return max(1, math.ceil(self.radius_miles))
+
+    def corners(self) -> List[Tuple[float, float]]:
+        dlat = self.half_miles / MILES_PER_DEGREE_LAT
+        dlng = self.half_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(self.lat)), 0.01))
+        return [(self.lat + sy * dlat, self.lng + sx * dlng) for sy in (-1, 1) for sx in (-1, 1)]
+
+    def within_search_of(self, other: "SearchCell") -> bool:
+        """
+        True if this cell's square lies inside the area searched for `other`.
+        """
+        if self.specialty != other.specialty:
+            return False
+        miles_per_lng = MILES_PER_DEGREE_LAT * math.cos(math.radians(other.lat))
+        limit = other.search_radius ** 2
+        return all(
+            ((lat - other.lat) * MILES_PER_DEGREE_LAT) ** 2 + ((lng - other.lng) * miles_per_lng) ** 2 <= limit
+            for lat, lng in self.corners()
+        )
+
+    def split(self) -> List["SearchCell"]:
+        """
+        Return the four quadrants of this cell.
+        """
+        half = self.half_miles / 2
+        dlat = half / MILES_PER_DEGREE_LAT
+        dlng = half / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(self.lat)), 0.01))
+        return [
+            SearchCell(self.lat + sy * dlat, self.lng + sx * dlng, half, self.specialty, self.depth + 1)
+            for sy in (-1, 1)
+            for sx in (-1, 1)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "lat": self.lat,
+            "lng": self.lng,
+            "halfMiles": self.half_miles,
+            "specialty": self.specialty,
+            "depth": self.depth,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchCell":
+        return cls(data["lat"], data["lng"], data["halfMiles"], data.get("specialty"), data.get("depth", 0))
+
+def grid_cells(
+    bbox: Sequence[float], cell_miles: float, specialties: Iterable[Optional[str]]
+) -> List[SearchCell]:
+    """
+    Cover a (min_lat, min_lng, max_lat, max_lng) box with square cells
+    cell_miles on a side, one set per specialty.
+    """
+    min_lat, min_lng, max_lat, max_lng = bbox
+    half = cell_miles / 2
+    lat_step = cell_miles / MILES_PER_DEGREE_LAT
+
+    centers = []
+    lat = min_lat + lat_step / 2
+    while lat - lat_step / 2 < max_lat:
+        lng_step = cell_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        lng = min_lng + lng_step / 2
+        while lng - lng_step / 2 < max_lng:
+            centers.append((lat, lng))
+            lng += lng_step
+        lat += lat_step
+
+    return [SearchCell(lat, lng, half, specialty) for specialty in specialties for lat, lng in centers]
+
+class SweepPlanner:
+    """
+    Plans search requests covering an area (a lat/lng box or a list of
+    points such as zip centroids) for a list of specialties.
+
+    A search that returns result_cap profiles is assumed to be truncated, and
+    its cell is split into four smaller cells, down to min_cell_miles or
+    max_depth. Whether the returned profiles were new says nothing about the
+    ones the cap hid, so coverage is judged geometrically instead: a child
+    cell is dropped when its square lies entirely inside the search circle of
+    a cell that was searched without hitting the cap, since every profile
+    there has already been listed. Coverage is remembered per planner, so
+    queued sweeps (where each task builds its own planner) do not prune.
+    """
+
+    def __init__(
+        self,
+        template_url: str,
+        result_cap: int,
+        cell_miles: float = 10.0,
+        min_cell_miles: float = 1.0,
+        max_depth: int = 4,
+        specialties: Optional[List[str]] = None,
+        bbox: Optional[Sequence[float]] = None,
+        points: Optional[Sequence[Sequence[float]]] = None,
+        specialty_param: str = "specialty",
+        radius_param: str = "d",
+    ) -> None:
+        self.template_url = template_url
+        self.result_cap = result_cap
+        self.cell_miles = cell_miles
+        self.min_cell_miles = min_cell_miles
+        self.max_depth = max_depth
+        self.specialties: List[Optional[str]] = list(specialties or []) or [None]
+        self.bbox = bbox
+        self.points = points
+        self.specialty_param = specialty_param
+        self.radius_param = radius_param
+        # Cells searched without hitting the cap.
+        self.complete: List[SearchCell] = []
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], result_cap: int) -> "SweepPlanner":
+        sweep = config.get("sweep") or {}
+        template_url = sweep.get("templateUrl") or config.get("searchUrl")
+        if not template_url:
+            raise ValueError("A sweep needs sweep.templateUrl or searchUrl as the URL template.")
+        return cls(
+            template_url,
+            result_cap=sweep.get("resultCap") or result_cap,
+            cell_miles=sweep.get("cellMiles", 10.0),
+            min_cell_miles=sweep.get("minCellMiles", 1.0),
+            max_depth=sweep.get("maxDepth", 4),
+            specialties=sweep.get("specialties"),
+            bbox=sweep.get("bbox"),
+            points=sweep.get("points"),
+            specialty_param=sweep.get("specialtyParam", "specialty"),
+            radius_param=sweep.get("radiusParam", "d"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Settings needed to split cells, carried in queued search tasks.
+        """
+        return {
+            "templateUrl": self.template_url,
+            "resultCap": self.result_cap,
+            "minCellMiles": self.min_cell_miles,
+            "maxDepth": self.max_depth,
+            "specialtyParam": self.specialty_param,
+            "radiusParam": self.radius_param,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SweepPlanner":
+        return cls(
+            data["templateUrl"],
+            result_cap=data["resultCap"],
+            min_cell_miles=data["minCellMiles"],
+            max_depth=data["maxDepth"],
+            specialty_param=data["specialtyParam"],
+            radius_param=data["radiusParam"],
+        )
+
+    def initial_cells(self) -> List[SearchCell]:
+        if not self.bbox and not self.points:
+            raise ValueError("A sweep needs either sweep.bbox or sweep.points.")
+        if self.points:
+            half = self.cell_miles / 2
+            return [
+                SearchCell(float(lat), float(lng), half, specialty)
+                for specialty in self.specialties
+                for lat, lng in self.points
+            ]
+        return grid_cells(self.bbox, self.cell_miles, self.specialties)
+
+    def search_url(self, cell: SearchCell) -> str:
+        parts = urlsplit(self.template_url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in _LOCATION_PARAMS]
+        values = dict(query)
+
+        lat, lng = f"{cell.lat:.4f}", f"{cell.lng:.4f}"
+        if "pt" in values:
+            values["pt"] = f"{lat},{lng}"
+        else:
+            values["lat"], values["lng"] = lat, lng
+        values[self.radius_param] = str(cell.search_radius)
+        if cell.specialty is not None:
+            values[self.specialty_param] = cell.specialty
+
+        # Keep the template's parameter order; new parameters go at the end.
+        ordered = [(k, values.pop(k)) for k, _ in query if k in values]
+        ordered.extend(values.items())
+        return urlunsplit(parts._replace(query=urlencode(ordered)))
+
+    def is_covered(self, cell: SearchCell) -> bool:
+        """
+        True if an uncapped search already listed every profile in `cell`.
+        """
+        return any(cell.within_search_of(done) for done in self.complete)
+
+    def refine(self, cell: SearchCell, found: int) -> List[SearchCell]:
+        """
+        Decide whether a searched cell needs splitting, given how many
+        profiles it returned. Children already covered are left out.
+        """
+        if found < self.result_cap:
+            self.complete.append(cell)
+            return []
+        if cell.depth >= self.max_depth or cell.half_miles <= self.min_cell_miles / 2:
+            logger.warning(
+                "Cell %.4f,%.4f (%s) is capped at %d results but cannot be split further.",
+                cell.lat,
+                cell.lng,
+                cell.specialty,
+                found,
+            )
+            return []
+        children = [child for child in cell.split() if not self.is_covered(child)]
+        if len(children) < 4:
+            logger.debug("Cell %.4f,%.4f: %d of 4 quadrants already covered.", cell.lat, cell.lng, 4 - len(children))
+        return children
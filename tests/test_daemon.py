@@ -0,0 +1,140 @@
+"""
+Job API input validation, request handler sharing and memory backpressure in the scrape daemon.
+"""
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from service.daemon import ScrapeDaemon, _ApiHandler
+
+class _Doctor:
+    def __init__(self, url):
+        self.url = url
+
+    def to_dict(self):
+        return {"urls": {"profile": self.url}}
+
+@pytest.fixture
+def api(request):
+    shared = getattr(request, "param", None) == "shared"
+    handlers = []
+    used = set()
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            if not (shared and handlers):
+                handlers.append(object())
+            return handlers[-1]
+
+    def profile_fn(handler, url, search_url):
+        with lock:
+            used.add((threading.current_thread().name, id(handler)))
+        return _Doctor(url)
+
+    daemon = ScrapeDaemon(factory, search_fn=lambda h, url, n: [], profile_fn=profile_fn, workers=3)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), type("ApiHandler", (_ApiHandler,), {"daemon": daemon}))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def send(method, path, body=None):
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+        conn.request(method, path, body=body)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+    yield send, daemon, handlers, used
+    daemon.stop()
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize(
+    "body",
+    [b"[]", b'"x"', b"not json", b"{}", b'{"profileUrls": "https://x"}', b'{"searchUrl": "s", "maxItems": "5"}'],
+)
+def test_bad_job_specs_are_rejected(api, body):
+    request = api[0]
+    status, payload = request("POST", "/jobs", body)
+    assert status == 400
+    assert "error" in json.loads(payload)
+
+@pytest.mark.parametrize("start", ["abc", "-1"])
+def test_bad_results_offset_is_rejected(api, start):
+    request = api[0]
+    status, payload = request("POST", "/jobs", b'{"profileUrls": ["https://x/1"]}')
+    job_id = json.loads(payload)["id"]
+    status, _ = request("GET", f"/jobs/{job_id}/results?from={start}")
+    assert status == 400
+
+def run_job(request, count=30):
+    urls = [f"https://x/{i}" for i in range(count)]
+    status, payload = request("POST", "/jobs", json.dumps({"profileUrls": urls}).encode())
+    assert status == 202
+    status, body = request("GET", f"/jobs/{json.loads(payload)['id']}/results")
+    assert status == 200
+    assert sorted(json.loads(line)["urls"]["profile"] for line in body.splitlines()) == sorted(urls)
+
+def handlers_by_thread(used):
+    threads = {}
+    for thread, handler in used:
+        threads.setdefault(thread, set()).add(handler)
+    return threads
+
+def test_each_fetch_thread_has_its_own_handler(api):
+    request, daemon, handlers, used = api
+    run_job(request)
+
+    assert len(handlers) == 3
+    threads = handlers_by_thread(used)
+    assert all(len(ids) == 1 for ids in threads.values())
+    assert len({next(iter(ids)) for ids in threads.values()}) == len(threads)
+
+@pytest.mark.parametrize("api", ["shared"], indirect=True)
+def test_fetch_threads_can_share_one_handler(api):
+    request, daemon, handlers, used = api
+    run_job(request)
+
+    assert len(handlers) == 1
+    assert {handler for _, handler in used} == {id(handlers[0])}
+
+def test_daemon_handler_factory_shares_only_thread_safe_backends():
+    import main
+
+    per_thread = main.daemon_handler_factory({"fetchBackend": "requests"})
+    assert per_thread() is not per_thread()
+
+    pytest.importorskip("httpx")
+    shared = main.daemon_handler_factory({"fetchBackend": "http2"})
+    handler = shared()
+    try:
+        assert shared() is handler
+    finally:
+        handler.close()
+
+class _TightBudget:
+    def __init__(self, refusals):
+        self.refusals = refusals
+        self.calls = 0
+
+    def wait_for_headroom(self):
+        self.calls += 1
+        return self.calls > self.refusals
+
+def test_fetch_threads_wait_for_memory_headroom():
+    budget = _TightBudget(refusals=2)
+    daemon = ScrapeDaemon(
+        lambda: None,
+        search_fn=lambda h, url, n: [],
+        profile_fn=lambda h, url, search_url: _Doctor(url),
+        workers=1,
+        budget=budget,
+    )
+    try:
+        job = daemon.submit({"profileUrls": ["https://x/1"]})
+        assert [r["urls"]["profile"] for r in daemon.iter_results(job, timeout=5)] == ["https://x/1"]
+        assert job.state == "done"
+        assert budget.calls >= 3
+    finally:
+        daemon.stop()
@@ -0,0 +1,21 @@
+"""
+Batch normalization of parsed records.
+"""
+from utils.data_cleaner import normalize_record, normalize_records, parse_date
+
+def test_normalize_records_cleans_strings_and_dates_at_any_depth():
+    records = [
+        {"bio": "  Board  certified\n", "reviews": [{"text": "Great ", "date": "March 3, 2024"}, {"text": ""}]},
+        {"date": " 2024-01-02 ", "tags": ["a  b", 5]},
+    ]
+    assert normalize_records(records) == [
+        {"bio": "Board certified", "reviews": [{"text": "Great", "date": "3/3/2024"}, {"text": None}]},
+        {"date": "1/2/2024", "tags": ["a b", 5]},
+    ]
+    # Inputs are left alone.
+    assert records[1]["date"] == " 2024-01-02 "
+
+def test_normalize_record_keeps_unparseable_dates():
+    assert normalize_record({"date": "last week"}) == {"date": "last week"}
+    assert normalize_record({"when": "2024-01-02"}, date_fields=("when",)) == {"when": "1/2/2024"}
+    assert parse_date("last week") == "last week"
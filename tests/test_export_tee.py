@@ -0,0 +1,50 @@
+"""
+ExportTee fan-out to several writers.
+"""
+import json
+import re
+
+import pytest
+
+from exporters.jsonl_exporter import JsonlWriter
+from exporters.tee import ExportTee, RecordWriter
+
+class _Failing(RecordWriter):
+    def write(self, record):
+        raise OSError("disk full")
+
+def test_outputs_resolving_to_one_file_are_rejected(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    same = str(tmp_path / "sub" / ".." / "out.jsonl")
+    with pytest.raises(ValueError, match="same file"):
+        ExportTee([("jsonl", JsonlWriter, path), ("jsonl", JsonlWriter, same)])
+
+def test_failing_writer_is_dropped_others_continue(tmp_path):
+    good = str(tmp_path / "good.jsonl")
+    bad = str(tmp_path / "bad.jsonl")
+    tee = ExportTee([("jsonl", JsonlWriter, good), ("broken", _Failing, bad)])
+    for n in range(3):
+        tee.write({"n": n})
+
+    assert tee.close() == [bad]
+    assert tee.written() == [good]
+    assert tee.count == 3
+    with open(good, encoding="utf-8") as f:
+        assert [json.loads(line)["n"] for line in f] == [0, 1, 2]
+
+def test_writers_must_implement_write():
+    class Incomplete(RecordWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("x")
+
+@pytest.mark.parametrize("entry", ["out.jsonl", ["jsonl", "out.jsonl"], None])
+def test_malformed_output_entries_are_rejected(entry):
+    from main import build_export_tee, resolve_outputs
+
+    config = {"outputs": [{"format": "jsonl", "file": "out.jsonl"}, entry]}
+    with pytest.raises(ValueError, match=re.escape(repr(entry))):
+        resolve_outputs(config)
+    with pytest.raises(ValueError):
+        build_export_tee(config)
@@ -0,0 +1,66 @@
+"""
+The http2 fetch backend against the TLS mock (benchmarks/mock_webmd_h2.py),
+and the retry budget shared with reconnects.
+"""
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+from utils.request_handler import RequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+class _StaleConnection(Exception):
+    pass
+
+class _FlakyHandler(RequestHandler):
+    transport_errors = (_StaleConnection,)
+    reconnect_errors = (_StaleConnection,)
+
+    def _build_session(self):
+        self.sent = 0
+        return None
+
+    def _send(self, url, params, stream):
+        self.sent += 1
+        raise _StaleConnection("connection closed")
+
+def test_reconnects_count_against_max_retries(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    handler = _FlakyHandler(max_retries=3, backoff_factor=1.0)
+    assert handler.get("https://x/") is None
+    assert handler.sent == 3
+    # The first failure reconnects at once; later ones back off.
+    assert sleeps == [2.0, 3.0]
+
+def test_reconnects_resume_the_tls_session(tmp_path, monkeypatch):
+    pytest.importorskip("h2")
+    pytest.importorskip("httpx")
+    if not shutil.which("openssl"):
+        pytest.skip("needs the openssl CLI for a test certificate")
+    import mock_webmd
+    import mock_webmd_h2
+    from utils.http2_handler import Http2RequestHandler
+
+    cert, key = mock_webmd_h2.make_certificate(str(tmp_path))
+    server = mock_webmd_h2.start(mock_webmd.MockSite(), cert, key, idle_timeout=0.3)
+    port = server.server_address[1]
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", cert)
+    try:
+        handler = Http2RequestHandler(max_retries=2)
+        for round_no in range(3):
+            if round_no:
+                time.sleep(0.8)
+            assert handler.get(f"https://127.0.0.1:{port}/doctor/{round_no}") is not None
+        handler.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    stats = server.connection_stats()
+    assert stats["h2"] == 3
+    assert stats["resumed"] == 2
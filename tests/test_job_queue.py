@@ -0,0 +1,127 @@
+"""
+JobQueue leases exercised by several worker processes sharing one database.
+"""
+import multiprocessing
+import time
+
+from utils.job_queue import JobQueue
+
+TASKS = 200
+
+def _work(path, worker_id, lease_seconds, results, hold_seconds=0.0, die_after=None):
+    queue = JobQueue(path, lease_seconds=lease_seconds)
+    leased = 0
+    while True:
+        task = queue.lease(worker_id)
+        if task is None:
+            if queue.is_drained():
+                break
+            time.sleep(0.05)
+            continue
+        leased += 1
+        if die_after is not None and leased > die_after:
+            # Exit holding the lease, as a crashed worker would.
+            return
+        time.sleep(hold_seconds)
+        results.put((task["id"], worker_id, task["attempts"], queue.complete(task["id"], worker_id)))
+
+def _run_workers(path, specs, results):
+    procs = [multiprocessing.Process(target=_work, args=(path, *spec[:2], results, *spec[2:])) for spec in specs]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(60)
+        assert proc.exitcode == 0
+    out = []
+    while not results.empty():
+        out.append(results.get())
+    return out
+
+def _fill(path, n, **kwargs):
+    queue = JobQueue(path, **kwargs)
+    for i in range(n):
+        assert queue.enqueue("profile", str(i), {"n": i})
+    # Enqueueing the same key again is a no-op.
+    assert not queue.enqueue("profile", "0", {"n": 0})
+    return queue
+
+def test_leases_are_exclusive_across_processes(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = _fill(path, TASKS)
+    results = multiprocessing.Queue()
+    completed = _run_workers(path, [(f"w{i}", 60) for i in range(4)], results)
+
+    ids = [task_id for task_id, _, _, _ in completed]
+    assert sorted(ids) == list(range(1, TASKS + 1))
+    assert all(ok and attempts == 1 for _, _, attempts, ok in completed)
+    assert len({worker for _, worker, _, _ in completed}) > 1
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": TASKS, "failed": 0}
+
+def test_expired_leases_are_reclaimed(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = _fill(path, 20, lease_seconds=0.5)
+    results = multiprocessing.Queue()
+    # The first worker dies holding one lease; the survivor picks it up once it expires.
+    _run_workers(path, [("crashy", 0.5, 0.0, 0)], results)
+    assert queue.counts()["leased"] == 1
+    completed = _run_workers(path, [("survivor", 0.5)], results)
+
+    assert sorted(task_id for task_id, _, _, _ in completed) == list(range(1, 21))
+    reclaimed = [attempts for _, _, attempts, _ in completed if attempts > 1]
+    assert reclaimed == [2]
+    assert queue.counts()["done"] == 20
+
+def test_stale_worker_cannot_complete_reclaimed_task(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = _fill(path, 1, lease_seconds=0.2)
+    first = queue.lease("slow")
+    time.sleep(0.3)
+    other = JobQueue(path, lease_seconds=0.2)
+    second = other.lease("fast")
+    assert second["id"] == first["id"] and second["attempts"] == 2
+    assert not queue.complete(first["id"], "slow")
+    assert other.complete(second["id"], "fast")
+
+def test_expired_leases_fail_after_max_attempts(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = _fill(path, 1, lease_seconds=0.1, max_attempts=2)
+    for attempt in (1, 2):
+        task = queue.lease(f"w{attempt}")
+        assert task["attempts"] == attempt
+        time.sleep(0.15)
+    assert queue.lease("w3") is None
+    assert queue.counts()["failed"] == 1
+
+def test_finished_tasks_are_requeued_only_for_a_later_crawl(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = _fill(path, 2, max_attempts=1)
+    done = queue.lease("w")
+    queue.complete(done["id"], "w")
+    failed = queue.lease("w")
+    queue.fail(failed["id"], "w", "fetch failed")
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 1, "failed": 1}
+
+    # Without `since`, or with one from before they finished, the keys stay put.
+    assert not queue.enqueue("profile", "0", {"n": 0})
+    assert not queue.enqueue("profile", "1", {"n": 1}, since=0.0)
+
+    since = time.time()
+    assert queue.enqueue("profile", "0", {"n": 0, "crawl": 2}, since=since)
+    assert queue.enqueue("profile", "1", {"n": 1, "crawl": 2}, since=since)
+    task = queue.lease("w")
+    assert task["payload"]["crawl"] == 2 and task["attempts"] == 1
+    # Within the new crawl the key is queued once.
+    assert not queue.enqueue("profile", "0", {"n": 0}, since=since)
+    queue.complete(task["id"], "w")
+    assert not queue.enqueue("profile", "0", {"n": 0}, since=since)
+    assert queue.counts() == {"pending": 1, "leased": 0, "done": 1, "failed": 0}
+
+def test_renewed_lease_outlives_lease_seconds(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = _fill(path, 1, lease_seconds=0.3)
+    other = JobQueue(path, lease_seconds=0.3)
+    task = queue.lease("slow")
+    with queue.renewing(task["id"], "slow", interval=0.05):
+        time.sleep(0.8)
+        assert other.lease("fast") is None
+    assert queue.complete(task["id"], "slow")
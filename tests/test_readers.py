@@ -0,0 +1,96 @@
+"""
+Reading exported output back: every format yields the same records, and
+directories only contribute files that hold exported records.
+"""
+import json
+
+import pytest
+
+from exporters.csv_exporter import CsvWriter
+from exporters.json_exporter import JsonWriter
+from exporters.jsonl_exporter import JsonlWriter
+from exporters.readers import is_record_file, iter_records
+from exporters.xml_exporter import XmlWriter
+from main import expand_output_paths
+from utils.dataset_stats import compute_stats, load_columns
+
+RECORDS = [
+    {
+        "providerid": "E4F63621-2D8F-4AA8-8D9E-3D7AB35FC879",
+        "name": {"first": "Jane", "last": "Doe", "full": "Dr. Jane Doe, MD"},
+        "gender": "F",
+        "npi": "1234567890",
+        "specialties": ["Cardiology", "Internal Medicine"],
+        "location": {"city": "Beverly Hills", "state": "CA", "zip": "90210"},
+        "insurances": ["Aetna"],
+        "ratings": {"averageRating": 4.5, "reviewCount": 12},
+        "urls": {
+            "profile": "https://doctor.webmd.com/doctor/jane-doe",
+            "appointment": "https://doctor.webmd.com/book/jane-doe",
+        },
+    },
+    {
+        "name": {"first": "John", "last": "Roe", "full": "Dr. John Roe"},
+        "specialties": ["Cardiology"],
+        "insurances": [],
+        "location": {"state": "NY"},
+        "urls": {"profile": "https://doctor.webmd.com/doctor/john-roe"},
+        "partial": True,
+    },
+]
+
+WRITERS = {"json": JsonWriter, "jsonl": JsonlWriter, "csv": CsvWriter, "xml": XmlWriter}
+
+def _write(directory, fmt, name="doctors"):
+    path = str(directory / f"{name}.{fmt}")
+    with WRITERS[fmt](path) as writer:
+        for record in RECORDS:
+            writer.write(record)
+    return path
+
+@pytest.mark.parametrize("fmt", sorted(WRITERS))
+def test_formats_read_back_alike(tmp_path, fmt):
+    path = _write(tmp_path, fmt)
+    assert is_record_file(path)
+    records = list(iter_records(path))
+    assert [r["name"]["full"] for r in records] == ["Dr. Jane Doe, MD", "Dr. John Roe"]
+    assert records[0]["specialties"] == ["Cardiology", "Internal Medicine"]
+    assert records[1]["location"]["state"] == "NY"
+
+    report = compute_stats(load_columns([path]))
+    assert report["records"] == 2
+    assert report["partial"] == 1
+
+def test_directories_skip_files_that_are_not_records(tmp_path):
+    paths = [_write(tmp_path, fmt) for fmt in sorted(WRITERS)]
+    (tmp_path / "config.json").write_text(json.dumps({"maxItems": 5}))
+    (tmp_path / "notes.csv").write_text("when,what\n2024-01-01,first run\n")
+    (tmp_path / "other.xml").write_text("<?xml version='1.0'?><settings/>")
+    (tmp_path / "empty.jsonl").write_text("")
+
+    assert expand_output_paths([str(tmp_path)]) == sorted(paths)
+    # One run written in every format counts each record once.
+    report = compute_stats(load_columns(expand_output_paths([str(tmp_path)])))
+    assert report["records"] == 2
+    assert report["partial"] == 1
+    # Files named explicitly are passed through as given.
+    assert expand_output_paths([str(tmp_path / "config.json")]) == [str(tmp_path / "config.json")]
+
+@pytest.mark.parametrize("fmt", sorted(WRITERS))
+def test_index_finds_locations_from_every_format(tmp_path, fmt):
+    from utils.doctor_index import load_index
+
+    # CSV and XML give location keys back in another order than Location's.
+    index = load_index([_write(tmp_path, fmt)])
+    assert [d.npi for d in index.find(state="CA")] == ["1234567890"]
+    assert index.count(state="NY") == 1
+    assert index.count(zip="90210") == 1
+
+@pytest.mark.parametrize("fmt", sorted(WRITERS))
+def test_index_skips_records_loaded_twice(tmp_path, fmt):
+    from utils.doctor_index import load_index
+
+    path = _write(tmp_path, fmt)
+    index = load_index([path, path])
+    assert len(index) == 2
+    assert index.count(specialty="Cardiology") == 2
@@ -0,0 +1,78 @@
+"""
+RevisitScheduler change detection and worklist ranking, and refresh runs
+against the recorded history.
+"""
+from utils.revisit_scheduler import DAY, RevisitScheduler, record_fingerprint
+
+RECORD = {"name": "Dr. Jane Doe", "specialties": ["Family Medicine"], "urls": {"profile": "https://x/1"}}
+
+def test_fingerprint_ignores_scrape_metadata():
+    partial = dict(RECORD, searchUrl="https://x/search", partial=True, partialReasons=["bio: timeout"])
+    assert record_fingerprint(partial) == record_fingerprint(RECORD)
+
+def test_partial_record_does_not_count_as_change(tmp_path):
+    scheduler = RevisitScheduler(str(tmp_path / "revisit.sqlite"))
+    assert not scheduler.observe("https://x/1", RECORD, fetched_at=1000.0)
+    truncated = {"name": "Dr. Jane Doe", "partial": True, "partialReasons": ["specialties: timeout"]}
+    assert not scheduler.observe("https://x/1", truncated, fetched_at=1000.0 + DAY)
+    # The complete record still matches the fingerprint taken before the partial read.
+    assert not scheduler.observe("https://x/1", RECORD, fetched_at=1000.0 + 2 * DAY)
+    assert scheduler.observe("https://x/1", dict(RECORD, name="Dr. Jane Roe"), fetched_at=1000.0 + 3 * DAY)
+
+def test_partial_record_of_new_profile_is_retried(tmp_path):
+    scheduler = RevisitScheduler(str(tmp_path / "revisit.sqlite"), min_days=1.0)
+    scheduler.observe("https://x/new", {"name": "Dr. New", "partial": True}, fetched_at=1000.0)
+    assert scheduler.worklist(10, now=1000.0 + 2 * DAY) == [("https://x/new", None)]
+
+def test_worklist_ranks_new_then_likely_changed(tmp_path):
+    scheduler = RevisitScheduler(str(tmp_path / "revisit.sqlite"), min_days=1.0, max_days=1.0)
+    start = 1000.0
+    for url in ("https://x/stable", "https://x/busy"):
+        scheduler.observe(url, dict(RECORD, n=0), fetched_at=start)
+    for day in range(1, 6):
+        scheduler.observe("https://x/stable", dict(RECORD, n=0), fetched_at=start + day * DAY)
+        scheduler.observe("https://x/busy", dict(RECORD, n=day), fetched_at=start + day * DAY)
+    scheduler.register([("https://x/unseen", "https://x/search")])
+
+    now = start + 10 * DAY
+    urls = [url for url, _ in scheduler.worklist(10, now=now)]
+    assert urls == ["https://x/unseen", "https://x/busy", "https://x/stable"]
+    assert [url for url, _ in scheduler.worklist(2, now=now)] == urls[:2]
+    # Nothing has been fetched within min_days yet, so only the new profile is due.
+    assert scheduler.worklist(10, now=start + 5 * DAY + 1) == [("https://x/unseen", "https://x/search")]
+    assert len(scheduler.worklist(10, now=start + 5 * DAY + 1, fill=True)) == 3
+
+class _Record:
+    def __init__(self, data):
+        self.data = data
+
+    def to_dict(self):
+        return self.data
+
+def test_refresh_keeps_known_search_urls(tmp_path, monkeypatch):
+    import main
+
+    path = str(tmp_path / "revisit.sqlite")
+    scheduler = RevisitScheduler(path)
+    scheduler.register([("https://x/1", None)])
+    targets = []
+
+    def scrape_profiles(handler, pairs, config, budget, on_record):
+        targets.extend(pairs)
+        for url, search_url in pairs:
+            on_record(_Record(dict(RECORD, urls={"profile": url}, searchUrl=search_url)))
+        return len(pairs)
+
+    monkeypatch.setattr(main, "scrape_profiles", scrape_profiles)
+    config = {"revisitDbPath": path, "refreshFillBudget": True, "refreshBudget": 10}
+    assert main.resolve_revisit_db_path(config) == path
+    main.refresh_records(config, lambda doctor: None)
+    assert targets == [("https://x/1", None)]
+    stored = "SELECT search_url FROM profiles WHERE url = 'https://x/1'"
+    assert scheduler.conn.execute(stored).fetchone() == (None,)
+
+    # A search URL learned later survives the next refresh.
+    scheduler.observe("https://x/1", dict(RECORD, searchUrl="https://x/search"))
+    main.refresh_records(config, lambda doctor: None)
+    assert targets[-1] == ("https://x/1", "https://x/search")
+    assert scheduler.conn.execute(stored).fetchone() == ("https://x/search",)
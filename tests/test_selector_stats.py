@@ -0,0 +1,69 @@
+"""
+SelectorChain pinning from observed hit counts, and merged saves.
+"""
+import json
+import multiprocessing
+
+from bs4 import BeautifulSoup
+
+from utils.selector_stats import SelectorChain, SelectorRegistry, read_stats
+
+NAME = ["h1[data-qa-id*=doctor-name]", "h1[class*=doctor-name]", "h1[itemprop=name]", "h1"]
+PHOTOS = ["img[alt*=Doctor]", "img[alt*=Profile]", "img[class*=avatar]"]
+
+def tuned_chain(selectors, counts):
+    registry = SelectorRegistry()
+    registry.tuning = True
+    registry.min_samples = 10
+    chain = SelectorChain("test", selectors, registry)
+    chain.base = counts
+    chain.reorder()
+    return chain
+
+def test_catch_all_stays_behind_specific_selectors():
+    chain = tuned_chain(NAME, {"h1": 990, "h1[class*=doctor-name]": 10})
+    assert chain.pinned is None
+    assert chain.order[-1] == NAME.index("h1")
+
+    soup = BeautifulSoup('<h1>Find a Doctor</h1><h1 class="doctor-name">Dr. Jane Roe</h1>', "html.parser")
+    assert chain.select(soup).get_text() == "Dr. Jane Roe"
+
+def test_only_a_dominant_selector_is_moved():
+    chain = tuned_chain(PHOTOS, {"img[class*=avatar]": 990, "img[alt*=Doctor]": 10})
+    assert chain.pinned == "img[class*=avatar]"
+    assert chain.order == [2, 0, 1]
+
+    # A majority short of pin_ratio leaves the declared order alone.
+    chain = tuned_chain(PHOTOS, {"img[class*=avatar]": 60, "img[alt*=Profile]": 40})
+    assert chain.pinned is None
+    assert chain.order == [0, 1, 2]
+
+def test_pinned_selector_wins_where_an_earlier_one_also_matches():
+    # Documented behaviour: on a page carrying both markers, pinning decides.
+    soup = BeautifulSoup('<img alt="Doctor logo" src="logo.png"><img class="avatar" src="me.png">', "html.parser")
+    assert SelectorChain("test", PHOTOS, SelectorRegistry()).select(soup)["src"] == "logo.png"
+    chain = tuned_chain(PHOTOS, {"img[class*=avatar]": 990, "img[alt*=Doctor]": 10})
+    assert chain.select(soup)["src"] == "me.png"
+
+def test_untuned_chain_keeps_declared_order():
+    chain = SelectorChain("test", NAME, SelectorRegistry())
+    chain.base = {"h1": 990}
+    chain.reorder()
+    assert chain.order == list(range(len(NAME)))
+
+def _save_hits(path, hits):
+    registry = SelectorRegistry()
+    chain = registry.chain("name", NAME)
+    chain.run = {"h1": hits}
+    registry.save(path)
+
+def test_concurrent_saves_keep_every_count(tmp_path):
+    path = str(tmp_path / "stats.json")
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_save_hits, args=(path, 1)) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert read_stats(path) == {"name": {"h1": 8}}
+    assert json.load(open(path)) == {"name": {"h1": 8}}
@@ -0,0 +1,39 @@
+"""
+SweepPlanner splitting of truncated search cells.
+"""
+from utils.sweep_planner import SearchCell, SweepPlanner
+
+URL = "https://doctor.webmd.com/find-a-doctor?specialty=family-medicine&lat=34.07&lng=-118.40&zip=90210"
+
+def test_capped_cell_is_split_into_quadrants():
+    planner = SweepPlanner(URL, result_cap=50, min_cell_miles=1.0, max_depth=4)
+    cell = SearchCell(34.0, -118.4, 5.0)
+    children = planner.refine(cell, 50)
+    assert len(children) == 4
+    assert all(child.half_miles == 2.5 and child.depth == 1 for child in children)
+
+def test_uncapped_cell_is_not_split():
+    planner = SweepPlanner(URL, result_cap=50)
+    assert planner.refine(SearchCell(34.0, -118.4, 5.0), 49) == []
+
+def test_split_stops_at_limits():
+    planner = SweepPlanner(URL, result_cap=50, min_cell_miles=1.0, max_depth=2)
+    assert planner.refine(SearchCell(34.0, -118.4, 5.0, depth=2), 50) == []
+    assert planner.refine(SearchCell(34.0, -118.4, 0.5), 50) == []
+
+def test_children_inside_an_uncapped_search_are_skipped():
+    planner = SweepPlanner(URL, result_cap=50, min_cell_miles=1.0, max_depth=4)
+    wide = SearchCell(34.0, -118.4, 5.0)
+    assert planner.refine(wide, 12) == []
+
+    # A capped cell straddling the edge of the wide search: only the
+    # quadrants reaching outside its circle are searched again.
+    capped = SearchCell(34.0 + 7.0 / 69.0, -118.4, 2.0)
+    children = planner.refine(capped, 50)
+    assert 0 < len(children) < 4
+    assert all(not child.within_search_of(wide) for child in children)
+    assert all(child.lat > capped.lat for child in children)
+
+    # Other specialties are not covered by it.
+    other = SearchCell(capped.lat, capped.lng, 2.0, specialty="cardiology")
+    assert len(planner.refine(other, 50)) == 4